@@ -0,0 +1,174 @@
+"""
+End-to-end benchmark of enriching a catalogue against a local stub of the BGG API.
+
+Each catalogue size runs in its own process, so peak RSS is measured per run,
+while `BggStubServer` replays the recorded fixtures with optional latency and
+429/202 injection. Results are written as JSON; pass an earlier result file as
+`--baseline` to compare two commits.
+
+Usage: python benchmarks/bench_enrich.py [--sizes 100 1000 10000] [--output results.json]
+"""
+
+import argparse
+import contextlib
+import functools
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+import bgg_api  # noqa: E402
+import rate_limiter  # noqa: E402
+from bgg_api import BggApi  # noqa: E402
+from game_record import GameRecord  # noqa: E402
+from stub_server import BggStubServer, catalogue_title  # noqa: E402
+from update_boardgames import update_boardgames_data_batched, update_boardgames_data_concurrent  # noqa: E402
+
+REPO_DIR = os.path.join(os.path.dirname(__file__), os.pardir)
+
+
+def peak_rss_kib():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+def run_size(args):
+    """Enriches a catalogue of `args.run_size` titles and returns its measurements."""
+    # Scale the retry backoff so injected 429/202s cost time in proportion to production.
+    bgg_api.backoff_delay = functools.partial(rate_limiter.backoff_delay, base=args.backoff_base)
+    api = BggApi(
+        api_url=args.api_url,
+        rate_limiter=rate_limiter.TokenBucket(args.rate),
+        pool_size=args.workers,
+    )
+    boardgames_data = [
+        GameRecord(title=catalogue_title(i), filename="benchmark.jpg", box_2d=[i, 0, i + 1, 1])
+        for i in range(args.run_size)
+    ]
+
+    start = time.perf_counter()
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        if args.mode == "batched":
+            updated_count, _ = update_boardgames_data_batched(boardgames_data, api, batch_size=args.batch_size)
+        else:
+            updated_count, _ = update_boardgames_data_concurrent(boardgames_data, api, max_workers=args.workers)
+    seconds = time.perf_counter() - start
+    api.close()
+    histograms = api.metrics.summary()["histograms"]
+
+    return {
+        "titles": args.run_size,
+        "updated": updated_count,
+        "seconds": round(seconds, 4),
+        "titles_per_second": round(args.run_size / seconds, 2),
+        "parse_seconds": round(sum(h["sum"] for name, h in histograms.items() if name.startswith("parse_seconds")), 4),
+        "request_seconds": {
+            name: {stat: round(value, 6) for stat, value in h.items()}
+            for name, h in histograms.items() if name.startswith("request_seconds")
+        },
+        "peak_rss_kib": peak_rss_kib(),
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=REPO_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline_path):
+    """Prints how each catalogue size changed relative to an earlier result file."""
+    with open(baseline_path, "r") as f:
+        baseline = {run["titles"]: run for run in json.load(f)["results"]}
+    for run in results["results"]:
+        old = baseline.get(run["titles"])
+        if old is None:
+            continue
+        print(
+            f"{run['titles']:>6} titles: "
+            f"{run['titles_per_second'] / old['titles_per_second']:.2f}x titles/s, "
+            f"{run['requests'] - old['requests']:+d} requests, "
+            f"{run['peak_rss_kib'] / old['peak_rss_kib']:.2f}x peak RSS "
+            f"(vs {baseline_path})",
+            file=sys.stderr,
+        )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000], help="Catalogue sizes to benchmark.")
+    parser.add_argument("--mode", choices=("batched", "concurrent"), default="batched", help="Update strategy to benchmark.")
+    parser.add_argument("--workers", type=int, default=4, help="Worker threads in concurrent mode.")
+    parser.add_argument("--batch-size", type=int, default=100, help="Titles per batch in batched mode.")
+    parser.add_argument("--rate", type=float, default=1000.0, help="Client rate limit in requests per second.")
+    parser.add_argument("--candidates", type=int, default=3, help="Search hits returned per title.")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds the stub waits before each response.")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="Fraction of responses that are 429s.")
+    parser.add_argument("--queued-rate", type=float, default=0.0, help="Fraction of responses that are 202s.")
+    parser.add_argument("--backoff-base", type=float, default=1.0, help="Base of the client's retry backoff in seconds.")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for the injected errors.")
+    parser.add_argument("--output", help="Write the JSON results to this file instead of stdout.")
+    parser.add_argument("--baseline", help="An earlier JSON result file to compare against.")
+    parser.add_argument("--run-size", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--api-url", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.run_size is not None:
+        print(json.dumps(run_size(args)))
+        return
+
+    stub = BggStubServer(
+        max(args.sizes), candidates=args.candidates, latency=args.latency,
+        throttle_rate=args.throttle_rate, queued_rate=args.queued_rate, seed=args.seed,
+    ).start()
+    child_args = [
+        "--mode", args.mode, "--workers", str(args.workers), "--batch-size", str(args.batch_size),
+        "--rate", str(args.rate), "--backoff-base", str(args.backoff_base), "--api-url", stub.url,
+    ]
+    runs = []
+    try:
+        for size in args.sizes:
+            stub.reset_counts()
+            output = subprocess.run(
+                [sys.executable, __file__, "--run-size", str(size), *child_args],
+                capture_output=True, text=True, check=True,
+            ).stdout
+            run = json.loads(output.splitlines()[-1])
+            run["requests_by_status"] = stub.counts()
+            run["requests"] = sum(sum(statuses.values()) for statuses in run["requests_by_status"].values())
+            print(
+                f"{size:>6} titles: {run['titles_per_second']:9.1f} titles/s, {run['requests']:6d} requests, "
+                f"parse {run['parse_seconds']:.2f}s, peak RSS {run['peak_rss_kib'] / 1024:.1f} MiB",
+                file=sys.stderr,
+            )
+            runs.append(run)
+    finally:
+        stub.stop()
+
+    config = {key: value for key, value in vars(args).items() if key not in ("output", "baseline", "run_size", "api_url")}
+    results = {
+        "benchmark": "enrich",
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "config": config,
+        "results": runs,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    else:
+        print(json.dumps(results, indent=2))
+    if args.baseline:
+        compare(results, args.baseline)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Micro-benchmark of the `thing` response parsers in `BggApi`.
+
+Compares the tree-based `_parse_game_details` (a full ElementTree plus
+descendant searches per item) with the single-pass `_parse_game_details_stream`
+on the recorded fixture, padded to a full 20-item response.
+
+Usage: python benchmarks/bench_parse.py [--repeat N]
+"""
+
+import argparse
+import functools
+import os
+import re
+import sys
+import timeit
+import tracemalloc
+import xml.etree.ElementTree as ET
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+from bgg_api import THING_BATCH_SIZE, BggApi  # noqa: E402
+
+FIXTURE_PATH = os.path.join(os.path.dirname(__file__), os.pardir, "tests", "fixtures", "thing_stats.xml")
+
+
+def load_thing_response(items=THING_BATCH_SIZE):
+    """Returns the recorded fixture with its items repeated up to `items`."""
+    with open(FIXTURE_PATH, "rb") as f:
+        content = f.read()
+    body = re.search(rb"<items[^>]*>(.*)</items>", content, re.DOTALL).group(1)
+    recorded = re.findall(rb"\s*<item .*?</item>", body, re.DOTALL)
+    repeated = [recorded[i % len(recorded)] for i in range(items)]
+    return b'<?xml version="1.0" encoding="utf-8"?><items>' + b"".join(repeated) + b"\n</items>"
+
+
+def parse_tree(api, content):
+    root = ET.fromstring(content)
+    return [api._parse_game_details(item) for item in root.findall(".//item")]
+
+
+def parse_stream(api, content):
+    return api._parse_game_details_stream(content)
+
+
+def peak_memory(func):
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=2000, help="Number of responses to parse per parser.")
+    args = parser.parse_args(argv)
+
+    api = BggApi()
+    content = load_thing_response()
+    assert parse_tree(api, content) == parse_stream(api, content)
+
+    results = {}
+    for name, func in (("tree", parse_tree), ("stream", parse_stream)):
+        run = functools.partial(func, api, content)
+        seconds = min(timeit.repeat(run, number=args.repeat, repeat=3))
+        results[name] = (seconds / args.repeat * 1e6, peak_memory(run))
+        print(f"{name:>6}: {results[name][0]:8.1f} us/response, peak {results[name][1] / 1024:8.1f} KiB")
+
+    print(
+        f"speedup: {results['tree'][0] / results['stream'][0]:.2f}x, "
+        f"memory: {results['stream'][1] / results['tree'][1]:.0%} of tree parser"
+    )
+
+
+if __name__ == "__main__":
+    main()
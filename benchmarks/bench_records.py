@@ -0,0 +1,72 @@
+"""
+Memory benchmark of holding a catalogue as dicts versus `GameRecord`s.
+
+Builds a synthetic catalogue from the records in frontend/public/boardgames.json,
+repeated up to `--size` records, and reports the memory each representation
+holds and how long the "needs details" check takes over every record.
+
+Usage: python benchmarks/bench_records.py [--size N]
+"""
+
+import argparse
+import copy
+import json
+import os
+import sys
+import timeit
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+from game_record import DETAIL_FIELDS, records_from_data  # noqa: E402
+
+DATA_PATH = os.path.join(os.path.dirname(__file__), os.pardir, "frontend", "public", "boardgames.json")
+
+
+def load_catalogue(size):
+    """Returns `size` independent copies of the recorded games, as parsed from JSON."""
+    with open(DATA_PATH, "r") as f:
+        content = f.read()
+    catalogue = []
+    while len(catalogue) < size:
+        catalogue.extend(json.loads(content)[: size - len(catalogue)])
+    return catalogue
+
+
+def dict_needs_details(game):
+    """The "needs details" check on a game held as a dict, for comparison."""
+    return not all(key in game for key in DETAIL_FIELDS) or not game.get("url")
+
+
+def held_memory(build):
+    """Returns the object built by `build` and the memory it holds, in bytes."""
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        built = build()
+        return built, tracemalloc.get_traced_memory()[0] - before
+    finally:
+        tracemalloc.stop()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--size", type=int, default=100_000, help="Number of records in the catalogue.")
+    args = parser.parse_args(argv)
+
+    dicts, dict_bytes = held_memory(lambda: load_catalogue(args.size))
+    records, record_bytes = held_memory(lambda: records_from_data(copy.deepcopy(dicts)))
+    assert [record.to_dict() for record in records] == dicts
+
+    scans = (
+        ("dicts", dicts, dict_bytes, dict_needs_details),
+        ("records", records, record_bytes, lambda record: record.needs_details()),
+    )
+    for name, catalogue, size, needs_details in scans:
+        seconds = min(timeit.repeat(lambda: [needs_details(game) for game in catalogue], number=1, repeat=5))
+        print(f"{name:>8}: {size / 1024 / 1024:8.1f} MiB, needs-details scan {seconds * 1000:7.1f} ms")
+    print(f"records hold {record_bytes / dict_bytes:.0%} of the memory of dicts")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Cold-start benchmark of the command-line entry points.
+
+Each command runs `--repeat` times in a fresh interpreter; the median wall
+time is reported together with the heavy dependencies the command imported
+(from `python -X importtime`), so a regression that pulls selenium, requests
+or NumPy into a cheap command shows up.
+
+Usage: python benchmarks/bench_startup.py [--repeat 10] [--output results.json]
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+REPO_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+DATA_FILE = os.path.join(REPO_DIR, "frontend", "public", "boardgames.json")
+HEAVY_MODULES = ("requests", "selenium", "webdriver_manager", "numpy", "PIL")
+COMMANDS = {
+    "bgcollection --help": ["bgcollection.py", "--help"],
+    "bgcollection report": ["bgcollection.py", "report", DATA_FILE],
+    "bgcollection sync --help": ["bgcollection.py", "sync", "--help"],
+    "bgcollection enrich --help": ["bgcollection.py", "enrich", "--help"],
+    "bgcollection query": ["bgcollection.py", "query", DATA_FILE, "--limit", "1"],
+}
+
+
+def heavy_imports(args):
+    """Returns the heavy top-level modules a command imports."""
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", *args], cwd=REPO_DIR, capture_output=True, text=True
+    ).stderr
+    imported = {line.rsplit("|", 1)[-1].strip() for line in stderr.splitlines() if line.startswith("import time:")}
+    return sorted(module for module in HEAVY_MODULES if module in imported)
+
+
+def time_command(args, repeat):
+    """Returns the wall time of each of `repeat` runs of a command, in milliseconds."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, *args], cwd=REPO_DIR, capture_output=True, check=True)
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=10, help="Runs per command.")
+    parser.add_argument("--output", help="Write the JSON results to this file instead of stdout.")
+    args = parser.parse_args(argv)
+
+    baseline = time_command(["-c", "pass"], args.repeat)
+    results = []
+    for name, command in COMMANDS.items():
+        timings = time_command(command, args.repeat)
+        run = {
+            "command": name,
+            "median_ms": round(statistics.median(timings), 1),
+            "min_ms": round(min(timings), 1),
+            "heavy_imports": heavy_imports(command),
+        }
+        print(f"{name:<28} {run['median_ms']:7.1f} ms  imports: {', '.join(run['heavy_imports']) or '-'}", file=sys.stderr)
+        results.append(run)
+
+    output = {
+        "benchmark": "startup",
+        "python": platform.python_version(),
+        "interpreter_median_ms": round(statistics.median(baseline), 1),
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(output, f, indent=2)
+    else:
+        print(json.dumps(output, indent=2))
+
+
+if __name__ == "__main__":
+    main()
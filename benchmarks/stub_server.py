@@ -0,0 +1,156 @@
+"""
+A local stand-in for the BGG XML API that replays the recorded responses in
+`tests/fixtures`, for benchmarking without touching the network.
+
+The catalogue holds titles "Benchmark Game 0" to "Benchmark Game <size - 1>".
+Searching for one returns `candidates` hits, and `thing` requests return the
+recorded items renumbered to the requested ids. Every response can be delayed
+by `latency` seconds, and a fraction of them can be answered with a 429
+(throttled) or 202 (queued) instead, as BGG does under load.
+"""
+
+import os
+import random
+import re
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+from xml.sax.saxutils import quoteattr
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), os.pardir, "tests", "fixtures")
+TITLE_PREFIX = "Benchmark Game "
+
+
+def catalogue_title(index):
+    return f"{TITLE_PREFIX}{index}"
+
+
+def _load_item_templates(filename):
+    """Splits each recorded item around its id, so it can be renumbered cheaply."""
+    with open(os.path.join(FIXTURES_DIR, filename), "r", encoding="utf-8") as f:
+        content = f.read()
+    templates = []
+    for item in re.findall(r"<item .*?</item>", content, re.DOTALL):
+        original_id = re.search(r'id="(\d+)"', item).group(1)
+        templates.append(item.split(f'id="{original_id}"', 1))
+    return templates
+
+
+def _items_response(items):
+    return ('<?xml version="1.0" encoding="utf-8"?><items termsofuse="https://boardgamegeek.com/xmlapi/termsofuse">\n'
+            + "\n".join(items) + "\n</items>").encode("utf-8")
+
+
+class BggStubServer:
+    """Serves the stub API on `url` from a background thread."""
+
+    def __init__(self, catalogue_size, candidates=3, latency=0.0, throttle_rate=0.0, queued_rate=0.0,
+                 seed=0, host="127.0.0.1", port=0):
+        self.catalogue_size = catalogue_size
+        self.candidates = candidates
+        self.latency = latency
+        self.throttle_rate = throttle_rate
+        self.queued_rate = queued_rate
+        self._random = random.Random(seed)
+        self._counts = Counter()
+        self._lock = threading.Lock()
+        self._search_templates = _load_item_templates("search.xml")
+        self._thing_templates = _load_item_templates("thing_stats.xml")
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/xmlapi2"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def counts(self):
+        """Returns the requests served so far as {endpoint: {status: count}}."""
+        with self._lock:
+            counts = dict(self._counts)
+        by_endpoint = {}
+        for (endpoint, status), count in sorted(counts.items()):
+            by_endpoint.setdefault(endpoint, {})[str(status)] = count
+        return by_endpoint
+
+    def reset_counts(self):
+        with self._lock:
+            self._counts.clear()
+
+    def candidate_ids(self, index):
+        return [str(index * self.candidates + k + 1) for k in range(self.candidates)]
+
+    def _search(self, params):
+        match = re.fullmatch(re.escape(TITLE_PREFIX) + r"(\d+)", params.get("query", [""])[0])
+        items = []
+        if match and int(match.group(1)) < self.catalogue_size:
+            index = int(match.group(1))
+            for k, game_id in enumerate(self.candidate_ids(index)):
+                before, after = self._search_templates[k % len(self._search_templates)]
+                after = re.sub(r'(<name type="primary" value=)"[^"]*"', rf'\1{quoteattr(catalogue_title(index))}', after, 1)
+                items.append(f'{before}id="{game_id}"{after}')
+        return _items_response(items)
+
+    def _thing(self, params):
+        items = []
+        for game_id in params.get("id", [""])[0].split(","):
+            if game_id.isdigit():
+                before, after = self._thing_templates[int(game_id) % len(self._thing_templates)]
+                items.append(f'{before}id="{game_id}"{after}')
+        return _items_response(items)
+
+    def _respond(self, path, params):
+        """Returns the (status, body) for a request."""
+        endpoint = path.rstrip("/").rsplit("/", 1)[-1]
+        with self._lock:
+            roll = self._random.random()
+        if roll < self.throttle_rate:
+            status, body = 429, b"<error><message>Rate limit exceeded.</message></error>"
+        elif roll < self.throttle_rate + self.queued_rate:
+            status, body = 202, b"<message>Your request has been accepted and will be processed.</message>"
+        elif endpoint == "search":
+            status, body = 200, self._search(params)
+        elif endpoint == "thing":
+            status, body = 200, self._thing(params)
+        else:
+            status, body = 404, b""
+        with self._lock:
+            self._counts[(endpoint, status)] += 1
+        return status, body
+
+    def _handler_class(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Headers and body go out in separate writes; without this every
+            # keep-alive response stalls on Nagle plus a delayed ACK.
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                if stub.latency:
+                    time.sleep(stub.latency)
+                url = urlparse(self.path)
+                status, body = stub._respond(url.path, parse_qs(url.query))
+                self.send_response(status)
+                self.send_header("Content-Type", "text/xml; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
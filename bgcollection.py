@@ -0,0 +1,86 @@
+import argparse
+import sys
+
+# Every subcommand imports its module only when it runs, so cheap commands
+# such as `report` never load requests, selenium or NumPy.
+
+
+def enrich(argv):
+    from update_boardgames import cli
+
+    cli(argv)
+
+
+def refresh(argv):
+    parser = argparse.ArgumentParser(
+        prog="bgcollection refresh",
+        description="Refresh the BGG details of enriched games by their stored ids, without searching. "
+        "Other options are passed on to update_boardgames.py.",
+    )
+    parser.add_argument("json_file", help="Path to the boardgames.json (or .jsonl) file to refresh.")
+    parser.add_argument(
+        "--older-than", type=int, metavar="DAYS", default=None,
+        help="Re-fetch all details of games fetched more than DAYS ago (and fill in missing ones) "
+        "instead of refreshing the rank, score and weight of every game.",
+    )
+    args, rest = parser.parse_known_args(argv)
+    if args.older_than is not None:
+        enrich([args.json_file, "--refresh-older-than", str(args.older_than), *rest])
+    else:
+        enrich([args.json_file, "--stats-only", *rest])
+
+
+def sync(argv):
+    from update_collection import cli
+
+    cli(argv)
+
+
+def queue(argv):
+    from work_queue import main
+
+    main(argv)
+
+
+def report(argv):
+    from collection_report import main
+
+    main(argv)
+
+
+def query(argv):
+    from query_boardgames import main
+
+    main(argv)
+
+
+COMMANDS = {
+    "enrich": (enrich, "look up missing BGG details (update_boardgames.py)"),
+    "refresh": (refresh, "refresh stored details by BGG id, without searching"),
+    "sync": (sync, "add the games to your BGG collection (update_collection.py)"),
+    "queue": (queue, "enrich through a shared queue of title shards (work_queue.py)"),
+    "report": (report, "summarize the state of the collection (collection_report.py)"),
+    "query": (query, "filter and sort the collection (query_boardgames.py)"),
+}
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="bgcollection",
+        description="Manage a board game collection photographed on shelves.",
+        epilog="commands:\n" + "\n".join(f"  {name:<9} {help}" for name, (_, help) in COMMANDS.items())
+        + "\n\nRun `bgcollection COMMAND --help` for the options of a command.",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("command", choices=COMMANDS, metavar="COMMAND")
+    parser.add_argument("args", nargs=argparse.REMAINDER, help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    COMMANDS[args.command][0](args.args)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -1,44 +1,296 @@
+import difflib
 import requests
 import xml.etree.ElementTree as ET
 import time
+from requests.adapters import HTTPAdapter
+
+from bgg_common import bgg_id_from_url, normalize_title
+from metrics import Metrics
+from rate_limiter import backoff_delay
+
+# BGG answers 202 while it queues a request, and 429/503 when throttling.
+RETRY_STATUS_CODES = (202, 429, 503)
+# The `thing` endpoint accepts at most this many ids per request.
+THING_BATCH_SIZE = 20
+# At most this many search hits of a title have their details fetched: the
+# ones whose names are closest to the title, in a single `thing` request.
+MAX_CANDIDATES = THING_BATCH_SIZE
+# (connect, read) timeouts in seconds, so a stalled socket cannot hang a run.
+DEFAULT_TIMEOUT = (5, 30)
+# The `collection` endpoint answers 202 for as long as it takes BGG to build
+# the collection, often tens of seconds: it is polled at a fixed interval
+# until this deadline, in seconds, instead of being retried with backoff.
+COLLECTION_QUEUED_TIMEOUT = 180
+QUEUED_POLL_INTERVAL = 5
+
+# Elements of a `thing` item whose `value` attribute maps onto a game field.
+_THING_VALUE_FIELDS = {
+    "average": ("score", float),
+    "minplayers": ("min_players", int),
+    "maxplayers": ("max_players", int),
+    "minplaytime": ("min_playtime", int),
+    "maxplaytime": ("max_playtime", int),
+    "averageweight": ("weight", float),
+}
+
+
+def rank_candidates(game_title, hits, limit=MAX_CANDIDATES):
+    """
+    Orders search hits, as (id, name) pairs, by how plausibly they are the
+    game titled `game_title`: names equal to it once normalized first, then
+    names containing it (such as editions), then by similarity, keeping
+    BGG's order among ties. Returns at most `limit` ids.
+    """
+    wanted = normalize_title(game_title)
+
+    def plausibility(hit):
+        name = normalize_title(hit[1])
+        return (name != wanted, wanted not in name, -difflib.SequenceMatcher(None, wanted, name).ratio())
+
+    return [game_id for game_id, _ in sorted(hits, key=plausibility)[:limit]]
+
+
+def _has_ranked(candidates):
+    return any(candidate['rank'] != float('inf') for candidate in candidates)
+
+
+class _ThingDetailsTarget:
+    """
+    An XMLParser target that picks game details out of a `thing` response
+    as elements stream past. The first matching element of each kind within
+    an item wins, mirroring the `.//` searches of `_parse_game_details`.
+    """
+
+    def __init__(self):
+        self.games = []
+        self._fields = None
+
+    def start(self, tag, attrib):
+        fields = self._fields
+        if tag == "item":
+            if fields is not None:
+                self._finish_item()
+            self._fields = {'id': attrib.get("id")}
+        elif fields is None:
+            return
+        elif tag in _THING_VALUE_FIELDS:
+            key, convert = _THING_VALUE_FIELDS[tag]
+            if key not in fields:
+                try:
+                    fields[key] = convert(attrib.get("value"))
+                except (ValueError, TypeError):
+                    fields[key] = None
+        elif tag == "rank" and 'rank' not in fields and attrib.get("name") == "boardgame":
+            try:
+                fields['rank'] = int(attrib.get("value"))
+            except (ValueError, TypeError):
+                fields['rank'] = None
+
+    def _finish_item(self):
+        fields = self._fields
+        self.games.append({
+            'id': fields['id'], 'rank': fields.get('rank') or float('inf'),
+            'score': fields.get('score') or 0.0,
+            'min_players': fields.get('min_players') or 0, 'max_players': fields.get('max_players') or 0,
+            'min_playtime': fields.get('min_playtime') or 0, 'max_playtime': fields.get('max_playtime') or 0,
+            'weight': fields.get('weight') or 0.0
+        })
+        self._fields = None
+
+    def close(self):
+        if self._fields is not None:
+            self._finish_item()
+        return self.games
 
 
 class BggApi:
-    def __init__(self, api_url="https://boardgamegeek.com/xmlapi2"):
+    def __init__(
+        self,
+        api_url="https://boardgamegeek.com/xmlapi2",
+        rate_limiter=None,
+        max_retries=3,
+        cache=None,
+        offline=False,
+        session=None,
+        pool_size=10,
+        timeout=DEFAULT_TIMEOUT,
+        title_index=None,
+        metrics=None,
+    ):
         self.api_url = api_url
+        self.rate_limiter = rate_limiter
+        self.max_retries = max_retries
+        self.cache = cache
+        self.offline = offline
+        self.session = session if session is not None else self._create_session(pool_size)
+        self.timeout = timeout
+        self.title_index = title_index
+        self.metrics = metrics if metrics is not None else Metrics()
+
+    @staticmethod
+    def _create_session(pool_size):
+        """
+        Creates a keep-alive session whose connection pool can be shared by
+        `pool_size` worker threads at once.
+        """
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        session.headers.update({"Accept-Encoding": "gzip, deflate", "Connection": "keep-alive"})
+        return session
 
-    def _make_request(self, url, params=None):
+    def close(self):
+        """Closes the pooled connections of the session."""
+        self.session.close()
+
+    def _parse(self, url, content, parse):
+        """Returns `parse(content)`, or None if the body is not valid XML."""
         try:
-            response = requests.get(url, params=params)
-            response.raise_for_status()
-            return ET.fromstring(response.content)
-        except requests.exceptions.RequestException as e:
-            print(f"Error making request to {url}: {e}")
+            with self.metrics.timer("parse_seconds", endpoint=url.rstrip("/").rsplit("/", 1)[-1]):
+                return parse(content)
         except ET.ParseError as e:
             print(f"Error parsing XML from {url}: {e}")
         return None
 
-    def search_game(self, title):
+    def _fetch(self, url, parse, params=None, queued_timeout=None):
+        """
+        Returns the body of a successful request as parsed by `parse`, or
+        None if the request failed or its body does not parse.
+        Responses are served from and stored in `cache` when one is set;
+        in offline mode a cache miss is never sent to the network. Only
+        bodies that parse are stored, and a cached body that does not is
+        treated as a miss, so a truncated response is never served again.
+        Request counts, latencies, retries and sleeps go to `metrics`, and
+        every response is reported to the rate limiter so an adaptive one can
+        adjust its rate, exported as the `request_rate` gauge.
+        With `queued_timeout`, a 202 ("queued") answer is not a throttle:
+        the request is repeated every `QUEUED_POLL_INTERVAL` seconds for up
+        to `queued_timeout` seconds, apart from the retries.
+        """
+        endpoint = url.rstrip("/").rsplit("/", 1)[-1]
+        if self.cache is not None:
+            content = self.cache.get(url, params, allow_stale=self.offline)
+            parsed = self._parse(url, content, parse) if content is not None else None
+            if parsed is not None:
+                self.metrics.increment("cache_hits_total", endpoint=endpoint)
+                return parsed
+            self.metrics.increment("cache_misses_total", endpoint=endpoint)
+        if self.offline:
+            print(f"Offline: no cached response for {url} {params}")
+            return None
+
+        attempt = 0
+        queued_polls = int(queued_timeout // QUEUED_POLL_INTERVAL) if queued_timeout else 0
+        while attempt <= self.max_retries:
+            if self.rate_limiter is not None:
+                start = time.perf_counter()
+                self.rate_limiter.acquire()
+                self.metrics.increment("sleep_seconds_total", time.perf_counter() - start, reason="rate_limit")
+            try:
+                with self.metrics.timer("request_seconds", endpoint=endpoint):
+                    response = self.session.get(url, params=params, timeout=self.timeout)
+                self.metrics.increment("requests_total", endpoint=endpoint, status=response.status_code)
+                queued = response.status_code == 202 and queued_timeout is not None
+                if self.rate_limiter is not None and not queued:
+                    if response.status_code in RETRY_STATUS_CODES:
+                        self.rate_limiter.on_throttle()
+                    elif response.status_code == 200:
+                        self.rate_limiter.on_success()
+                    self.metrics.set_gauge("request_rate", self.rate_limiter.rate)
+                if queued:
+                    if queued_polls > 0:
+                        queued_polls -= 1
+                        print(f"BGG is preparing the response for {url}, checking again in {QUEUED_POLL_INTERVAL}s...")
+                        self.metrics.increment("queued_polls_total", endpoint=endpoint)
+                        self.metrics.increment("sleep_seconds_total", QUEUED_POLL_INTERVAL, reason="queued")
+                        time.sleep(QUEUED_POLL_INTERVAL)
+                        continue
+                elif response.status_code in RETRY_STATUS_CODES and attempt < self.max_retries:
+                    delay = backoff_delay(attempt, retry_after=response.headers.get("Retry-After"))
+                    print(f"BGG returned {response.status_code} for {url}, retrying in {delay:.1f}s...")
+                    self.metrics.increment("retries_total", endpoint=endpoint, status=response.status_code)
+                    self.metrics.increment("sleep_seconds_total", delay, reason="backoff")
+                    time.sleep(delay)
+                    attempt += 1
+                    continue
+                response.raise_for_status()
+            except requests.exceptions.RequestException as e:
+                print(f"Error making request to {url}: {e}")
+                self.metrics.increment("request_errors_total", endpoint=endpoint)
+                return None
+            if response.status_code == 202:
+                print(f"BGG is still preparing the response for {url}, giving up.")
+                return None
+            parsed = self._parse(url, response.content, parse)
+            if parsed is not None and self.cache is not None and response.status_code == 200:
+                self.cache.set(url, params, response.content)
+            return parsed
+        return None
+
+    def _make_request(self, url, params=None, queued_timeout=None):
+        """Returns the XML element tree of a successful request, or None."""
+        return self._fetch(url, ET.fromstring, params=params, queued_timeout=queued_timeout)
+
+    def search_hits(self, title, exact=False):
+        """
+        Searches for board games by title and returns the (id, primary name)
+        of each hit, in BGG's order. With `exact`, BGG only returns games
+        whose name matches the title exactly. Returns None if the request
+        failed, as opposed to an empty list when nothing matched.
+        """
         search_url = f"{self.api_url}/search"
         params = {"query": title, "type": "boardgame"}
+        if exact:
+            params["exact"] = 1
         root = self._make_request(search_url, params=params)
         if root is None:
-            return []
-        return [item.get("id") for item in root.findall(".//item") if item.get("id")]
+            return None
+        hits = []
+        for item in root.iter("item"):
+            if item.get("id"):
+                name = item.find("name")
+                hits.append((item.get("id"), name.get("value") if name is not None else None))
+        return hits
+
+    def search_game(self, title, exact=False):
+        return [game_id for game_id, _ in self.search_hits(title, exact=exact) or []]
+
+    def get_owned_game_ids(self, username):
+        """
+        Returns the set of BGG ids the user owns, fetched in one `collection`
+        request, or None if the collection could not be fetched. BGG queues
+        the request at first, so it is polled for up to
+        `COLLECTION_QUEUED_TIMEOUT` seconds.
+        """
+        collection_url = f"{self.api_url}/collection"
+        params = {"username": username, "own": 1, "brief": 1}
+        root = self._make_request(collection_url, params=params, queued_timeout=COLLECTION_QUEUED_TIMEOUT)
+        if root is None or root.tag != "items":
+            return None
+        return {item.get("objectid") for item in root.iter("item") if item.get("objectid")}
 
     def get_game_details(self, game_ids):
+        """Returns the details of up to 20 games by id, or None if the request failed."""
         thing_url = f"{self.api_url}/thing"
         params = {"id": ",".join(game_ids), "stats": 1}
-        root = self._make_request(thing_url, params=params)
-        if root is None:
-            return []
+        return self._fetch(thing_url, self._parse_game_details_stream, params=params)
 
-        games = []
-        for item in root.findall(".//item"):
-            games.append(self._parse_game_details(item))
-        return games
+    @staticmethod
+    def _parse_game_details_stream(content):
+        """
+        Parses a `thing` response in a single streaming pass, returning the
+        same dicts as `_parse_game_details` without building an element tree.
+        """
+        parser = ET.XMLParser(target=_ThingDetailsTarget())
+        parser.feed(content)
+        return parser.close()
 
     def _parse_game_details(self, item):
+        """
+        Extracts game details from an already parsed `thing` item element.
+        `_parse_game_details_stream` does the same straight from the response bytes.
+        """
         game_id = item.get("id")
         rank_value = float('inf')
         score_value = 0.0
@@ -77,29 +329,25 @@ class BggApi:
             'weight': weight
         }
 
-    def get_bgg_game_details(self, game_title):
-        """
-        Searches for a board game on BoardGameGeek and returns its details.
-        It searches for the game by title, finds the most popular version (by rank),
-        and returns its BGG URL, rank, average score, and other stats.
-        """
-        game_ids = self.search_game(game_title)
-        if not game_ids:
-            return None
-
-        all_game_candidates = []
-        for i in range(0, len(game_ids), 20):
-            chunk = game_ids[i:i + 20]
-            all_game_candidates.extend(self.get_game_details(chunk))
-            if len(game_ids) > 20:
+    def _fetch_candidates(self, game_ids, failed_ids=None, on_progress=None):
+        candidates = []
+        for i in range(0, len(game_ids), THING_BATCH_SIZE):
+            chunk = game_ids[i:i + THING_BATCH_SIZE]
+            games = self.get_game_details(chunk)
+            if games is None:
+                if failed_ids is not None:
+                    failed_ids.update(chunk)
+                games = []
+            candidates.extend(games)
+            if on_progress is not None:
+                on_progress()
+            if len(game_ids) > THING_BATCH_SIZE and self.rate_limiter is None:
+                self.metrics.increment("sleep_seconds_total", 1, reason="pacing")
                 time.sleep(1)
+        return candidates
 
-        if not all_game_candidates:
-            return None
-
-        all_game_candidates.sort(key=lambda x: x['rank'])
-        best_game = all_game_candidates[0]
-
+    @staticmethod
+    def _format_game_details(best_game):
         return {
             "url": f"https://boardgamegeek.com/boardgame/{best_game['id']}",
             "rank": best_game['rank'] if best_game['rank'] != float('inf') else "Not Ranked",
@@ -110,3 +358,165 @@ class BggApi:
             "max_playtime": best_game['max_playtime'],
             "weight": round(best_game['weight'], 2)
         }
+
+    def _best_game_details(self, candidates):
+        if not candidates:
+            return None
+        return self._format_game_details(min(candidates, key=lambda x: x['rank']))
+
+    def _candidate_tiers(self, game_title, hit_names=None):
+        """
+        Yields lists of candidate ids for a title, most plausible first, so
+        callers can stop as soon as a tier holds a ranked game: the indexed
+        id when the title is known (and nothing else), then the hits of an
+        exact-name search, then the best `MAX_CANDIDATES` remaining hits of
+        a full search, as ordered by `rank_candidates`. A fuzzy match from
+        the title index is not trusted on its own: it is tried first, alone,
+        only once a search has returned it too. If a search request fails,
+        None is yielded and the tiers end, so the title is not taken for
+        one BGG does not know. The name of every search hit is stored in
+        `hit_names` by id, if given.
+        """
+        fuzzy_id = None
+        if self.title_index is not None:
+            game_id = self.title_index.lookup(game_title)
+            if game_id:
+                self.metrics.increment("title_index_hits_total")
+                yield [game_id]
+                return
+            fuzzy_id = self.title_index.fuzzy_lookup(game_title)
+
+        exact_hits = self.search_hits(game_title, exact=True)
+        if exact_hits is None:
+            yield None
+            return
+        if hit_names is not None:
+            hit_names.update(exact_hits)
+        exact_ids = rank_candidates(game_title, exact_hits)
+        hits = None
+        if fuzzy_id and fuzzy_id not in exact_ids:
+            hits = self.search_hits(game_title)
+            if hits is None:
+                yield None
+                return
+            if hit_names is not None:
+                hit_names.update(hits)
+            hits = [hit for hit in hits if hit[0] not in exact_ids]
+        if fuzzy_id and (fuzzy_id in exact_ids or any(hit[0] == fuzzy_id for hit in hits)):
+            self.metrics.increment("title_index_fuzzy_hits_total")
+            yield [fuzzy_id]
+
+        other_exact_ids = [game_id for game_id in exact_ids if game_id != fuzzy_id]
+        if other_exact_ids:
+            yield other_exact_ids
+
+        if hits is None:
+            hits = self.search_hits(game_title)
+            if hits is None:
+                yield None
+                return
+            if hit_names is not None:
+                hit_names.update(hits)
+        hits = [hit for hit in hits if hit[0] not in exact_ids and hit[0] != fuzzy_id]
+        self.metrics.increment("candidates_pruned_total", max(0, len(hits) - MAX_CANDIDATES))
+        other_ids = rank_candidates(game_title, hits)
+        if other_ids:
+            yield other_ids
+
+    def _remember(self, game_title, details, hit_names=None):
+        """Indexes the title a lookup resolved, and the name of the search hit it resolved to."""
+        if self.title_index is not None and details:
+            game_id = bgg_id_from_url(details["url"])
+            hit_name = (hit_names or {}).get(game_id)
+            self.title_index.add(game_title, game_id, aliases=[hit_name] if hit_name else ())
+
+    def get_bgg_game_details(self, game_title):
+        """
+        Searches for a board game on BoardGameGeek and returns its details.
+        It searches for the game by title, finds the most popular version (by rank),
+        and returns its BGG URL, rank, average score, and other stats.
+        Exact-name matches are fetched first and end the lookup when one is
+        ranked; otherwise only the most plausible hits of a full search are
+        fetched. Titles already in `title_index` skip the search entirely.
+        Returns None if nothing was found or a request failed.
+        """
+        candidates = []
+        failed_ids = set()
+        hit_names = {}
+        for game_ids in self._candidate_tiers(game_title, hit_names=hit_names):
+            if game_ids is None:
+                return None
+            candidates.extend(self._fetch_candidates(game_ids, failed_ids=failed_ids))
+            if failed_ids:
+                return None
+            if _has_ranked(candidates):
+                break
+
+        details = self._best_game_details(candidates)
+        self._remember(game_title, details, hit_names)
+        return details
+
+    def get_bgg_game_details_many(self, game_titles, failed=None, on_progress=None):
+        """
+        Looks up several board games at once and returns a dict mapping each
+        title to its details (or None), as `get_bgg_game_details` would.
+        Titles advance through their candidate tiers in rounds: each round
+        runs the searches of every unresolved title first, then dedupes
+        their candidate ids and packs them into full 20-id `thing` requests.
+        Titles whose lookup hit a failed request also map to None, and are
+        added to the `failed` set if one is given, so callers can retry
+        them instead of taking them for games BGG does not know.
+        `on_progress` is called after every search and `thing` request; it
+        may raise to abandon the lookup.
+        """
+        hit_names = {title: {} for title in dict.fromkeys(game_titles)}
+        tiers = {title: self._candidate_tiers(title, hit_names=hit_names[title]) for title in hit_names}
+        candidates = {title: [] for title in tiers}
+        candidates_by_id = {}
+        failed_titles = set()
+        failed_ids = set()
+
+        pending = list(tiers)
+        while pending:
+            round_ids = {}
+            for title in pending:
+                # Tiers are never empty lists, so [] means exhausted and None a failed search.
+                game_ids = next(tiers[title], [])
+                if on_progress is not None:
+                    on_progress()
+                if game_ids is None:
+                    failed_titles.add(title)
+                elif game_ids:
+                    round_ids[title] = game_ids
+            unique_ids = list(dict.fromkeys(
+                game_id for ids in round_ids.values() for game_id in ids if game_id not in candidates_by_id
+            ))
+            candidates_by_id.update(
+                (game['id'], game)
+                for game in self._fetch_candidates(unique_ids, failed_ids=failed_ids, on_progress=on_progress)
+            )
+
+            pending = []
+            for title, ids in round_ids.items():
+                if failed_ids.intersection(ids):
+                    failed_titles.add(title)
+                    continue
+                candidates[title].extend(candidates_by_id[i] for i in ids if i in candidates_by_id)
+                if not _has_ranked(candidates[title]):
+                    pending.append(title)
+
+        results = {}
+        for title, title_candidates in candidates.items():
+            results[title] = None if title in failed_titles else self._best_game_details(title_candidates)
+            self._remember(title, results[title], hit_names[title])
+        if failed is not None:
+            failed.update(failed_titles)
+        return results
+
+    def get_bgg_game_details_by_ids(self, game_ids):
+        """
+        Fetches details for games whose BGG ids are already known, skipping
+        the search step. Returns a dict mapping each id found to its details.
+        """
+        unique_ids = list(dict.fromkeys(str(game_id) for game_id in game_ids))
+        return {game['id']: self._format_game_details(game) for game in self._fetch_candidates(unique_ids)}
@@ -1,90 +1,156 @@
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service
 from webdriver_manager.chrome import ChromeDriverManager
+from webdriver_manager.core.driver_cache import DriverCacheManager
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-import time
+import json
 import re
 
+from metrics import Metrics
+from sync_journal import ADDED, ALREADY_OWNED, ERROR, SKIPPED
+
 BGG_BASE_URL = "https://boardgamegeek.com"
+WAIT_TIMEOUT = 10
+# Days a downloaded chromedriver is reused before checking for a newer one.
+DRIVER_CACHE_DAYS = 30
+# A game page is usable once either of these has been rendered.
+OWNED_STATUS_XPATH = "//a[contains(@class, 'collection-status-owned')] | //span[contains(@class, 'collection-status-owned')] | //div[contains(@class, 'collection-status-owned')]"
+ADD_TO_COLLECTION_XPATH = "//a[contains(text(), 'Add to Collection')] | //button[contains(text(), 'Add to Collection')]"
+
+_chromedriver_path = None
+
+
+def _get_chromedriver_path():
+    """Installs chromedriver at most once per process, reusing the on-disk cache."""
+    global _chromedriver_path
+    if _chromedriver_path is None:
+        cache_manager = DriverCacheManager(valid_range=DRIVER_CACHE_DAYS)
+        _chromedriver_path = ChromeDriverManager(cache_manager=cache_manager).install()
+    return _chromedriver_path
 
 
 class BggCollectionManager:
-    def __init__(self):
+    def __init__(self, headless=False, metrics=None, cookies_file=None):
+        if headless and not cookies_file:
+            raise ValueError("A headless browser cannot be logged in by hand; a cookies file is required.")
         self.driver = None
+        self.headless = headless
+        self.cookies_file = cookies_file
+        self.metrics = metrics if metrics is not None else Metrics()
 
     def setup_driver(self):
-        """Sets up the Chrome WebDriver."""
-        service = Service(ChromeDriverManager().install())
-        self.driver = webdriver.Chrome(service=service)
-        self.driver.maximize_window()
+        """Sets up the Chrome WebDriver, headless if requested."""
+        service = Service(_get_chromedriver_path())
+        options = webdriver.ChromeOptions()
+        if self.headless:
+            options.add_argument("--headless=new")
+            options.add_argument("--window-size=1920,1080")
+        self.driver = webdriver.Chrome(service=service, options=options)
+        if not self.headless:
+            self.driver.maximize_window()
+
+    def get_cookies(self):
+        """Returns the cookies of the browser session, e.g. after logging in."""
+        return self.driver.get_cookies()
+
+    def load_cookies(self, cookies):
+        """Reuses cookies from another session, such as its BGG login."""
+        self.driver.get(BGG_BASE_URL)
+        for cookie in cookies:
+            self.driver.add_cookie(cookie)
+        self.driver.refresh()
+
+    def _wait_for_collection_controls(self):
+        # The collection controls are rendered by scripts that run after the
+        # document is ready, so wait for them rather than for readyState.
+        WebDriverWait(self.driver, WAIT_TIMEOUT).until(
+            EC.presence_of_element_located((By.XPATH, f"{ADD_TO_COLLECTION_XPATH} | {OWNED_STATUS_XPATH}"))
+        )
 
     def login_to_bgg(self):
-        """Handles the login process for BoardGameGeek."""
+        """
+        Handles the login process for BoardGameGeek: cookies saved from a
+        logged-in session are loaded when a cookies file is given, otherwise
+        the user logs in by hand in the browser window.
+        """
+        if self.cookies_file:
+            with open(self.cookies_file, 'r') as f:
+                self.load_cookies(json.load(f))
+            print(f"Loaded BoardGameGeek cookies from {self.cookies_file}.")
+            return
+
         print("Please log in to BoardGameGeek in the opened browser window.")
         print(f"Navigate to: {BGG_BASE_URL}")
         input("Press Enter after you have successfully logged in and are on the BGG homepage...")
 
     def add_game_to_collection(self, game):
-        """Adds a single game to the user's BGG collection."""
+        """
+        Adds a single game to the user's BGG collection.
+        Returns a (status, reason) tuple using the statuses of `sync_journal`.
+        The time of each browser step is recorded in `metrics`.
+        """
         title = game.get("title")
         url = game.get("url")
 
         if not url:
             print(f"Skipping '{title}': No URL found.")
-            return
+            return SKIPPED, "No URL found."
 
         match = re.search(r'/boardgame/(\d+)', url)
         if not match:
             print(f"Skipping '{title}': Invalid BGG URL format.")
-            return
+            return SKIPPED, "Invalid BGG URL format."
 
         game_id = match.group(1)
         game_page_url = f"{BGG_BASE_URL}/boardgame/{game_id}"
 
         print(f"Processing '{title}' (ID: {game_id})...")
         try:
-            self.driver.get(game_page_url)
-            time.sleep(2)  # Give page time to load
+            with self.metrics.timer("browser_step_seconds", step="page_load"):
+                self.driver.get(game_page_url)
+                self._wait_for_collection_controls()
 
             # Check if already in collection
             try:
-                owned_status_link = self.driver.find_element(By.XPATH, "//a[contains(@class, 'collection-status-owned')] | //span[contains(@class, 'collection-status-owned')] | //div[contains(@class, 'collection-status-owned')] ")
+                owned_status_link = self.driver.find_element(By.XPATH, OWNED_STATUS_XPATH)
                 if owned_status_link.is_displayed():
                     print(f"'{title}' is already in your collection as 'Owned'. Skipping.")
-                    return
+                    return ALREADY_OWNED, None
             except Exception:
                 pass  # Not found, proceed to add
 
-            # Click "Add to Collection"
-            add_to_collection_button = WebDriverWait(self.driver, 10).until(
-                EC.element_to_be_clickable((By.XPATH, "//a[contains(text(), 'Add to Collection')] | //button[contains(text(), 'Add to Collection')] "))
-            )
-            if add_to_collection_button:
+            # Click "Add to Collection"; the dialog is open once its "Owned" checkbox is clickable.
+            with self.metrics.timer("browser_step_seconds", step="open_dialog"):
+                add_to_collection_button = WebDriverWait(self.driver, WAIT_TIMEOUT).until(
+                    EC.element_to_be_clickable((By.XPATH, ADD_TO_COLLECTION_XPATH))
+                )
+                if not add_to_collection_button:
+                    return ERROR, "'Add to Collection' button not found."
                 add_to_collection_button.click()
                 print(f"Clicked 'Add to Collection' for '{title}'.")
-                time.sleep(3)
-
-                # Mark as "Owned" and save
-                owned_checkbox = WebDriverWait(self.driver, 10).until(
+                owned_checkbox = WebDriverWait(self.driver, WAIT_TIMEOUT).until(
                     EC.element_to_be_clickable((By.ID, "owned"))
                 )
-                if not owned_checkbox.is_selected():
-                    owned_checkbox.click()
-                    print(f"Selected 'Owned' status for '{title}'.")
 
-                save_button = WebDriverWait(self.driver, 10).until(
+            # Mark as "Owned"
+            if not owned_checkbox.is_selected():
+                owned_checkbox.click()
+                print(f"Selected 'Owned' status for '{title}'.")
+
+            with self.metrics.timer("browser_step_seconds", step="save"):
+                save_button = WebDriverWait(self.driver, WAIT_TIMEOUT).until(
                     EC.element_to_be_clickable((By.XPATH, "//button[contains(text(), 'Save')] | //input[@value='Save']"))
                 )
                 save_button.click()
-                print(f"Saved collection status for '{title}'.")
-                time.sleep(2)
+                WebDriverWait(self.driver, WAIT_TIMEOUT).until(EC.invisibility_of_element(save_button))
+            print(f"Saved collection status for '{title}'.")
+            return ADDED, None
 
         except Exception as e:
             print(f"An error occurred while processing '{title}': {e}")
-        finally:
-            time.sleep(5)
+            return ERROR, str(e)
 
     def close_driver(self):
         """Closes the WebDriver."""
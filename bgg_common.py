@@ -0,0 +1,23 @@
+# Helpers shared by the BGG client and the modules that only handle stored
+# records. They only use the standard library, so importing them never loads
+# `requests`.
+
+import re
+import unicodedata
+
+
+def bgg_id_from_url(url):
+    """Returns the BGG id in a `/boardgame/<id>` URL, or None."""
+    match = re.search(r'/boardgame/(\d+)', url or "")
+    return match.group(1) if match else None
+
+
+def normalize_title(title):
+    """
+    Normalizes a game title for lookups: accents, punctuation, case, a
+    leading "the" and repeated whitespace are all ignored.
+    """
+    title = unicodedata.normalize("NFKD", title or "")
+    title = "".join(c for c in title if not unicodedata.combining(c)).casefold()
+    title = re.sub(r"[^\w]+", " ", title).strip()
+    return re.sub(r"^the ", "", title)
@@ -0,0 +1,133 @@
+import getpass
+import json
+import os
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from bgg_api import DEFAULT_TIMEOUT, bgg_id_from_url
+from metrics import Metrics
+from sync_journal import ADDED, ALREADY_OWNED, ERROR, SKIPPED
+
+BGG_BASE_URL = "https://boardgamegeek.com"
+
+
+class BggHttpCollectionManager:
+    """
+    Adds games to the BGG collection by posting to the website's JSON API
+    over a pooled HTTP session, without starting a browser. It offers the
+    same interface as `BggCollectionManager`, so either can drive a sync.
+
+    Unlike a game page, the API does not say whether a game is already
+    owned, and posting an owned game adds a second copy. So the ids the user
+    owns (see `BggApi.get_owned_game_ids`) must be passed as `owned_ids`:
+    those games are skipped, and games are only posted while it is known.
+    """
+
+    def __init__(
+        self,
+        base_url=BGG_BASE_URL,
+        username=None,
+        cookies_file=None,
+        pool_size=4,
+        timeout=DEFAULT_TIMEOUT,
+        metrics=None,
+        owned_ids=None,
+    ):
+        self.base_url = base_url
+        self.username = username
+        self.cookies_file = cookies_file
+        self.owned_ids = set(owned_ids) if owned_ids is not None else None
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.metrics = metrics if metrics is not None else Metrics()
+        self.session = None
+
+    def setup_driver(self):
+        """Creates the pooled HTTP session used instead of a browser."""
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=self.pool_size, pool_maxsize=self.pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update({"Accept-Encoding": "gzip, deflate", "Connection": "keep-alive"})
+
+    def login_to_bgg(self):
+        """
+        Logs in to BoardGameGeek. Cookies saved from a logged-in session are
+        reused when a cookies file is given; otherwise the username and the
+        BGG_PASSWORD environment variable (or a prompt) are used.
+        """
+        if self.cookies_file:
+            with open(self.cookies_file, 'r') as f:
+                self.load_cookies(json.load(f))
+            print(f"Loaded BoardGameGeek cookies from {self.cookies_file}.")
+            return
+
+        username = self.username or input("BoardGameGeek username: ")
+        password = os.environ.get("BGG_PASSWORD") or getpass.getpass("BoardGameGeek password: ")
+        response = self.session.post(
+            f"{self.base_url}/login/api/v1",
+            json={"credentials": {"username": username, "password": password}},
+            timeout=self.timeout,
+        )
+        response.raise_for_status()
+        print(f"Logged in to BoardGameGeek as '{username}'.")
+
+    def get_cookies(self):
+        """Returns the session cookies in the format WebDriver uses."""
+        return [
+            {"name": cookie.name, "value": cookie.value, "domain": cookie.domain, "path": cookie.path}
+            for cookie in self.session.cookies
+        ]
+
+    def load_cookies(self, cookies):
+        """Reuses cookies from another session, e.g. a logged-in browser."""
+        for cookie in cookies:
+            self.session.cookies.set(
+                cookie["name"], cookie["value"], domain=cookie.get("domain", ""), path=cookie.get("path", "/")
+            )
+
+    def add_game_to_collection(self, game):
+        """
+        Adds a single game to the user's BGG collection.
+        Returns a (status, reason) tuple using the statuses of `sync_journal`.
+        Request times are recorded in `metrics`.
+        """
+        title = game.get("title")
+        url = game.get("url")
+
+        if not url:
+            print(f"Skipping '{title}': No URL found.")
+            return SKIPPED, "No URL found."
+
+        game_id = bgg_id_from_url(url)
+        if not game_id:
+            print(f"Skipping '{title}': Invalid BGG URL format.")
+            return SKIPPED, "Invalid BGG URL format."
+
+        if self.owned_ids is None:
+            print(f"Skipping '{title}': the owned games are unknown, so it could be added twice.")
+            return SKIPPED, "Owned games unknown."
+        if game_id in self.owned_ids:
+            print(f"'{title}' is already in your collection as 'Owned'. Skipping.")
+            return ALREADY_OWNED, None
+
+        print(f"Processing '{title}' (ID: {game_id})...")
+        item = {"collid": 0, "objecttype": "thing", "objectid": int(game_id), "status": {"own": True}}
+        try:
+            with self.metrics.timer("request_seconds", endpoint="collectionitems"):
+                response = self.session.post(
+                    f"{self.base_url}/api/collectionitems", json={"item": item}, timeout=self.timeout
+                )
+            response.raise_for_status()
+            self.owned_ids.add(game_id)
+            print(f"Saved collection status for '{title}'.")
+            return ADDED, None
+        except requests.exceptions.RequestException as e:
+            print(f"An error occurred while processing '{title}': {e}")
+            return ERROR, str(e)
+
+    def close_driver(self):
+        """Closes the HTTP session."""
+        if self.session:
+            self.session.close()
@@ -0,0 +1,246 @@
+import argparse
+import copy
+
+from bgg_common import normalize_title
+from file_utils import iter_boardgames_data, write_json_atomic
+from game_record import FIELD_NAMES, json_default
+
+# Side of a grid cell, in `box_2d` units (the photo is a 1024 x 1024 grid).
+CELL_SIZE = 64
+# Boxes of the same photo overlapping at least this much are the same detection.
+DEFAULT_DUPLICATE_IOU = 0.8
+
+
+def normalize_box(box_2d):
+    """Returns a `box_2d` as a (y1, x1, y2, x2) tuple with y1 <= y2 and x1 <= x2, or None."""
+    try:
+        y1, x1, y2, x2 = (float(value) for value in box_2d)
+    except (TypeError, ValueError):
+        return None
+    return min(y1, y2), min(x1, x2), max(y1, y2), max(x1, x2)
+
+
+def intersection(a, b):
+    """Returns the area shared by two normalized boxes."""
+    height = min(a[2], b[2]) - max(a[0], b[0])
+    width = min(a[3], b[3]) - max(a[1], b[1])
+    return height * width if height > 0 and width > 0 else 0.0
+
+
+def iou(a, b):
+    """Returns the intersection over union of two normalized boxes."""
+    shared = intersection(a, b)
+    if not shared:
+        return 0.0
+    area_a = (a[2] - a[0]) * (a[3] - a[1])
+    area_b = (b[2] - b[0]) * (b[3] - b[1])
+    return shared / (area_a + area_b - shared)
+
+
+class BoxIndex:
+    """
+    A uniform grid over the `box_2d` of every game, one grid per photo.
+
+    Each box is registered in the cells it covers, so point, region and
+    overlap queries only compare boxes that share a cell instead of every
+    pair. Games are identified by their position in the data; games
+    without a filename or a valid box are left out.
+    """
+
+    def __init__(self, boardgames_data, cell_size=CELL_SIZE):
+        self.games = list(boardgames_data)
+        self.cell_size = cell_size
+        self.boxes = {}
+        self._grids = {}
+        for position, game in enumerate(self.games):
+            box = normalize_box(game.get("box_2d"))
+            if box is None or not game.get("filename"):
+                continue
+            self.boxes[position] = box
+            grid = self._grids.setdefault(game["filename"], {})
+            for cell in self._cells(box):
+                grid.setdefault(cell, []).append(position)
+
+    def _cells(self, box):
+        size = self.cell_size
+        for row in range(int(box[0] // size), int(box[2] // size) + 1):
+            for column in range(int(box[1] // size), int(box[3] // size) + 1):
+                yield row, column
+
+    def _candidates(self, filename, box):
+        grid = self._grids.get(filename, {})
+        return {position for cell in self._cells(box) for position in grid.get(cell, ())}
+
+    def at_point(self, filename, y, x):
+        """Returns the positions of the games in `filename` whose box contains (y, x)."""
+        return sorted(
+            position for position in self._candidates(filename, (y, x, y, x))
+            if self.boxes[position][0] <= y <= self.boxes[position][2]
+            and self.boxes[position][1] <= x <= self.boxes[position][3]
+        )
+
+    def in_region(self, filename, region, contained=False):
+        """
+        Returns the positions of the games in `filename` whose box overlaps
+        the `box_2d` `region`, or lies entirely inside it with `contained`.
+        """
+        region = normalize_box(region)
+        matches = []
+        for position in self._candidates(filename, region):
+            box = self.boxes[position]
+            if contained:
+                if region[0] <= box[0] and region[1] <= box[1] and box[2] <= region[2] and box[3] <= region[3]:
+                    matches.append(position)
+            elif intersection(box, region):
+                matches.append(position)
+        return sorted(matches)
+
+    def overlapping_pairs(self, min_iou=0.0):
+        """
+        Returns (position, position, iou) for every pair of boxes on the same
+        photo that overlap with an IoU above `min_iou`, highest IoU first.
+        """
+        pairs = []
+        for grid in self._grids.values():
+            seen = set()
+            for positions in grid.values():
+                for i, a in enumerate(positions):
+                    for b in positions[i + 1:]:
+                        pair = (a, b) if a < b else (b, a)
+                        if pair in seen:
+                            continue
+                        seen.add(pair)
+                        overlap = iou(self.boxes[a], self.boxes[b])
+                        if overlap > min_iou:
+                            pairs.append((*pair, overlap))
+        return sorted(pairs, key=lambda pair: (-pair[2], pair[0], pair[1]))
+
+    def duplicate_groups(self, min_iou=DEFAULT_DUPLICATE_IOU, same_title=True):
+        """
+        Returns groups (sorted lists of positions, in data order) of games
+        detected more than once: boxes on one photo with an IoU of at least
+        `min_iou`, chained transitively. With `same_title`, the normalized
+        titles must match too.
+        """
+        parent = {}
+
+        def find(position):
+            while parent.get(position, position) != position:
+                position = parent[position]
+            return position
+
+        for a, b, overlap in self.overlapping_pairs():
+            if overlap < min_iou:
+                break
+            if same_title and normalize_title(self.games[a].get("title")) != normalize_title(self.games[b].get("title")):
+                continue
+            root_a, root_b = find(a), find(b)
+            if root_a != root_b:
+                parent[max(root_a, root_b)] = min(root_a, root_b)
+
+        groups = {}
+        for position in parent:
+            groups.setdefault(find(position), set()).add(position)
+        for root, members in groups.items():
+            members.add(root)
+        return sorted(sorted(members) for members in groups.values())
+
+
+# Values that say nothing about a game, so another record's value wins.
+_EMPTY_VALUES = (None, "", 0, "Not Found")
+
+
+def _completeness(game):
+    return sum(1 for key in FIELD_NAMES if game.get(key) not in _EMPTY_VALUES)
+
+
+def merge_duplicates(boardgames_data, min_iou=DEFAULT_DUPLICATE_IOU, same_title=True):
+    """
+    Collapses each group of `duplicate_groups` into a copy of its most
+    complete record, at the position of the group's first game, filling in
+    the fields it leaves empty from the other members. The records passed
+    in are not modified. Returns the merged data and the groups.
+    """
+    index = BoxIndex(boardgames_data)
+    groups = index.duplicate_groups(min_iou=min_iou, same_title=same_title)
+    dropped = set()
+    merged = list(index.games)
+    for group in groups:
+        members = [index.games[position] for position in group]
+        kept = copy.deepcopy(max(members, key=_completeness))
+        for other in members:
+            for key in FIELD_NAMES:
+                if kept.get(key) in _EMPTY_VALUES and other.get(key) not in _EMPTY_VALUES:
+                    kept[key] = copy.deepcopy(other[key])
+        merged[group[0]] = kept
+        dropped.update(group[1:])
+    return [game for position, game in enumerate(merged) if position not in dropped], groups
+
+
+def _describe(index, position):
+    game = index.games[position]
+    return f"#{position} {game.get('title')!r} {list(game.get('box_2d'))}"
+
+
+def print_report(index, overlap_iou, duplicate_iou, same_title, out=None):
+    """Prints the duplicate groups and the remaining overlapping pairs, per photo."""
+    groups = index.duplicate_groups(min_iou=duplicate_iou, same_title=same_title)
+    grouped = {position for group in groups for position in group}
+    print(f"{len(groups)} duplicate groups (IoU >= {duplicate_iou}):", file=out)
+    for group in groups:
+        print(f"  {index.games[group[0]].get('filename')}:", file=out)
+        for position in group:
+            print(f"    {_describe(index, position)}", file=out)
+
+    pairs = [
+        (a, b, overlap) for a, b, overlap in index.overlapping_pairs(min_iou=overlap_iou)
+        if not (a in grouped and b in grouped)
+    ]
+    print(f"{len(pairs)} other overlapping pairs (IoU > {overlap_iou}):", file=out)
+    for a, b, overlap in pairs:
+        print(f"  {overlap:.2f}  {index.games[a].get('filename')}: {_describe(index, a)} / {_describe(index, b)}", file=out)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Report overlapping and duplicate boxes in a boardgames.json file.")
+    parser.add_argument("json_file", help="Path to the boardgames.json (or .jsonl) file to check.")
+    parser.add_argument("--overlap-iou", type=float, default=0.1, help="Report pairs overlapping above this IoU.")
+    parser.add_argument(
+        "--duplicate-iou", type=float, default=DEFAULT_DUPLICATE_IOU,
+        help=f"Treat boxes overlapping at least this much as duplicates (default: {DEFAULT_DUPLICATE_IOU}).",
+    )
+    parser.add_argument(
+        "--any-title", action="store_true", help="Treat overlapping boxes as duplicates even if their titles differ."
+    )
+    parser.add_argument("--point", nargs=3, metavar=("FILENAME", "Y", "X"), help="List the games at a point.")
+    parser.add_argument(
+        "--region", nargs=5, metavar=("FILENAME", "Y1", "X1", "Y2", "X2"), help="List the games overlapping a region."
+    )
+    parser.add_argument("--merge", metavar="OUTPUT", help="Write the data with duplicates merged to this JSON file.")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    index = BoxIndex(iter_boardgames_data(args.json_file))
+    same_title = not args.any_title
+
+    if args.point:
+        filename, y, x = args.point
+        for position in index.at_point(filename, float(y), float(x)):
+            print(_describe(index, position))
+    elif args.region:
+        filename, *region = args.region
+        for position in index.in_region(filename, [float(value) for value in region]):
+            print(_describe(index, position))
+    else:
+        print_report(index, args.overlap_iou, args.duplicate_iou, same_title)
+
+    if args.merge:
+        merged, groups = merge_duplicates(index.games, min_iou=args.duplicate_iou, same_title=same_title)
+        write_json_atomic(args.merge, merged, default=json_default)
+        print(f"Merged {sum(len(group) - 1 for group in groups)} duplicates; wrote {len(merged)} games to {args.merge}")
+
+
+if __name__ == "__main__":
+    main()
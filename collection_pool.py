@@ -0,0 +1,55 @@
+import queue
+from concurrent.futures import ThreadPoolExecutor
+
+
+class BggCollectionManagerPool:
+    """
+    Adds games to the BGG collection from several sessions at once, each
+    made by `manager_factory` (a browser or HTTP collection manager). Only
+    the first session is logged in; its cookies are copied into the others,
+    so every session shares the same authenticated login. Nothing here
+    imports selenium, so the HTTP backend runs without it.
+    """
+
+    def __init__(self, size, manager_factory):
+        self.managers = [manager_factory() for _ in range(size)]
+
+    def setup(self):
+        """Starts every session and logs them all in."""
+        for manager in self.managers:
+            manager.setup_driver()
+        self.managers[0].login_to_bgg()
+        cookies = self.managers[0].get_cookies()
+        for manager in self.managers[1:]:
+            manager.load_cookies(cookies)
+
+    def add_games_to_collection(self, games, journal=None, metrics=None):
+        """
+        Distributes games across the sessions until all have been processed,
+        recording each outcome in `journal` and counting it in `metrics`,
+        if given.
+        """
+        pending = queue.Queue()
+        for game in games:
+            pending.put(game)
+
+        def work(manager):
+            while True:
+                try:
+                    game = pending.get_nowait()
+                except queue.Empty:
+                    return
+                outcome = manager.add_game_to_collection(game)
+                if journal is not None:
+                    journal.record(game, *outcome)
+                if metrics is not None:
+                    metrics.increment("collection_games_total", status=outcome[0])
+
+        with ThreadPoolExecutor(max_workers=len(self.managers)) as executor:
+            for future in [executor.submit(work, manager) for manager in self.managers]:
+                future.result()
+
+    def close(self):
+        """Closes every session."""
+        for manager in self.managers:
+            manager.close_driver()
@@ -0,0 +1,88 @@
+import argparse
+import json
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+
+from box_index import BoxIndex
+from file_utils import iter_boardgames_data
+from game_record import NOT_FOUND, NOT_RANKED
+
+DEFAULT_STALE_DAYS = 30
+
+
+def _fetched_at(record):
+    try:
+        fetched_at = datetime.fromisoformat(record.fetched_at)
+    except (TypeError, ValueError):
+        return None
+    return fetched_at if fetched_at.tzinfo is not None else fetched_at.replace(tzinfo=timezone.utc)
+
+
+def summarize(records, stale_days=DEFAULT_STALE_DAYS, now=None):
+    """
+    Returns counts describing the state of a collection of `GameRecord`s:
+    how many games are enriched, still pending or were not found on BGG, how
+    many have details older than `stale_days` (or of unknown age), the games per shelf photo
+    and the duplicate detections `box_index` would merge.
+    """
+    records = list(records)
+    cutoff = (now or datetime.now(timezone.utc)) - timedelta(days=stale_days)
+    summary = Counter()
+    for record in records:
+        if record.rank == NOT_FOUND:
+            summary["not_found"] += 1
+        elif record.needs_details():
+            summary["pending"] += 1
+        else:
+            summary["enriched"] += 1
+            if record.rank == NOT_RANKED:
+                summary["not_ranked"] += 1
+            fetched_at = _fetched_at(record)
+            if fetched_at is None:
+                summary["unknown_age"] += 1
+            elif fetched_at < cutoff:
+                summary["stale"] += 1
+
+    groups = BoxIndex(records).duplicate_groups()
+    return {
+        "games": len(records),
+        **{key: summary[key] for key in ("enriched", "pending", "not_found", "not_ranked", "stale", "unknown_age")},
+        "stale_days": stale_days,
+        "duplicates": sum(len(group) - 1 for group in groups),
+        "photos": dict(sorted(Counter(record.filename or None for record in records).items(), key=lambda item: str(item[0]))),
+    }
+
+
+def format_summary(summary):
+    lines = [
+        f"{summary['games']} games: {summary['enriched']} enriched, {summary['pending']} pending, "
+        f"{summary['not_found']} not found on BGG",
+        f"{summary['not_ranked']} enriched games are not ranked",
+        f"{summary['stale']} have details older than {summary['stale_days']} days, "
+        f"{summary['unknown_age']} of unknown age",
+        f"{summary['duplicates']} duplicate detections",
+        f"{len(summary['photos'])} photos:",
+    ]
+    lines.extend(f"  {count:4d}  {filename}" for filename, count in summary["photos"].items())
+    return "\n".join(lines)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Summarize the state of a boardgames.json file.")
+    parser.add_argument("json_file", help="Path to the boardgames.json (or .jsonl) file to summarize.")
+    parser.add_argument(
+        "--stale-days", type=int, default=DEFAULT_STALE_DAYS,
+        help=f"Count details fetched longer ago than this as stale (default: {DEFAULT_STALE_DAYS}).",
+    )
+    parser.add_argument("--json", action="store_true", help="Print the summary as JSON.")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    summary = summarize(iter_boardgames_data(args.json_file), stale_days=args.stale_days)
+    print(json.dumps(summary, indent=4) if args.json else format_summary(summary))
+
+
+if __name__ == "__main__":
+    main()
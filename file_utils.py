@@ -1,14 +1,236 @@
+import itertools
 import json
+import os
+import sys
+
+from game_record import GameRecord, json_default
+
+JSONL_EXTENSION = ".jsonl"
+# The key holding a JSON Lines record's id: the line number of its first
+# version. It is implicit on that line and stored on every later version.
+RECORD_ID = "record_id"
+
+
+def is_jsonl_path(json_file_path):
+    """Returns True if a path names a JSON Lines file."""
+    return str(json_file_path).endswith(JSONL_EXTENSION)
+
+
+def _iter_json_array(f):
+    """
+    Decodes the elements of the JSON array in a file one by one, so that
+    each can be converted before the next one is built.
+    """
+    text = f.read()
+    decoder = json.JSONDecoder()
+    skip_whitespace = json.decoder.WHITESPACE.match
+    index = skip_whitespace(text, 0).end()
+    if not text.startswith("[", index):
+        raise json.JSONDecodeError("Expecting '['", text, index)
+    index = skip_whitespace(text, index + 1).end()
+    if not text.startswith("]", index):
+        while True:
+            element, index = decoder.raw_decode(text, index)
+            yield element
+            index = skip_whitespace(text, index).end()
+            if text.startswith("]", index):
+                break
+            if not text.startswith(",", index):
+                raise json.JSONDecodeError("Expecting ',' delimiter", text, index)
+            index = skip_whitespace(text, index + 1).end()
+    index = skip_whitespace(text, index + 1).end()
+    if index != len(text):
+        raise json.JSONDecodeError("Extra data", text, index)
 
 
 def read_boardgames_data(json_file_path):
-    """Reads board games data from a JSON file."""
+    """Reads the `GameRecord`s of a JSON (or JSON Lines) file."""
     try:
+        if is_jsonl_path(json_file_path):
+            return list(iter_boardgames_jsonl(json_file_path))
         with open(json_file_path, 'r') as f:
-            return json.load(f)
+            return [GameRecord.from_dict(game) for game in _iter_json_array(f)]
     except FileNotFoundError:
         print(f"Error: File not found at {json_file_path}")
         return None
     except json.JSONDecodeError:
         print(f"Error: Could not decode JSON from {json_file_path}")
         return None
+
+
+def _write_atomic(file_path, write):
+    """
+    Calls `write` with a temporary file next to `file_path` and renames it
+    into place, so readers never see a partially written file. If the
+    write fails, the temporary file is removed and the error re-raised.
+    """
+    tmp_path = f"{file_path}.tmp"
+    try:
+        with open(tmp_path, 'w') as f:
+            write(f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, file_path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except FileNotFoundError:
+            pass
+        raise
+
+
+def write_json_atomic(json_file_path, data, indent=4, default=None, separators=None):
+    """
+    Writes data as JSON to `json_file_path`, replacing it atomically.
+    `default` and `separators` are passed to `json.dump`.
+    """
+    _write_atomic(
+        json_file_path, lambda f: json.dump(data, f, indent=indent, default=default, separators=separators)
+    )
+
+
+def record_key(record):
+    """
+    Returns the key identifying a board game record in the sync journal.
+    A record is a detection of one box in one photo, so the photo and the
+    bounding box identify it; the title is only used when both are missing.
+    """
+    if record.get("filename") is None and record.get("box_2d") is None:
+        return json.dumps(["title", record.get("title")])
+    return json.dumps([record.get("filename"), record.get("box_2d")])
+
+
+def ends_mid_line(path):
+    """Returns True if a file is non-empty and does not end with a newline."""
+    try:
+        with open(path, 'rb') as f:
+            if f.seek(0, os.SEEK_END) == 0:
+                return False
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) != b"\n"
+    except FileNotFoundError:
+        return False
+
+
+def _parse_jsonl_line(line):
+    """Returns the record on a JSON Lines line, or None for a blank or cut-short line."""
+    if not line.strip():
+        return None
+    try:
+        return json.loads(line)
+    except json.JSONDecodeError:
+        return None
+
+
+def iter_boardgames_jsonl(jsonl_file_path):
+    """
+    Yields the current version of every record in a JSON Lines file, as a
+    `GameRecord`, in the order the records were first written.
+
+    The file is an append-only log. A record is identified by its
+    `RECORD_ID`, the line number of its first version; a line appended with
+    the id of an earlier one replaces it. Records are yielded with their
+    id, so appending them again updates them in place. Only the offsets of
+    the replacing lines are held in memory, so a compacted file is streamed
+    in constant memory. A last line without its newline, and lines that do
+    not parse, were cut short by a crash and are skipped.
+    """
+    latest_offsets = {}
+    line_count = 0
+    with open(jsonl_file_path, 'rb') as f:
+        offset = 0
+        for line_number, line in enumerate(f):
+            if not line.endswith(b"\n"):
+                break
+            record = _parse_jsonl_line(line)
+            if record is not None:
+                record_id = record.get(RECORD_ID, line_number)
+                if record_id != line_number:
+                    latest_offsets[record_id] = offset
+            offset += len(line)
+            line_count += 1
+
+    with open(jsonl_file_path, 'rb') as f, open(jsonl_file_path, 'rb') as latest:
+        for line_number, line in enumerate(itertools.islice(f, line_count)):
+            record = _parse_jsonl_line(line)
+            if record is None or record.get(RECORD_ID, line_number) != line_number:
+                continue
+            if line_number in latest_offsets:
+                latest.seek(latest_offsets[line_number])
+                record = json.loads(latest.readline())
+            record[RECORD_ID] = line_number
+            yield GameRecord.from_dict(record)
+
+
+def without_record_id(record):
+    """Returns the JSON object of a record without the `RECORD_ID` of the JSON Lines file it was read from."""
+    data = record.to_dict()
+    data.pop(RECORD_ID, None)
+    return data
+
+
+def iter_boardgames_data(json_file_path):
+    """
+    Yields the `GameRecord`s of a boardgames file one by one. JSON Lines
+    files are streamed; plain JSON files have to be read whole, but only
+    one game at a time is decoded.
+    """
+    if is_jsonl_path(json_file_path):
+        yield from iter_boardgames_jsonl(json_file_path)
+    else:
+        with open(json_file_path, 'r') as f:
+            for game in _iter_json_array(f):
+                yield GameRecord.from_dict(game)
+
+
+def append_boardgames_jsonl(jsonl_file_path, records):
+    """
+    Appends records to a JSON Lines file, superseding the earlier versions
+    of those read from it (with their `RECORD_ID`); records without an id
+    are added. Only the appended records are written, after ending a last
+    line cut short by a crash.
+    """
+    truncated = ends_mid_line(jsonl_file_path)
+    with open(jsonl_file_path, 'a') as f:
+        if truncated:
+            f.write("\n")
+        for record in records:
+            f.write(json.dumps(record, separators=(",", ":"), default=json_default) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def write_boardgames_jsonl(jsonl_file_path, records):
+    """
+    Writes records to a new JSON Lines file, replacing it atomically. Each
+    record's id becomes its new line number.
+    """
+    def write(f):
+        for record in records:
+            f.write(json.dumps(without_record_id(record), separators=(",", ":")) + "\n")
+
+    _write_atomic(jsonl_file_path, write)
+
+
+def compact_boardgames_jsonl(jsonl_file_path):
+    """Rewrites a JSON Lines file so that it holds only the latest records."""
+    write_boardgames_jsonl(jsonl_file_path, iter_boardgames_jsonl(jsonl_file_path))
+
+
+def convert_boardgames_data(source_path, destination_path):
+    """
+    Converts board games data between the JSON and JSON Lines formats,
+    choosing each format from the file extension.
+    """
+    records = iter_boardgames_data(source_path)
+    if is_jsonl_path(destination_path):
+        write_boardgames_jsonl(destination_path, records)
+    else:
+        write_json_atomic(destination_path, [without_record_id(record) for record in records])
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 3:
+        convert_boardgames_data(sys.argv[1], sys.argv[2])
+    else:
+        print("Usage: python file_utils.py <source.json|source.jsonl> <destination.json|destination.jsonl>")
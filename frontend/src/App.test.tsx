@@ -31,6 +31,9 @@ describe('App Integration', () => {
     (useBoardgamesModule.useBoardgames as any).mockReturnValue({
       loading: true,
       boardgames: [],
+      images: [],
+      facets: null,
+      shelfImages: {},
       imageDescriptions: {},
       error: null
     });
@@ -43,6 +46,9 @@ describe('App Integration', () => {
     (useBoardgamesModule.useBoardgames as any).mockReturnValue({
       loading: false,
       boardgames: [],
+      images: [],
+      facets: null,
+      shelfImages: {},
       imageDescriptions: {},
       error: 'Something went wrong'
     });
@@ -55,6 +61,9 @@ describe('App Integration', () => {
     (useBoardgamesModule.useBoardgames as any).mockReturnValue({
       loading: false,
       boardgames: mockGames,
+      images: ['image1.jpg'],
+      facets: null,
+      shelfImages: {},
       imageDescriptions: mockDesc,
       error: null
     });
@@ -21,14 +21,15 @@ const theme = createTheme({
 });
 
 function App() {
-  const { boardgames, imageDescriptions, loading, error } = useBoardgames();
-
   // State
   const [selectedImage, setSelectedImage] = useState<string>('');
   const [filters, setFilters] = useState<FilterState>(INITIAL_FILTERS);
   const [globalSearch, setGlobalSearch] = useState<boolean>(false);
   const [alwaysDisplayInfo, setAlwaysDisplayInfo] = useState<boolean>(true);
 
+  // Only the selected shelf is downloaded, or every shelf in global mode
+  const { boardgames, images, imageDescriptions, facets, shelfImages, loading, error } = useBoardgames(selectedImage, globalSearch);
+
   // Load state from localStorage on mount
   useEffect(() => {
     const savedImage = localStorage.getItem('selectedImage');
@@ -57,13 +58,9 @@ function App() {
   useEffect(() => { localStorage.setItem('alwaysDisplayInfo', String(alwaysDisplayInfo)); }, [alwaysDisplayInfo]);
 
   // Derived Data
-  const uniqueImages = useMemo(() => {
-    return Array.from(new Set(boardgames.map(bg => bg.filename))).sort();
-  }, [boardgames]);
-
   const filteredGames = useMemo(() => {
-    return filterGames(boardgames, filters, globalSearch ? undefined : selectedImage);
-  }, [boardgames, selectedImage, filters, globalSearch]);
+    return filterGames(boardgames, filters, globalSearch ? undefined : selectedImage, facets);
+  }, [boardgames, selectedImage, filters, globalSearch, facets]);
 
   const handleImageSelect = (event: any) => {
     setSelectedImage(event.target.value as string);
@@ -108,7 +105,7 @@ function App() {
                     onChange={handleImageSelect}
                   >
                     <MenuItem value=""><em>None</em></MenuItem>
-                    {uniqueImages.map(filename => (
+                    {images.map(filename => (
                       <MenuItem key={filename} value={filename}>
                         {imageDescriptions[filename] || filename}
                       </MenuItem>
@@ -138,6 +135,8 @@ function App() {
                   imageSrc={selectedImage}
                   games={filteredGames}
                   alwaysShowInfo={alwaysDisplayInfo}
+                  shelfImage={shelfImages[selectedImage]}
+                  renditionsUrl={`${import.meta.env.BASE_URL}images/`}
                 />
               ) : (
                 <Box display="flex" justifyContent="center" alignItems="center" height="400px" border="1px dashed #ccc">
@@ -51,4 +51,27 @@ describe('ImageViewer', () => {
         
         expect(screen.getByText('Test Game')).toBeInTheDocument();
     });
+
+    it('offers the prebuilt renditions', () => {
+        const shelfImage = {
+            filename: 'img.jpg',
+            hash: 'abc',
+            dir: 'img-abc',
+            width: 3072,
+            height: 4080,
+            tile_size: 256,
+            tiles: 'img-abc/tiles/{level}/{column}_{row}.webp',
+            levels: [],
+            thumbnails: [
+                { path: 'img-abc/320w.webp', width: 320, height: 425 },
+                { path: 'img-abc/1280w.webp', width: 1280, height: 1700 },
+            ],
+            boxes: [],
+        };
+        render(<ImageViewer imageSrc="img.jpg" games={[]} alwaysShowInfo={false} shelfImage={shelfImage} renditionsUrl="/images/" />);
+
+        const img = screen.getByAltText('Board Game Shelf');
+        expect(img).toHaveAttribute('srcset', '/images/img-abc/320w.webp 320w, /images/img-abc/1280w.webp 1280w');
+        expect(img).toHaveAttribute('src', 'img.jpg');
+    });
 });
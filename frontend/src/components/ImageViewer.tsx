@@ -1,15 +1,18 @@
 import React, { useState, useRef, useEffect } from 'react';
 import { Box, CircularProgress } from '@mui/material';
-import type { BoardGame } from '../types';
+import type { BoardGame, ShelfImage } from '../types';
 import { BoundingBox } from './BoundingBox';
 
 interface ImageViewerProps {
   imageSrc: string;
   games: BoardGame[];
   alwaysShowInfo: boolean;
+  // Prebuilt WebP renditions of the photo and the URL they are relative to.
+  shelfImage?: ShelfImage;
+  renditionsUrl?: string;
 }
 
-export const ImageViewer: React.FC<ImageViewerProps> = ({ imageSrc, games, alwaysShowInfo }) => {
+export const ImageViewer: React.FC<ImageViewerProps> = ({ imageSrc, games, alwaysShowInfo, shelfImage, renditionsUrl = '' }) => {
   const [loaded, setLoaded] = useState(false);
   const imgRef = useRef<HTMLImageElement>(null);
   const [dimensions, setDimensions] = useState<{ width: number; height: number } | null>(null);
@@ -51,6 +54,12 @@ export const ImageViewer: React.FC<ImageViewerProps> = ({ imageSrc, games, alway
   const scaleX = dimensions ? dimensions.width / 1024 : 1;
   const scaleY = dimensions ? dimensions.height / 1024 : 1;
 
+  // With renditions, the browser downloads the smallest one that fills the
+  // viewer (at most 1200px wide) instead of the full-resolution photo.
+  const srcSet = shelfImage?.thumbnails
+    .map(thumbnail => `${renditionsUrl}${thumbnail.path} ${thumbnail.width}w`)
+    .join(', ');
+
   return (
     <Box position="relative" width="100%" maxWidth="1200px" margin="0 auto" boxShadow={3} bgcolor="white">
       {!loaded && (
@@ -61,6 +70,8 @@ export const ImageViewer: React.FC<ImageViewerProps> = ({ imageSrc, games, alway
       <img
         ref={imgRef}
         src={imageSrc}
+        srcSet={srcSet}
+        sizes={srcSet ? '(max-width: 1200px) 100vw, 1200px' : undefined}
         alt="Board Game Shelf"
         style={{ width: '100%', height: 'auto', display: loaded ? 'block' : 'none' }}
         onLoad={handleLoad}
@@ -17,3 +17,53 @@ export interface BoardGame {
 export interface ImageDescriptions {
   [filename: string]: string;
 }
+
+// A facet of `index/facets.json`: the sorted game ids in each value bucket,
+// where bucket i covers [bounds[i], bounds[i + 1]) and the last is open-ended.
+export interface Facet {
+  bounds: number[];
+  buckets: number[][];
+  other: number[];
+}
+
+export type FacetIndex = Record<string, Facet>;
+
+export interface ShardInfo {
+  filename: string;
+  shard: string;
+  games: number;
+}
+
+export interface IndexManifest {
+  version: number;
+  games: number;
+  facets: string;
+  images: ShardInfo[];
+}
+
+export interface Rendition {
+  path: string;
+  width: number;
+  height: number;
+}
+
+// A photo's entry in `images/manifest.json`, written by `shelf_images.py`.
+// Paths are relative to the images directory; `tiles` is a template with
+// {level}, {column} and {row}, where level 0 is the full resolution.
+export interface ShelfImage {
+  filename: string;
+  hash: string;
+  dir: string;
+  width: number;
+  height: number;
+  tile_size: number;
+  tiles: string;
+  levels: { width: number; height: number; columns: number; rows: number }[];
+  thumbnails: Rendition[];
+  boxes: (Rendition & { box_2d: [number, number, number, number]; title: string })[];
+}
+
+export interface ShelfImageManifest {
+  version: number;
+  images: ShelfImage[];
+}
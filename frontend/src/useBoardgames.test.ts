@@ -4,27 +4,74 @@ import { useBoardgames } from './useBoardgames';
 
 global.fetch = vi.fn();
 
+const mockDesc = { 'img1.jpg': 'Shelf 1', 'img2.jpg': 'Shelf 2' };
+const mockManifest = {
+  version: 1,
+  games: 2,
+  facets: 'facets.json',
+  images: [
+    { filename: 'img1.jpg', shard: 'shards/img1.json', games: 1 },
+    { filename: 'img2.jpg', shard: 'shards/img2.json', games: 1 },
+  ],
+};
+const mockFacets = { score: { bounds: [0], buckets: [[0, 1]], other: [] } };
+const mockShelfImage = { filename: 'img2.jpg', dir: 'img2-abc', thumbnails: [{ path: 'img2-abc/320w.webp', width: 320, height: 425 }] };
+const mockShards: Record<string, unknown> = {
+  'shards/img1.json': [{ title: 'Game 1', game_id: 0, filename: 'img1.jpg' }],
+  'shards/img2.json': [{ title: 'Game 2', game_id: 1, filename: 'img2.jpg' }],
+};
+
+// Serves the given files by URL suffix; anything else is a 404.
+const serve = (files: Record<string, unknown>) => {
+  (global.fetch as any).mockImplementation(async (url: string) => {
+    const path = Object.keys(files).find(name => url.endsWith(name));
+    return path ? { ok: true, json: async () => files[path] } : { ok: false };
+  });
+};
+
 describe('useBoardgames', () => {
   beforeEach(() => {
     vi.resetAllMocks();
   });
 
-  it('fetches data successfully', async () => {
-    const mockGames = [{ title: 'Game 1' }];
-    const mockDesc = { 'img1.jpg': 'Shelf 1' };
+  it('loads the index and only the selected shard', async () => {
+    serve({
+      'index/manifest.json': mockManifest,
+      'index/facets.json': mockFacets,
+      'image_descriptions.json': mockDesc,
+      'images/manifest.json': { version: 1, images: [mockShelfImage] },
+      ...Object.fromEntries(Object.entries(mockShards).map(([name, games]) => [`index/${name}`, games])),
+    });
+
+    const { result } = renderHook(() => useBoardgames('img2.jpg'));
+
+    expect(result.current.loading).toBe(true);
+
+    await waitFor(() => expect(result.current.boardgames[1]).toBeDefined());
 
-    (global.fetch as any)
-      .mockResolvedValueOnce({ ok: true, json: async () => mockGames })
-      .mockResolvedValueOnce({ ok: true, json: async () => mockDesc });
+    expect(result.current.loading).toBe(false);
+    expect(result.current.boardgames[0]).toBeUndefined();
+    expect(result.current.boardgames[1].title).toBe('Game 2');
+    expect(result.current.images).toEqual(['img1.jpg', 'img2.jpg']);
+    expect(result.current.facets).toEqual(mockFacets);
+    expect(result.current.shelfImages).toEqual({ 'img2.jpg': mockShelfImage });
+    expect(result.current.imageDescriptions).toEqual(mockDesc);
+    expect(result.current.error).toBeNull();
+    const urls = (global.fetch as any).mock.calls.map((call: string[]) => call[0]);
+    expect(urls.some((url: string) => url.endsWith('shards/img1.json'))).toBe(false);
+  });
+
+  it('falls back to boardgames.json without an index', async () => {
+    serve({ 'boardgames.json': [{ title: 'Game 1', filename: 'img1.jpg' }], 'image_descriptions.json': mockDesc });
 
     const { result } = renderHook(() => useBoardgames());
 
-    expect(result.current.loading).toBe(true);
-    
     await waitFor(() => expect(result.current.loading).toBe(false));
 
-    expect(result.current.boardgames).toEqual(mockGames);
-    expect(result.current.imageDescriptions).toEqual(mockDesc);
+    expect(result.current.boardgames).toEqual([{ title: 'Game 1', filename: 'img1.jpg', game_id: 0 }]);
+    expect(result.current.images).toEqual(['img1.jpg']);
+    expect(result.current.facets).toBeNull();
+    expect(result.current.shelfImages).toEqual({});
     expect(result.current.error).toBeNull();
   });
 
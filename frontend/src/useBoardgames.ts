@@ -1,30 +1,64 @@
 import { useState, useEffect } from 'react';
-import type { BoardGame, ImageDescriptions } from './types';
+import type { BoardGame, FacetIndex, ImageDescriptions, IndexManifest, ShelfImage, ShelfImageManifest } from './types';
 
-export const useBoardgames = () => {
+// Loads the collection from the static index written by `update_boardgames.py --index-dir`:
+// the manifest and facets up front, then only the shard of the selected shelf image
+// (or every shard when `loadAll` is set). Without an index, the whole boardgames.json
+// is loaded instead. `boardgames` is indexed by `game_id`, with holes for unloaded shards.
+// `shelfImages` holds the WebP renditions of each photo from `images/manifest.json`
+// (written by `shelf_images.py`), keyed by filename; it stays empty without one.
+export const useBoardgames = (selectedImage?: string, loadAll = false) => {
   const [boardgames, setBoardgames] = useState<BoardGame[]>([]);
+  const [images, setImages] = useState<string[]>([]);
   const [imageDescriptions, setImageDescriptions] = useState<ImageDescriptions>({});
+  const [facets, setFacets] = useState<FacetIndex | null>(null);
+  const [shelfImages, setShelfImages] = useState<Record<string, ShelfImage>>({});
+  const [manifest, setManifest] = useState<IndexManifest | null>(null);
+  const [loadedShards, setLoadedShards] = useState<Set<string>>(new Set());
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState<string | null>(null);
 
+  const baseUrl = import.meta.env.BASE_URL;
+
   useEffect(() => {
     const fetchData = async () => {
       try {
-        const baseUrl = import.meta.env.BASE_URL;
-        const [bgResponse, descResponse] = await Promise.all([
-          fetch(`${baseUrl}boardgames.json`),
-          fetch(`${baseUrl}image_descriptions.json`)
+        const [manifestResponse, descResponse, imagesResponse] = await Promise.all([
+          fetch(`${baseUrl}index/manifest.json`),
+          fetch(`${baseUrl}image_descriptions.json`),
+          fetch(`${baseUrl}images/manifest.json`)
         ]);
 
-        if (!bgResponse.ok || !descResponse.ok) {
+        if (!descResponse.ok) {
           throw new Error('Failed to fetch data');
         }
+        setImageDescriptions(await descResponse.json());
 
-        const bgData = await bgResponse.json();
-        const descData = await descResponse.json();
+        if (imagesResponse?.ok) {
+          const imagesData: ShelfImageManifest = await imagesResponse.json();
+          setShelfImages(Object.fromEntries(imagesData.images.map(image => [image.filename, image])));
+        }
 
-        setBoardgames(bgData);
-        setImageDescriptions(descData);
+        if (manifestResponse.ok) {
+          const manifestData: IndexManifest = await manifestResponse.json();
+          const facetsResponse = await fetch(`${baseUrl}index/${manifestData.facets}`);
+          if (!facetsResponse.ok) {
+            throw new Error('Failed to fetch data');
+          }
+          setFacets(await facetsResponse.json());
+          setImages(manifestData.images.map(image => image.filename).sort());
+          setManifest(manifestData);
+        } else {
+          const bgResponse = await fetch(`${baseUrl}boardgames.json`);
+          if (!bgResponse.ok) {
+            throw new Error('Failed to fetch data');
+          }
+          const bgData: BoardGame[] = (await bgResponse.json()).map(
+            (game: BoardGame, index: number) => ({ ...game, game_id: index })
+          );
+          setBoardgames(bgData);
+          setImages(Array.from(new Set(bgData.map(bg => bg.filename))).sort());
+        }
       } catch (err) {
         setError(err instanceof Error ? err.message : 'Unknown error');
       } finally {
@@ -33,7 +67,38 @@ export const useBoardgames = () => {
     };
 
     fetchData();
-  }, []);
+  }, [baseUrl]);
+
+  useEffect(() => {
+    if (!manifest) return;
+    const wanted = manifest.images.filter(image =>
+      (loadAll || image.filename === selectedImage) && !loadedShards.has(image.shard)
+    );
+    if (wanted.length === 0) return;
+
+    const fetchShards = async () => {
+      try {
+        const shards: BoardGame[][] = await Promise.all(wanted.map(async image => {
+          const response = await fetch(`${baseUrl}index/${image.shard}`);
+          if (!response.ok) {
+            throw new Error('Failed to fetch data');
+          }
+          return response.json();
+        }));
+        setBoardgames(previous => {
+          const next = previous.slice();
+          next.length = manifest.games;
+          shards.flat().forEach(game => { next[game.game_id] = game; });
+          return next;
+        });
+        setLoadedShards(previous => new Set([...previous, ...wanted.map(image => image.shard)]));
+      } catch (err) {
+        setError(err instanceof Error ? err.message : 'Unknown error');
+      }
+    };
+
+    fetchShards();
+  }, [baseUrl, manifest, selectedImage, loadAll, loadedShards]);
 
-  return { boardgames, imageDescriptions, loading, error };
+  return { boardgames, images, imageDescriptions, facets, shelfImages, loading, error };
 };
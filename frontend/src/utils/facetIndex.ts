@@ -0,0 +1,68 @@
+import type { FilterState } from '../components/FilterPanel';
+import type { Facet, FacetIndex } from '../types';
+
+// Merges sorted id lists into one sorted list without duplicates.
+const unionSorted = (lists: number[][]): number[] => {
+  const merged = lists.flat().sort((a, b) => a - b);
+  return merged.filter((id, i) => i === 0 || id !== merged[i - 1]);
+};
+
+// Two-pointer intersection of sorted id lists.
+const intersectSorted = (a: number[], b: number[]): number[] => {
+  const result: number[] = [];
+  let i = 0;
+  let j = 0;
+  while (i < a.length && j < b.length) {
+    if (a[i] === b[j]) {
+      result.push(a[i]);
+      i++;
+      j++;
+    } else if (a[i] < b[j]) {
+      i++;
+    } else {
+      j++;
+    }
+  }
+  return result;
+};
+
+// Ids of the games that may have a value in [low, high]: every bucket overlapping
+// the range, plus the games without a usable value. Returns null when no bucket
+// is excluded, as the facet then cannot narrow anything down.
+const facetCandidates = (facet: Facet, low: number, high: number): number[] | null => {
+  const selected: number[][] = [facet.other];
+  let excluded = false;
+  facet.buckets.forEach((ids, i) => {
+    const start = facet.bounds[i];
+    const end = i + 1 < facet.bounds.length ? facet.bounds[i + 1] : Infinity;
+    if (start <= high && end > low) {
+      selected.push(ids);
+    } else if (ids.length > 0) {
+      excluded = true;
+    }
+  });
+  return excluded ? unionSorted(selected) : null;
+};
+
+// Returns the sorted ids of the games that can match the filters, by intersecting
+// the facet buckets of every active range constraint, or null if the facets rule
+// nothing out. The result is a superset: candidates still need `filterGames`' checks.
+export const candidateIds = (index: FacetIndex, filters: FilterState): number[] | null => {
+  const constraints: [string, number, number][] = [
+    ['score', filters.score[0], filters.score[1]],
+    ['weight', filters.complexity[0], filters.complexity[1]],
+  ];
+  if (filters.players[0] > 0) constraints.push(['min_players', filters.players[0], Infinity]);
+  if (filters.players[1] > 0) constraints.push(['max_players', -Infinity, filters.players[1]]);
+  if (filters.playtime[0] > 0) constraints.push(['min_playtime', filters.playtime[0], Infinity]);
+  if (filters.playtime[1] > 0) constraints.push(['max_playtime', -Infinity, filters.playtime[1]]);
+
+  let candidates: number[] | null = null;
+  for (const [field, low, high] of constraints) {
+    const facet = index[field];
+    if (!facet) continue;
+    const ids = facetCandidates(facet, low, high);
+    if (ids) candidates = candidates ? intersectSorted(candidates, ids) : ids;
+  }
+  return candidates;
+};
@@ -1,7 +1,7 @@
 import { describe, it, expect } from 'vitest';
 import { filterGames } from './filterGames';
 import { INITIAL_FILTERS } from '../components/FilterPanel';
-import type { BoardGame } from '../types';
+import type { BoardGame, FacetIndex } from '../types';
 
 const mockGames: BoardGame[] = [
   {
@@ -92,4 +92,42 @@ describe('filterGames', () => {
     expect(result).toHaveLength(1);
     expect(result[0].title).toBe('Catan');
   });
+
+  describe('with a facet index', () => {
+    // Games indexed by game_id, as the index requires; game 0 has no details yet.
+    const games: BoardGame[] = [
+      {
+        ...mockGames[0], game_id: 0, title: 'Unscored',
+        score: undefined as unknown as number, weight: undefined as unknown as number,
+      },
+      { ...mockGames[0], game_id: 1 },
+      { ...mockGames[1], game_id: 2 },
+    ];
+    const index: FacetIndex = {
+      score: { bounds: [0, 5, 8], buckets: [[], [2], [1]], other: [0] },
+      weight: { bounds: [0, 3], buckets: [[2], [1]], other: [0] },
+    };
+
+    it('returns the same games as a full scan', () => {
+      const filters = { ...INITIAL_FILTERS, score: [8, 10] as [number, number] };
+      expect(filterGames(games, filters, undefined, index)).toEqual(filterGames(games, filters));
+      expect(filterGames(games, filters, undefined, index).map(g => g.title)).toEqual(['Unscored', 'Gloomhaven']);
+    });
+
+    it('intersects several facets', () => {
+      const filters = {
+        ...INITIAL_FILTERS,
+        score: [6, 10] as [number, number],
+        complexity: [0, 2.5] as [number, number],
+      };
+      expect(filterGames(games, filters, undefined, index).map(g => g.title)).toEqual(['Unscored', 'Catan']);
+    });
+
+    it('skips games whose shard is not loaded', () => {
+      const partial: BoardGame[] = [];
+      partial[1] = games[1];
+      const filters = { ...INITIAL_FILTERS, score: [8, 10] as [number, number] };
+      expect(filterGames(partial, filters, undefined, index).map(g => g.title)).toEqual(['Gloomhaven']);
+    });
+  });
 });
@@ -0,0 +1,110 @@
+import argparse
+import bisect
+import os
+import re
+
+from file_utils import iter_boardgames_data, write_json_atomic
+
+INDEX_VERSION = 1
+MANIFEST_FILENAME = "manifest.json"
+FACETS_FILENAME = "facets.json"
+SHARDS_DIRNAME = "shards"
+
+# The fields of a game the frontend displays; anything else is left out of the shards.
+FRONTEND_FIELDS = (
+    "title", "location", "filename", "box_2d", "url", "rank", "score",
+    "min_players", "max_players", "min_playtime", "max_playtime", "weight",
+)
+# Lower bounds of the buckets of each facet. A bucket holds the games with
+# bounds[i] <= value < bounds[i + 1]; the last bucket is open-ended.
+FACET_BOUNDS = {
+    "score": [0, 1, 2, 3, 4, 5, 6, 7, 8, 9],
+    "weight": [0, 0.5, 1, 1.5, 2, 2.5, 3, 3.5, 4, 4.5],
+    "min_players": [1, 2, 3, 4, 5, 6, 7, 8, 9, 10],
+    "max_players": [1, 2, 3, 4, 5, 6, 7, 8, 9, 10],
+    "min_playtime": [0, 15, 30, 45, 60, 90, 120, 180, 240],
+    "max_playtime": [0, 15, 30, 45, 60, 90, 120, 180, 240],
+}
+_MINIFIED = (",", ":")
+
+
+def _shard_name(filename, taken):
+    stem = re.sub(r"[^\w.-]", "_", os.path.splitext(filename or "")[0]) or "unknown"
+    name, suffix = f"{stem}.json", 1
+    while name in taken:
+        suffix += 1
+        name = f"{stem}-{suffix}.json"
+    taken.add(name)
+    return name
+
+
+def build_facets(boardgames_data):
+    """
+    Returns the facet index of a collection: for every facet, the sorted ids
+    (positions in the collection) of the games in each bucket, plus `other`
+    for games whose value is missing, not a number or below the first bucket.
+    """
+    facets = {
+        field: {"bounds": bounds, "buckets": [[] for _ in bounds], "other": []}
+        for field, bounds in FACET_BOUNDS.items()
+    }
+    for game_id, game in enumerate(boardgames_data):
+        for field, facet in facets.items():
+            value = game.get(field)
+            if isinstance(value, bool) or not isinstance(value, (int, float)) or value < facet["bounds"][0]:
+                facet["other"].append(game_id)
+            else:
+                facet["buckets"][bisect.bisect_right(facet["bounds"], value) - 1].append(game_id)
+    return facets
+
+
+def write_frontend_index(boardgames_data, index_dir):
+    """
+    Writes the static files the frontend loads instead of boardgames.json:
+    one minified shard of games per shelf photo, the facet index of
+    `build_facets`, and a manifest listing the shards, written last so it
+    never points at a shard that does not exist yet. Every game gets a
+    `game_id`, its position in `boardgames_data`, which the facets refer to.
+    Returns the manifest.
+    """
+    shards_dir = os.path.join(index_dir, SHARDS_DIRNAME)
+    os.makedirs(shards_dir, exist_ok=True)
+
+    shards = {}
+    for game_id, game in enumerate(boardgames_data):
+        row = {"game_id": game_id}
+        row.update((field, game[field]) for field in FRONTEND_FIELDS if field in game)
+        shards.setdefault(game.get("filename"), []).append(row)
+
+    taken = set()
+    images = []
+    for filename, games in sorted(shards.items(), key=lambda item: item[0] or ""):
+        shard = _shard_name(filename, taken)
+        write_json_atomic(os.path.join(shards_dir, shard), games, indent=None, separators=_MINIFIED)
+        images.append({"filename": filename, "shard": f"{SHARDS_DIRNAME}/{shard}", "games": len(games)})
+
+    write_json_atomic(os.path.join(index_dir, FACETS_FILENAME), build_facets(boardgames_data), indent=None, separators=_MINIFIED)
+    manifest = {
+        "version": INDEX_VERSION,
+        "games": sum(image["games"] for image in images),
+        "facets": FACETS_FILENAME,
+        "images": images,
+    }
+    write_json_atomic(os.path.join(index_dir, MANIFEST_FILENAME), manifest, indent=None, separators=_MINIFIED)
+
+    for stale in set(os.listdir(shards_dir)) - taken:
+        os.remove(os.path.join(shards_dir, stale))
+    return manifest
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Build the frontend's sharded data and facet index.")
+    parser.add_argument("json_file", help="Path to the boardgames.json (or .jsonl) file to index.")
+    parser.add_argument("index_dir", help="Directory to write the index to, e.g. frontend/public/index.")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    manifest = write_frontend_index(list(iter_boardgames_data(args.json_file)), args.index_dir)
+    print(f"Indexed {manifest['games']} games in {len(manifest['images'])} shards under {args.index_dir}")
@@ -0,0 +1,183 @@
+import sys
+from dataclasses import dataclass, fields
+from datetime import datetime, timezone
+
+from bgg_common import bgg_id_from_url
+
+# The `rank` values boardgames.json uses for games without a numeric rank.
+NOT_RANKED = "Not Ranked"
+NOT_FOUND = "Not Found"
+
+# Fields that are only complete once a game has been looked up on BGG.
+DETAIL_FIELDS = ("url", "rank", "score", "min_players", "max_players", "min_playtime", "max_playtime", "weight")
+# The details that change over time and are refreshed on their own.
+STATS_FIELDS = ("rank", "score", "weight")
+
+
+class _Missing:
+    """The value of a field whose key is absent from the JSON record."""
+
+    __slots__ = ()
+
+    def __repr__(self):
+        return "MISSING"
+
+    def __bool__(self):
+        return False
+
+    def __reduce__(self):
+        # Copies and pickles of records must share the one sentinel.
+        return "MISSING"
+
+
+MISSING = _Missing()
+
+
+@dataclass(slots=True, repr=False)
+class GameRecord:
+    """
+    One board game detected on a shelf photo, as stored in boardgames.json.
+
+    Every field of the JSON schema is a slot. A field is `MISSING` when its
+    key is absent (e.g. details that were never fetched), which is distinct
+    from an explicit null such as the `url` of a game BGG could not find.
+    `rank` holds an int, `NOT_RANKED` or `NOT_FOUND`, exactly as in the JSON.
+    Keys the schema does not know about are kept in `extra`, so converting
+    with `from_dict` and `to_dict` is lossless.
+
+    Records also offer the `get`/`[]`/`in` access of the dicts they replace.
+    """
+
+    title: object = MISSING
+    location: object = MISSING
+    filename: object = MISSING
+    box_2d: object = MISSING
+    url: object = MISSING
+    rank: object = MISSING
+    score: object = MISSING
+    min_players: object = MISSING
+    max_players: object = MISSING
+    min_playtime: object = MISSING
+    max_playtime: object = MISSING
+    weight: object = MISSING
+    bgg_id: object = MISSING
+    fetched_at: object = MISSING
+    extra: object = None
+
+    @classmethod
+    def from_dict(cls, data):
+        """Builds a record from a JSON object; the dict is not modified."""
+        record = cls()
+        for key, value in data.items():
+            record[key] = value
+        if record.filename:
+            # Every game on a photo shares its filename.
+            record.filename = sys.intern(record.filename)
+        return record
+
+    def to_dict(self):
+        """Returns the JSON object for this record, omitting `MISSING` fields."""
+        data = {}
+        for name in FIELD_NAMES:
+            value = getattr(self, name)
+            if value is not MISSING:
+                data[name] = value
+        if self.extra:
+            data.update(self.extra)
+        return data
+
+    def __repr__(self):
+        items = ", ".join(f"{key}={value!r}" for key, value in self.to_dict().items())
+        return f"GameRecord({items})"
+
+    def __getitem__(self, key):
+        if key in _FIELD_SET:
+            value = getattr(self, key)
+            if value is not MISSING:
+                return value
+        elif self.extra and key in self.extra:
+            return self.extra[key]
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        if key in _FIELD_SET:
+            setattr(self, key, value)
+        else:
+            if self.extra is None:
+                self.extra = {}
+            self.extra[key] = value
+
+    def __contains__(self, key):
+        if key in _FIELD_SET:
+            return getattr(self, key) is not MISSING
+        return bool(self.extra) and key in self.extra
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    @property
+    def rank_value(self):
+        """The numeric rank, or None for unranked, unknown or missing ranks."""
+        return self.rank if isinstance(self.rank, int) else None
+
+    def needs_details(self):
+        """True until every detail field is set and the game has a BGG URL."""
+        return not self.url or MISSING in (
+            self.rank, self.score, self.min_players, self.max_players,
+            self.min_playtime, self.max_playtime, self.weight,
+        )
+
+    def apply_details(self, details):
+        """Stores the details returned by `BggApi` and when they were fetched."""
+        for key in DETAIL_FIELDS:
+            setattr(self, key, details[key])
+        self._mark_fetched(details)
+
+    def apply_stats(self, details):
+        """
+        Stores only the statistics of the details returned by `BggApi`, and
+        when they were fetched. Returns whether any statistic changed.
+        """
+        changed = any(getattr(self, key) != details[key] for key in STATS_FIELDS)
+        for key in STATS_FIELDS:
+            setattr(self, key, details[key])
+        self._mark_fetched(details)
+        return changed
+
+    def _mark_fetched(self, details):
+        self.bgg_id = bgg_id_from_url(details["url"])
+        self.fetched_at = datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+    def mark_not_found(self):
+        """Fills the missing detail fields with the sentinels of a failed lookup."""
+        if self.url is MISSING:
+            self.url = None
+        if self.rank is MISSING:
+            self.rank = NOT_FOUND
+        for key in DETAIL_FIELDS[2:]:
+            if getattr(self, key) is MISSING:
+                setattr(self, key, 0)
+
+
+FIELD_NAMES = tuple(field.name for field in fields(GameRecord) if field.name != "extra")
+_FIELD_SET = frozenset(FIELD_NAMES)
+
+
+def records_from_data(boardgames_data):
+    """Converts a list of JSON game objects into `GameRecord`s."""
+    return [GameRecord.from_dict(game) for game in boardgames_data]
+
+
+def records_to_data(records):
+    """Converts `GameRecord`s back into JSON game objects."""
+    return [record.to_dict() for record in records]
+
+
+def json_default(value):
+    """A `json.dump` default hook that serializes records one at a time."""
+    if isinstance(value, GameRecord):
+        return value.to_dict()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
@@ -0,0 +1,206 @@
+import json
+import math
+import random
+import threading
+import time
+from contextlib import contextmanager
+
+# Quantiles reported for every histogram.
+SUMMARY_QUANTILES = (0.5, 0.9, 0.99)
+# Observations sampled per histogram to estimate its quantiles.
+RESERVOIR_SIZE = 1024
+
+
+def _key(name, labels):
+    return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _quantile(sorted_values, q):
+    """Nearest-rank quantile of an already sorted, non-empty list."""
+    return sorted_values[max(0, math.ceil(q * len(sorted_values)) - 1)]
+
+
+def _escape_label_value(value):
+    """Escapes a label value as the Prometheus text format requires."""
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels, extra=()):
+    pairs = [*labels, *extra]
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape_label_value(v)}"' for k, v in pairs) + "}"
+
+
+class _Histogram:
+    """
+    The exact count, sum and extremes of a histogram's observations, plus a
+    uniform sample of at most `size` of them (reservoir sampling), so its
+    memory stays bounded however long a run is. Quantiles are exact until
+    more than `size` values have been observed.
+    """
+
+    def __init__(self, size, rng):
+        self.size = size
+        self.rng = rng
+        self.count = 0
+        self.sum = 0
+        self.min = math.inf
+        self.max = -math.inf
+        self.sample = []
+
+    def add(self, value):
+        self.count += 1
+        self.sum += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+        if len(self.sample) < self.size:
+            self.sample.append(value)
+        else:
+            index = self.rng.randrange(self.count)
+            if index < self.size:
+                self.sample[index] = value
+
+    def stats(self):
+        """Returns the count, sum, min, max and sorted sample of the histogram."""
+        return self.count, self.sum, self.min, self.max, sorted(self.sample)
+
+
+class JsonlSink:
+    """Appends every metric event to a JSON Lines file as it happens."""
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'a')
+
+    def emit(self, event):
+        self._file.write(json.dumps(event) + "\n")
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+class Metrics:
+    """
+    Counters, gauges and histograms describing a run, keyed by a metric name
+    and optional labels, e.g. `increment("requests_total", endpoint="thing")`.
+
+    Histograms keep an exact count, sum, min and max, but estimate their
+    quantiles from a sample of at most `reservoir_size` observations. Events
+    are also passed to `sink` (such as a `JsonlSink`) as they are recorded.
+    Safe to share between threads.
+    """
+
+    def __init__(self, sink=None, reservoir_size=RESERVOIR_SIZE):
+        self.sink = sink
+        self.reservoir_size = reservoir_size
+        self._counters = {}
+        self._gauges = {}
+        self._histograms = {}
+        self._random = random.Random()
+        self._lock = threading.Lock()
+
+    def _emit(self, kind, name, value, labels):
+        if self.sink is not None:
+            self.sink.emit({"at": time.time(), "type": kind, "name": name, "value": value, "labels": labels})
+
+    def increment(self, name, value=1, **labels):
+        """Adds `value` to a counter."""
+        key = _key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+            self._emit("counter", name, value, labels)
+
+    def set_gauge(self, name, value, **labels):
+        """Sets a gauge to its current value."""
+        with self._lock:
+            self._gauges[_key(name, labels)] = value
+            self._emit("gauge", name, value, labels)
+
+    def observe(self, name, value, **labels):
+        """Records one observation, such as a duration in seconds, in a histogram."""
+        key = _key(name, labels)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = _Histogram(self.reservoir_size, self._random)
+            histogram.add(value)
+            self._emit("histogram", name, value, labels)
+
+    @contextmanager
+    def timer(self, name, **labels):
+        """Observes how many seconds the body of a `with` block takes."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def counter_value(self, name, **labels):
+        with self._lock:
+            return self._counters.get(_key(name, labels), 0)
+
+    def summary(self):
+        """
+        Returns every metric as a JSON-serializable dict. Series are named
+        like `name{label="value"}`; histograms report their count, sum, min,
+        max and quantiles.
+        """
+        with self._lock:
+            counters = dict(self._counters)
+            gauges = dict(self._gauges)
+            histograms = {key: histogram.stats() for key, histogram in self._histograms.items()}
+
+        def series(key):
+            return key[0] + _format_labels(key[1])
+
+        summary = {
+            "counters": {series(key): value for key, value in sorted(counters.items())},
+            "gauges": {series(key): value for key, value in sorted(gauges.items())},
+            "histograms": {},
+        }
+        for key, (count, total, low, high, sample) in sorted(histograms.items()):
+            stats = {"count": count, "sum": total, "min": low, "max": high}
+            for q in SUMMARY_QUANTILES:
+                stats[f"p{round(q * 100)}"] = _quantile(sample, q)
+            summary["histograms"][series(key)] = stats
+        return summary
+
+    def to_prometheus(self):
+        """Returns every metric in the Prometheus text exposition format."""
+        with self._lock:
+            counters = dict(self._counters)
+            gauges = dict(self._gauges)
+            histograms = {key: histogram.stats() for key, histogram in self._histograms.items()}
+
+        lines = []
+        typed = set()
+
+        def declare(name, kind):
+            if name not in typed:
+                typed.add(name)
+                lines.append(f"# TYPE {name} {kind}")
+
+        for (name, labels), value in sorted(counters.items()):
+            declare(name, "counter")
+            lines.append(f"{name}{_format_labels(labels)} {value}")
+        for (name, labels), value in sorted(gauges.items()):
+            declare(name, "gauge")
+            lines.append(f"{name}{_format_labels(labels)} {value}")
+        for (name, labels), (count, total, _, _, sample) in sorted(histograms.items()):
+            declare(name, "summary")
+            for q in SUMMARY_QUANTILES:
+                lines.append(f"{name}{_format_labels(labels, [('quantile', q)])} {_quantile(sample, q)}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {total}")
+            lines.append(f"{name}_count{_format_labels(labels)} {count}")
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path):
+        """Writes `to_prometheus` to a file, e.g. for node_exporter's textfile collector."""
+        with open(path, 'w') as f:
+            f.write(self.to_prometheus())
+
+    def close(self):
+        if self.sink is not None:
+            self.sink.close()
@@ -0,0 +1,171 @@
+import argparse
+import json
+import sys
+import time
+
+import numpy as np
+
+from file_utils import iter_boardgames_data
+from game_record import NOT_FOUND, json_default
+
+# Numeric columns of a `GameTable`, as named in boardgames.json.
+COLUMNS = ("score", "weight", "rank", "min_players", "max_players", "min_playtime", "max_playtime")
+# Columns where a higher value is better, so top-N defaults to descending.
+HIGHER_IS_BETTER = ("score",)
+
+
+def _number(value):
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return np.nan
+    return float(value)
+
+
+class GameTable:
+    """
+    A collection held as NumPy columns, one value per game, for vectorized
+    queries. Values that are not numbers, such as a "Not Ranked" rank, and
+    every value of a game BGG could not find are NaN, so they never match a
+    range filter and sort after all known values.
+    """
+
+    def __init__(self, games):
+        self.games = list(games)
+        count = len(self.games)
+        found = [game.get("rank") != NOT_FOUND for game in self.games]
+        self.columns = {
+            column: np.fromiter(
+                (_number(game.get(column)) if ok else np.nan for game, ok in zip(self.games, found)),
+                dtype=np.float64, count=count,
+            )
+            for column in COLUMNS
+        }
+        self.titles = np.array([str(game.get("title") or "").casefold() for game in self.games], dtype=str)
+        self.filenames = np.array([str(game.get("filename") or "") for game in self.games], dtype=str)
+
+    @classmethod
+    def load(cls, json_file_path):
+        """Loads a boardgames.json (or .jsonl) file."""
+        return cls(iter_boardgames_data(json_file_path))
+
+    def __len__(self):
+        return len(self.games)
+
+    def all(self):
+        """Returns a mask selecting every game, to be narrowed with `&`."""
+        return np.ones(len(self), dtype=bool)
+
+    def between(self, column, low=None, high=None):
+        """Returns a mask of the games whose `column` is within [low, high]."""
+        values = self.columns[column]
+        mask = ~np.isnan(values)
+        if low is not None:
+            mask &= values >= low
+        if high is not None:
+            mask &= values <= high
+        return mask
+
+    def supports_players(self, players):
+        """Returns a mask of the games playable by exactly `players` players."""
+        return (self.columns["min_players"] <= players) & (self.columns["max_players"] >= players)
+
+    def title_contains(self, text):
+        """Returns a mask of the games whose title contains `text`, ignoring case."""
+        return np.char.find(self.titles, text.casefold()) >= 0
+
+    def on_shelf(self, filename):
+        """Returns a mask of the games detected in the shelf photo `filename`."""
+        return self.filenames == filename
+
+    def order(self, mask=None, sort=None, descending=None, limit=None):
+        """
+        Returns the indexes of the games selected by `mask`, sorted by the
+        `sort` column (games with unknown values last) and cut to `limit`.
+        With a limit, only the top `limit` games are fully sorted.
+        """
+        indexes = np.flatnonzero(self.all() if mask is None else mask)
+        if sort is None:
+            return indexes[:limit]
+        if descending is None:
+            descending = sort in HIGHER_IS_BETTER
+
+        values = self.columns[sort][indexes]
+        keys = np.where(np.isnan(values), np.inf, -values if descending else values)
+        if limit is not None and limit < len(indexes):
+            top = np.argpartition(keys, limit - 1)[:limit]
+            return indexes[top[np.argsort(keys[top], kind="stable")]]
+        return indexes[np.argsort(keys, kind="stable")]
+
+    def rows(self, indexes):
+        """Returns the games at `indexes`."""
+        return [self.games[i] for i in indexes]
+
+
+def _format_range(low, high):
+    low, high = "?" if np.isnan(low) else int(low), "?" if np.isnan(high) else int(high)
+    return f"{low}" if low == high else f"{low}-{high}"
+
+
+def format_game(table, index):
+    game = table.games[index]
+    columns = {column: values[index] for column, values in table.columns.items()}
+    rank = game.get("rank", "?") if np.isnan(columns["rank"]) else int(columns["rank"])
+    return (
+        f"{str(rank):>11}  {columns['score']:5.2f}  {columns['weight']:4.2f}  "
+        f"{_format_range(columns['min_players'], columns['max_players']):>5}p  "
+        f"{_format_range(columns['min_playtime'], columns['max_playtime']):>7}m  {game.get('title')}"
+    )
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Query a boardgames.json file from the command line.")
+    parser.add_argument("json_file", help="Path to the boardgames.json (or .jsonl) file to query.")
+    parser.add_argument("--score", type=float, nargs=2, metavar=("MIN", "MAX"), help="Average score range.")
+    parser.add_argument("--weight", type=float, nargs=2, metavar=("MIN", "MAX"), help="Complexity weight range.")
+    parser.add_argument("--rank", type=float, nargs=2, metavar=("MIN", "MAX"), help="BGG rank range.")
+    parser.add_argument("--playtime", type=float, nargs=2, metavar=("MIN", "MAX"), help="Range for the longest playtime.")
+    parser.add_argument("--players", type=int, help="Only games playable with this many players.")
+    parser.add_argument("--title", help="Only games whose title contains this text.")
+    parser.add_argument("--shelf", help="Only games in this shelf photo (its filename).")
+    parser.add_argument("--sort", choices=COLUMNS, help="Column to sort by.")
+    order = parser.add_mutually_exclusive_group()
+    order.add_argument("--desc", dest="descending", action="store_true", default=None, help="Sort in descending order.")
+    order.add_argument("--asc", dest="descending", action="store_false", help="Sort in ascending order.")
+    parser.add_argument("--limit", type=int, help="Show at most this many games (the top N when sorting).")
+    parser.add_argument("--json", action="store_true", help="Print the matching records as JSON.")
+    args = parser.parse_args(argv)
+    if args.limit is not None and args.limit < 0:
+        parser.error("--limit must not be negative")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    table = GameTable.load(args.json_file)
+
+    start = time.perf_counter()
+    mask = table.all()
+    for column in ("score", "weight", "rank"):
+        if getattr(args, column):
+            mask &= table.between(column, *getattr(args, column))
+    if args.playtime:
+        mask &= table.between("max_playtime", *args.playtime)
+    if args.players is not None:
+        mask &= table.supports_players(args.players)
+    if args.title:
+        mask &= table.title_contains(args.title)
+    if args.shelf:
+        mask &= table.on_shelf(args.shelf)
+    indexes = table.order(mask, sort=args.sort, descending=args.descending, limit=args.limit)
+    elapsed = time.perf_counter() - start
+
+    if args.json:
+        json.dump(table.rows(indexes), sys.stdout, indent=4, default=json_default)
+        print()
+    else:
+        for index in indexes:
+            print(format_game(table, index))
+    print(f"{int(mask.sum())} of {len(table)} games matched in {elapsed * 1000:.1f} ms", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+import random
+import threading
+import time
+
+# The lowest rate an adaptive bucket backs off to, unless it starts lower.
+DEFAULT_MIN_RATE = 0.1
+
+
+class TokenBucket:
+    """
+    A thread-safe token bucket shared by every worker talking to BGG.
+
+    Tokens are refilled continuously at `rate` per second up to `capacity`;
+    each request consumes one token and blocks until one is available.
+    """
+
+    def __init__(self, rate, capacity=None):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = float(rate)
+        self.capacity = float(capacity) if capacity is not None else max(1.0, self.rate)
+        self._tokens = self.capacity
+        self._last_refill = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        elapsed = now - self._last_refill
+        self._last_refill = now
+        self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+
+    def acquire(self):
+        """Blocks until a token is available, then consumes it."""
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+    def on_success(self):
+        """Called after a successful request; a fixed bucket ignores it."""
+
+    def on_throttle(self):
+        """Called after a throttled (429/503) or queued (202) response; a fixed bucket ignores it."""
+
+
+class AdaptiveTokenBucket(TokenBucket):
+    """
+    A token bucket that learns the rate BGG will sustain, AIMD-style.
+
+    Every successful request raises the rate by `increase` requests per
+    second, up to `max_rate`. A throttled or queued response multiplies it by
+    `decrease`, down to `min_rate`, at most once per `cooldown` seconds so a
+    burst of 429s from requests already in flight counts as one signal.
+    Without a `min_rate`, it is `DEFAULT_MIN_RATE`, or `rate` if lower.
+    Capacity stays at one token, so a raised rate never turns into a burst.
+    """
+
+    def __init__(self, rate, min_rate=None, max_rate=5.0, increase=0.05, decrease=0.5, cooldown=5.0):
+        if min_rate is None:
+            min_rate = min(DEFAULT_MIN_RATE, rate)
+        if not 0 < min_rate <= rate <= max_rate:
+            raise ValueError("rates must satisfy 0 < min_rate <= rate <= max_rate")
+        if not 0 < decrease < 1:
+            raise ValueError("decrease must be between 0 and 1")
+        super().__init__(rate, capacity=1)
+        self.min_rate = float(min_rate)
+        self.max_rate = float(max_rate)
+        self.increase = float(increase)
+        self.decrease = float(decrease)
+        self.cooldown = cooldown
+        self._last_decrease = None
+
+    def _set_rate(self, rate):
+        # Settle the tokens earned at the old rate before switching.
+        self._refill()
+        self.rate = min(self.max_rate, max(self.min_rate, rate))
+
+    def on_success(self):
+        with self._lock:
+            self._set_rate(self.rate + self.increase)
+
+    def on_throttle(self):
+        with self._lock:
+            now = time.monotonic()
+            if self._last_decrease is not None and now - self._last_decrease < self.cooldown:
+                return
+            self._last_decrease = now
+            self._set_rate(self.rate * self.decrease)
+            self._tokens = min(self._tokens, 0.0)
+
+
+def backoff_delay(attempt, base=1.0, cap=60.0, retry_after=None):
+    """
+    Returns how long to sleep before retry number `attempt` (0-based).
+
+    Uses exponential backoff with full jitter. A `Retry-After` header value,
+    when present and numeric, is honoured as a lower bound.
+    """
+    delay = random.uniform(0, min(cap, base * (2**attempt)))
+    if retry_after is not None:
+        try:
+            delay = max(delay, float(retry_after))
+        except (TypeError, ValueError):
+            pass
+    return delay
@@ -0,0 +1,107 @@
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from urllib.parse import urlencode
+
+# Seconds a cached response stays fresh, keyed by the last path segment of
+# the endpoint URL. Endpoints without an entry use `default_ttl`.
+DEFAULT_TTLS = {
+    "search": 30 * 24 * 3600,
+    "thing": 7 * 24 * 3600,
+    "collection": 0,
+}
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+
+class ResponseCache:
+    """
+    A persistent cache of raw BGG responses, stored zlib-compressed in SQLite.
+
+    Entries expire after a per-endpoint TTL, and the least recently used
+    entries are evicted once the compressed size exceeds `max_bytes`.
+    Safe to share between threads.
+    """
+
+    def __init__(self, cache_dir, ttls=None, default_ttl=24 * 3600, max_bytes=DEFAULT_MAX_BYTES):
+        os.makedirs(cache_dir, exist_ok=True)
+        self.path = os.path.join(cache_dir, "responses.sqlite3")
+        self.ttls = dict(DEFAULT_TTLS if ttls is None else ttls)
+        self.default_ttl = default_ttl
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, body BLOB NOT NULL, size INTEGER NOT NULL, "
+                "stored_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS responses_accessed_at ON responses (accessed_at)")
+
+    @staticmethod
+    def make_key(url, params=None):
+        """Builds a cache key that does not depend on parameter order."""
+        if not params:
+            return url
+        return f"{url}?{urlencode(sorted((k, str(v)) for k, v in params.items()))}"
+
+    def ttl_for(self, url):
+        endpoint = url.rstrip("/").rsplit("/", 1)[-1]
+        return self.ttls.get(endpoint, self.default_ttl)
+
+    def get(self, url, params=None, allow_stale=False):
+        """
+        Returns the cached response body for a request, or None on a miss.
+        Expired entries count as misses unless `allow_stale` is set.
+        """
+        key = self.make_key(url, params)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT body, stored_at FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None or (not allow_stale and now - row[1] > self.ttl_for(url)):
+                self.misses += 1
+                return None
+            with self._conn:
+                self._conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+            self.hits += 1
+        return zlib.decompress(row[0])
+
+    def set(self, url, params, content):
+        """Stores a response body, unless its endpoint has a TTL of zero."""
+        if self.ttl_for(url) <= 0:
+            return
+        body = zlib.compress(content)
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, body, size, stored_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                (self.make_key(url, params), body, len(body), now, now),
+            )
+            self._evict()
+
+    def _evict(self):
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        rows = self._conn.execute("SELECT key, size FROM responses ORDER BY accessed_at").fetchall()
+        evicted = []
+        for key, size in rows:
+            if total <= self.max_bytes:
+                break
+            evicted.append((key,))
+            total -= size
+        self._conn.executemany("DELETE FROM responses WHERE key = ?", evicted)
+
+    def stats(self):
+        """Returns hit/miss counters and the current size of the cache."""
+        with self._lock:
+            entries, size = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        return {"hits": self.hits, "misses": self.misses, "entries": entries, "bytes": size}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,220 @@
+import argparse
+import hashlib
+import json
+import math
+import os
+import re
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+
+from PIL import Image, ImageOps
+
+from file_utils import iter_boardgames_data, write_json_atomic
+
+BUILD_VERSION = 1
+MANIFEST_FILENAME = "manifest.json"
+TILE_SIZE = 256
+# Widths of the WebP renditions of each photo, smallest first.
+THUMBNAIL_WIDTHS = (320, 1280)
+# Longest side of a per-game box crop.
+CROP_SIZE = 512
+WEBP_QUALITY = 80
+# `box_2d` is [y1, x1, y2, x2] on a 1024 x 1024 grid over the photo, as drawn by the viewer.
+BOX_SCALE = 1024
+_PARTIAL_SUFFIX = ".partial"
+# Names of the directories a build creates: `<photo stem>-<12 hex digits of its hash>`, or partial ones.
+_BUILD_DIR_PATTERN = re.compile(r".+-[0-9a-f]{12}(" + re.escape(_PARTIAL_SUFFIX) + r")?")
+
+
+def content_hash(image_path, boxes):
+    """
+    Returns the build key of a photo: a SHA-256 over the build version, the
+    photo's bytes and the boxes cropped from it, so changing any of them
+    rebuilds the photo's outputs.
+    """
+    digest = hashlib.sha256(f"{BUILD_VERSION}:{TILE_SIZE}:{THUMBNAIL_WIDTHS}:{CROP_SIZE}:{WEBP_QUALITY}".encode())
+    with open(image_path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    digest.update(json.dumps(boxes, sort_keys=True).encode())
+    return digest.hexdigest()
+
+
+def pyramid_levels(width, height, tile_size=TILE_SIZE):
+    """
+    Returns the (width, height) of each level of a tile pyramid: level 0 is
+    the full resolution and each next level halves it, down to the first
+    level that fits in a single tile.
+    """
+    levels = [(width, height)]
+    while width > tile_size or height > tile_size:
+        width, height = max(1, math.ceil(width / 2)), max(1, math.ceil(height / 2))
+        levels.append((width, height))
+    return levels
+
+
+def box_pixels(box_2d, width, height):
+    """Converts a `box_2d` to a (left, top, right, bottom) pixel box inside the photo."""
+    y1, x1, y2, x2 = box_2d
+    left, right = sorted((round(x1 * width / BOX_SCALE), round(x2 * width / BOX_SCALE)))
+    top, bottom = sorted((round(y1 * height / BOX_SCALE), round(y2 * height / BOX_SCALE)))
+    left, top = min(max(left, 0), width - 1), min(max(top, 0), height - 1)
+    return left, top, max(left + 1, min(right, width)), max(top + 1, min(bottom, height))
+
+
+def _save_webp(image, path):
+    image.save(path, "WEBP", quality=WEBP_QUALITY, method=4)
+
+
+def build_image(image_path, out_dir, image_dir, boxes):
+    """
+    Renders one photo into `out_dir/image_dir`: a tile pyramid, the WebP
+    thumbnails of `THUMBNAIL_WIDTHS` and one crop per box (a list of
+    (box_2d, title)). The files are written to a partial directory that is
+    renamed into place once complete. Returns the photo's manifest entry,
+    with paths relative to `out_dir`. Runs in worker processes.
+    """
+    final_dir = os.path.join(out_dir, image_dir)
+    work_dir = final_dir + _PARTIAL_SUFFIX
+    shutil.rmtree(work_dir, ignore_errors=True)
+    os.makedirs(work_dir)
+
+    with Image.open(image_path) as source:
+        # Browsers display photos upright, and boxes are drawn on what they display.
+        image = ImageOps.exif_transpose(source).convert("RGB")
+    width, height = image.size
+
+    levels = []
+    level_image = image
+    for level, (level_width, level_height) in enumerate(pyramid_levels(width, height)):
+        if level_image.size != (level_width, level_height):
+            level_image = level_image.resize((level_width, level_height), Image.Resampling.BOX)
+        columns, rows = math.ceil(level_width / TILE_SIZE), math.ceil(level_height / TILE_SIZE)
+        level_dir = os.path.join(work_dir, "tiles", str(level))
+        os.makedirs(level_dir)
+        for column in range(columns):
+            for row in range(rows):
+                tile = level_image.crop((
+                    column * TILE_SIZE, row * TILE_SIZE,
+                    min((column + 1) * TILE_SIZE, level_width), min((row + 1) * TILE_SIZE, level_height),
+                ))
+                _save_webp(tile, os.path.join(level_dir, f"{column}_{row}.webp"))
+        levels.append({"width": level_width, "height": level_height, "columns": columns, "rows": rows})
+
+    thumbnails = []
+    # Photos narrower than a rendition get one at their own width instead.
+    for thumbnail_width in sorted({min(thumbnail_width, width) for thumbnail_width in THUMBNAIL_WIDTHS}):
+        size = (thumbnail_width, max(1, round(height * thumbnail_width / width)))
+        name = f"{size[0]}w.webp"
+        _save_webp(image.resize(size, Image.Resampling.LANCZOS), os.path.join(work_dir, name))
+        thumbnails.append({"path": f"{image_dir}/{name}", "width": size[0], "height": size[1]})
+
+    crops = []
+    os.makedirs(os.path.join(work_dir, "boxes"))
+    for i, (box_2d, title) in enumerate(boxes):
+        crop = image.crop(box_pixels(box_2d, width, height))
+        crop.thumbnail((CROP_SIZE, CROP_SIZE), Image.Resampling.LANCZOS)
+        name = f"boxes/{i}.webp"
+        _save_webp(crop, os.path.join(work_dir, name))
+        crops.append({"box_2d": box_2d, "title": title, "path": f"{image_dir}/{name}",
+                      "width": crop.width, "height": crop.height})
+
+    shutil.rmtree(final_dir, ignore_errors=True)
+    os.rename(work_dir, final_dir)
+    return {
+        "width": width,
+        "height": height,
+        "tile_size": TILE_SIZE,
+        "tiles": f"{image_dir}/tiles/{{level}}/{{column}}_{{row}}.webp",
+        "levels": levels,
+        "thumbnails": thumbnails,
+        "boxes": crops,
+    }
+
+
+def read_manifest(out_dir):
+    """Returns the manifest entries of an earlier build by filename, or {}."""
+    try:
+        with open(os.path.join(out_dir, MANIFEST_FILENAME), "r") as f:
+            manifest = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+    if manifest.get("version") != BUILD_VERSION:
+        return {}
+    return {entry["filename"]: entry for entry in manifest.get("images", [])}
+
+
+def build_shelf_images(boardgames_data, image_root, out_dir, workers=None):
+    """
+    Builds the viewer's renditions of every photo referenced by a game's
+    `filename` (relative to `image_root`) into `out_dir`, on a pool of
+    `workers` processes. A photo is only rebuilt when its `content_hash`
+    changed since the last build; each build lives in a directory named
+    after its hash, so cached copies of old files never go stale. The
+    manifest is written last, then the build directories it no longer
+    lists are removed; other directories in `out_dir` are left alone.
+    Returns the manifest and the number of photos rebuilt.
+    """
+    boxes_by_filename = {}
+    for game in boardgames_data:
+        if game.get("filename") and game.get("box_2d"):
+            boxes_by_filename.setdefault(game["filename"], []).append((list(game["box_2d"]), game.get("title")))
+
+    os.makedirs(out_dir, exist_ok=True)
+    previous = read_manifest(out_dir)
+    entries = {}
+    jobs = {}
+    for filename, boxes in sorted(boxes_by_filename.items()):
+        image_path = os.path.join(image_root, filename)
+        if not os.path.exists(image_path):
+            print(f"Warning: {image_path} does not exist, skipping its renditions.")
+            continue
+        key = content_hash(image_path, boxes)
+        image_dir = f"{os.path.splitext(os.path.basename(filename))[0]}-{key[:12]}"
+        old = previous.get(filename)
+        if old is not None and old["hash"] == key and os.path.isdir(os.path.join(out_dir, old["dir"])):
+            entries[filename] = old
+        else:
+            jobs[filename] = (image_path, image_dir, key, boxes)
+
+    if jobs:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {
+                filename: executor.submit(build_image, image_path, out_dir, image_dir, boxes)
+                for filename, (image_path, image_dir, key, boxes) in jobs.items()
+            }
+            for filename, future in futures.items():
+                _, image_dir, key, _ = jobs[filename]
+                entries[filename] = {"filename": filename, "hash": key, "dir": image_dir, **future.result()}
+                print(f"Built renditions of {filename}")
+
+    manifest = {"version": BUILD_VERSION, "images": [entries[filename] for filename in sorted(entries)]}
+    write_json_atomic(os.path.join(out_dir, MANIFEST_FILENAME), manifest, indent=None, separators=(",", ":"))
+
+    referenced = {entry["dir"] for entry in manifest["images"]}
+    for name in os.listdir(out_dir):
+        if (
+            name not in referenced
+            and _BUILD_DIR_PATTERN.fullmatch(name)
+            and os.path.isdir(os.path.join(out_dir, name))
+        ):
+            shutil.rmtree(os.path.join(out_dir, name))
+    return manifest, len(jobs)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Build tiles, thumbnails and box crops of the shelf photos.")
+    parser.add_argument("json_file", help="Path to the boardgames.json (or .jsonl) file listing the photos.")
+    parser.add_argument("out_dir", help="Directory to write the renditions to, e.g. frontend/public/images.")
+    parser.add_argument(
+        "--image-root", default=None, help="Directory holding the photos (default: the directory of json_file)."
+    )
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: one per CPU).")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    image_root = args.image_root if args.image_root is not None else os.path.dirname(os.path.abspath(args.json_file))
+    manifest, built = build_shelf_images(iter_boardgames_data(args.json_file), image_root, args.out_dir, args.workers)
+    print(f"{built} of {len(manifest['images'])} photos rebuilt under {args.out_dir}")
@@ -0,0 +1,80 @@
+import json
+import os
+import threading
+from datetime import datetime, timezone
+
+from bgg_common import bgg_id_from_url
+from file_utils import ends_mid_line, record_key
+
+ADDED = "added"
+ALREADY_OWNED = "already-owned"
+SKIPPED = "skipped"
+ERROR = "error"
+
+# Outcomes that need no further work when a sync is resumed.
+DONE_STATUSES = (ADDED, ALREADY_OWNED, SKIPPED)
+
+
+def read_sync_outcomes(journal_path):
+    """
+    Returns the latest journal entry of every game, keyed by `record_key`.
+    A missing journal means no game has been processed yet.
+    """
+    outcomes = {}
+    try:
+        with open(journal_path, 'r') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # A line cut short by a crash.
+                outcomes[entry["key"]] = entry
+    except FileNotFoundError:
+        pass
+    return outcomes
+
+
+class SyncJournal:
+    """
+    An append-only JSON Lines log of per-game collection sync outcomes.
+    Entries are flushed as they are written and fsynced every `fsync_every`
+    entries. A line cut short by a crash is terminated on open, so the
+    first new entry is not glued onto it. Safe to share between threads.
+    """
+
+    def __init__(self, journal_path, fsync_every=20):
+        self.journal_path = journal_path
+        self.fsync_every = fsync_every
+        truncated = ends_mid_line(journal_path)
+        self._file = open(journal_path, 'a')
+        if truncated:
+            self._file.write("\n")
+        self._unsynced = 0
+        self._lock = threading.Lock()
+
+    def record(self, game, status, reason=None):
+        """Appends the outcome of syncing one game."""
+        entry = {
+            "key": record_key(game),
+            "game_id": bgg_id_from_url(game.get("url")),
+            "title": game.get("title"),
+            "status": status,
+            "reason": reason,
+            "at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        }
+        with self._lock:
+            self._file.write(json.dumps(entry) + "\n")
+            self._file.flush()
+            self._unsynced += 1
+            if self._unsynced >= self.fsync_every:
+                self._sync()
+
+    def _sync(self):
+        os.fsync(self._file.fileno())
+        self._unsynced = 0
+
+    def close(self):
+        """Fsyncs any remaining entries and closes the journal."""
+        with self._lock:
+            self._sync()
+            self._file.close()
@@ -0,0 +1,74 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from bgcollection import main
+
+REPO_DIR = os.path.join(os.path.dirname(__file__), os.pardir)
+
+
+class TestBgcollection(unittest.TestCase):
+    @patch("update_boardgames.cli")
+    def test_enrich_passes_arguments_through(self, mock_cli):
+        """Test that enrich runs update_boardgames with the remaining arguments."""
+        main(["enrich", "games.json", "--workers", "4"])
+        mock_cli.assert_called_once_with(["games.json", "--workers", "4"])
+
+    @patch("update_boardgames.cli")
+    def test_refresh_refreshes_by_id(self, mock_cli):
+        """Test that refresh maps onto a stats-only or age-based refresh."""
+        main(["refresh", "games.json", "--adaptive"])
+        mock_cli.assert_called_with(["games.json", "--stats-only", "--adaptive"])
+        main(["refresh", "games.json", "--older-than", "30"])
+        mock_cli.assert_called_with(["games.json", "--refresh-older-than", "30"])
+
+    @patch("update_collection.cli")
+    def test_sync_runs_update_collection(self, mock_cli):
+        """Test that sync runs update_collection with the remaining arguments."""
+        main(["sync", "games.json", "--backend", "http"])
+        mock_cli.assert_called_once_with(["games.json", "--backend", "http"])
+
+    def test_report_does_not_import_heavy_dependencies(self):
+        """Test that a cheap command starts without requests, selenium or NumPy."""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            json_path = os.path.join(tmp_dir, "boardgames.json")
+            with open(json_path, "w") as f:
+                json.dump([{"title": "Game 1", "filename": "shelf.jpg", "box_2d": [0, 0, 10, 10]}], f)
+            script = (
+                "import sys, bgcollection\n"
+                f"bgcollection.main(['report', {json_path!r}])\n"
+                "heavy = ('requests', 'selenium', 'webdriver_manager', 'numpy')\n"
+                "print(sorted(name for name in heavy if name in sys.modules))\n"
+            )
+            result = subprocess.run(
+                [sys.executable, "-c", script], cwd=REPO_DIR, capture_output=True, text=True, check=True
+            )
+        self.assertIn("1 games: 0 enriched, 1 pending", result.stdout)
+        self.assertEqual(result.stdout.splitlines()[-1], "[]")
+
+    def test_http_sync_does_not_import_selenium(self):
+        """Test that the modules of an HTTP sync, with several workers, load without selenium."""
+        script = (
+            "import sys\n"
+            "from unittest.mock import patch\n"
+            "import update_collection\n"
+            "games = [{'title': 'New', 'url': 'https://boardgamegeek.com/boardgame/2'}]\n"
+            "with patch('bgg_api.BggApi') as api, patch('bgg_http_collection.BggHttpCollectionManager') as manager, "
+            "patch('update_collection.read_boardgames_data', return_value=games):\n"
+            "    api.return_value.get_owned_game_ids.return_value = set()\n"
+            "    manager.return_value.add_game_to_collection.return_value = ('added', None)\n"
+            "    update_collection.main(backend='http', username='u', cookies_file='c.json', workers=2)\n"
+            "print(sorted(name for name in ('selenium', 'webdriver_manager') if name in sys.modules))\n"
+        )
+        result = subprocess.run(
+            [sys.executable, "-c", script], cwd=REPO_DIR, capture_output=True, text=True, check=True
+        )
+        self.assertEqual(result.stdout.splitlines()[-1], "[]")
+
+
+if __name__ == "__main__":
+    unittest.main()
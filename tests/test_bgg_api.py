@@ -1,14 +1,28 @@
+import os
 import unittest
-from unittest.mock import patch, MagicMock
+import xml.etree.ElementTree as ET
+from unittest.mock import call, patch, MagicMock
 
-from bgg_api import BggApi
+import requests
+
+from bgg_api import (
+    COLLECTION_QUEUED_TIMEOUT,
+    DEFAULT_TIMEOUT,
+    QUEUED_POLL_INTERVAL,
+    BggApi,
+    bgg_id_from_url,
+    rank_candidates,
+)
+from title_index import TitleIndex
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
 
 
 class TestBggApi(unittest.TestCase):
     def setUp(self):
         self.api = BggApi()
 
-    @patch("bgg_api.requests.get")
+    @patch("bgg_api.requests.Session.get")
     def test_search_game_success(self, mock_get):
         """Test a successful game search."""
         mock_response = MagicMock()
@@ -21,9 +35,10 @@ class TestBggApi(unittest.TestCase):
         mock_get.assert_called_once_with(
             "https://boardgamegeek.com/xmlapi2/search",
             params={"query": "Test Game", "type": "boardgame"},
+            timeout=DEFAULT_TIMEOUT,
         )
 
-    @patch("bgg_api.requests.get")
+    @patch("bgg_api.requests.Session.get")
     def test_search_game_no_results(self, mock_get):
         """Test a game search with no results."""
         mock_response = MagicMock()
@@ -34,7 +49,7 @@ class TestBggApi(unittest.TestCase):
         game_ids = self.api.search_game("Unknown Game")
         self.assertEqual(game_ids, [])
 
-    @patch("bgg_api.requests.get")
+    @patch("bgg_api.requests.Session.get")
     def test_get_game_details_success(self, mock_get):
         """Test getting game details successfully."""
         mock_response = MagicMock()
@@ -46,11 +61,171 @@ class TestBggApi(unittest.TestCase):
         self.assertEqual(len(game_details), 1)
         self.assertEqual(game_details[0]["id"], "123")
 
-    @patch("bgg_api.BggApi.search_game")
+    @patch("bgg_api.time.sleep")
+    @patch("bgg_api.requests.Session.get")
+    def test_make_request_retries_throttled_responses(self, mock_get, mock_sleep):
+        """Test that 429 and 202 responses are retried with backoff."""
+        throttled = MagicMock(status_code=429, headers={"Retry-After": "2"})
+        queued = MagicMock(status_code=202, headers={})
+        ok = MagicMock(status_code=200, content=b'<items><item id="123"></item></items>')
+        mock_get.side_effect = [throttled, queued, ok]
+
+        game_ids = self.api.search_game("Test Game")
+        self.assertEqual(game_ids, ["123"])
+        self.assertEqual(mock_get.call_count, 3)
+        self.assertEqual(mock_sleep.call_count, 2)
+        self.assertGreaterEqual(mock_sleep.call_args_list[0].args[0], 2.0)
+
+        metrics = self.api.metrics
+        self.assertEqual(metrics.counter_value("requests_total", endpoint="search", status=429), 1)
+        self.assertEqual(metrics.counter_value("requests_total", endpoint="search", status=200), 1)
+        self.assertEqual(metrics.counter_value("retries_total", endpoint="search", status=202), 1)
+        self.assertGreaterEqual(metrics.counter_value("sleep_seconds_total", reason="backoff"), 2.0)
+        summary = metrics.summary()["histograms"]
+        self.assertEqual(summary['request_seconds{endpoint="search"}']["count"], 3)
+        self.assertEqual(summary['parse_seconds{endpoint="search"}']["count"], 1)
+
+    @patch("bgg_api.time.sleep")
+    @patch("bgg_api.requests.Session.get")
+    def test_make_request_gives_up_after_max_retries(self, mock_get, mock_sleep):
+        """Test that persistent throttling eventually returns no result."""
+        throttled = MagicMock(status_code=429, headers={})
+        throttled.raise_for_status.side_effect = requests.exceptions.HTTPError("429")
+        mock_get.return_value = throttled
+
+        api = BggApi(max_retries=2)
+        self.assertEqual(api.search_game("Test Game"), [])
+        self.assertEqual(mock_get.call_count, 3)
+
+    @patch("bgg_api.requests.Session.get")
+    def test_make_request_uses_rate_limiter(self, mock_get):
+        """Test that every request takes a token from the shared limiter."""
+        mock_get.return_value = MagicMock(status_code=200, content=b"<items></items>")
+        rate_limiter = MagicMock()
+        api = BggApi(rate_limiter=rate_limiter)
+        api.search_game("Test Game")
+        rate_limiter.acquire.assert_called_once()
+
+    @patch("bgg_api.time.sleep")
+    @patch("bgg_api.requests.Session.get")
+    def test_make_request_adapts_the_rate(self, mock_get, mock_sleep):
+        """Test that throttles and successes reach the limiter and the rate gauge."""
+        mock_get.side_effect = [
+            MagicMock(status_code=429, headers={}),
+            MagicMock(status_code=200, content=b"<items></items>"),
+        ]
+        rate_limiter = MagicMock(rate=1.5)
+        api = BggApi(rate_limiter=rate_limiter)
+        api.search_game("Test Game")
+        rate_limiter.on_throttle.assert_called_once()
+        rate_limiter.on_success.assert_called_once()
+        self.assertEqual(api.metrics.summary()["gauges"]["request_rate"], 1.5)
+
+    @patch("bgg_api.requests.Session.get")
+    def test_make_request_serves_cached_responses(self, mock_get):
+        """Test that a cached response is returned without a request."""
+        cache = MagicMock()
+        cache.get.return_value = b'<items><item id="123"></item></items>'
+        api = BggApi(cache=cache)
+        self.assertEqual(api.search_game("Test Game"), ["123"])
+        mock_get.assert_not_called()
+
+    @patch("bgg_api.requests.Session.get")
+    def test_make_request_stores_responses_in_cache(self, mock_get):
+        """Test that successful responses are written to the cache."""
+        mock_get.return_value = MagicMock(status_code=200, content=b"<items></items>")
+        cache = MagicMock()
+        cache.get.return_value = None
+        api = BggApi(cache=cache)
+        api.search_game("Test Game")
+        cache.set.assert_called_once_with(
+            "https://boardgamegeek.com/xmlapi2/search",
+            {"query": "Test Game", "type": "boardgame"},
+            b"<items></items>",
+        )
+
+    @patch("bgg_api.requests.Session.get")
+    def test_malformed_responses_are_not_cached(self, mock_get):
+        """Test that a body that does not parse is neither returned nor cached."""
+        mock_get.return_value = MagicMock(status_code=200, content=b'<items><item id="1">')
+        cache = MagicMock()
+        cache.get.return_value = None
+        api = BggApi(cache=cache)
+        self.assertIsNone(api.search_hits("Test Game"))
+        self.assertIsNone(api.get_game_details(["1"]))
+        cache.set.assert_not_called()
+
+    @patch("bgg_api.requests.Session.get")
+    def test_malformed_cached_responses_are_fetched_again(self, mock_get):
+        """Test that a cached body that does not parse counts as a miss."""
+        mock_get.return_value = MagicMock(status_code=200, content=b'<items><item id="123"></item></items>')
+        cache = MagicMock()
+        cache.get.return_value = b"<items><it"
+        api = BggApi(cache=cache)
+        self.assertEqual(api.search_game("Test Game"), ["123"])
+        mock_get.assert_called_once()
+        cache.set.assert_called_once()
+        self.assertEqual(api.metrics.counter_value("cache_misses_total", endpoint="search"), 1)
+
+    @patch("bgg_api.requests.Session.get")
+    def test_offline_mode_never_touches_the_network(self, mock_get):
+        """Test that offline cache misses return no result."""
+        cache = MagicMock()
+        cache.get.return_value = None
+        api = BggApi(cache=cache, offline=True)
+        self.assertEqual(api.search_game("Test Game"), [])
+        cache.get.assert_called_once_with(
+            "https://boardgamegeek.com/xmlapi2/search",
+            {"query": "Test Game", "type": "boardgame"},
+            allow_stale=True,
+        )
+        mock_get.assert_not_called()
+
+    def test_session_pools_keep_alive_connections(self):
+        """Test that the default session pools connections and asks for gzip."""
+        api = BggApi(pool_size=8)
+        adapter = api.session.get_adapter("https://boardgamegeek.com")
+        self.assertEqual(adapter._pool_maxsize, 8)
+        self.assertIn("gzip", api.session.headers["Accept-Encoding"])
+        self.assertEqual(api.session.headers["Connection"], "keep-alive")
+
+    def test_custom_session_and_timeout_are_used(self):
+        """Test that a caller-provided session and timeout are used for requests."""
+        session = MagicMock()
+        session.get.return_value = MagicMock(status_code=200, content=b"<items></items>")
+        api = BggApi(session=session, timeout=3)
+        api.search_game("Test Game")
+        self.assertEqual(session.get.call_args.kwargs["timeout"], 3)
+
+    @patch("bgg_api.requests.Session.get")
+    def test_make_request_handles_timeouts(self, mock_get):
+        """Test that a timed-out request returns no result."""
+        mock_get.side_effect = requests.exceptions.Timeout("read timed out")
+        self.assertEqual(self.api.search_game("Test Game"), [])
+
+    def test_stream_parser_matches_tree_parser(self):
+        """Test that the streaming parser agrees with the tree parser on recorded data."""
+        with open(os.path.join(FIXTURES_DIR, "thing_stats.xml"), "rb") as f:
+            content = f.read()
+        root = ET.fromstring(content)
+        expected = [self.api._parse_game_details(item) for item in root.findall(".//item")]
+        games = self.api._parse_game_details_stream(content)
+        self.assertEqual(games, expected)
+        self.assertEqual(games[0]["rank"], 549)
+        self.assertEqual(games[2]["rank"], float("inf"))
+        self.assertEqual(games[2]["min_playtime"], 0)
+
+    @patch("bgg_api.requests.Session.get")
+    def test_get_game_details_invalid_xml(self, mock_get):
+        """Test that a malformed thing response counts as a failed request."""
+        mock_get.return_value = MagicMock(status_code=200, content=b'<items><item id="1">')
+        self.assertIsNone(self.api.get_game_details(["1"]))
+
+    @patch("bgg_api.BggApi.search_hits")
     @patch("bgg_api.BggApi.get_game_details")
     def test_get_bgg_game_details_success(self, mock_get_details, mock_search):
         """Test the end-to-end process of getting game details."""
-        mock_search.return_value = ["123"]
+        mock_search.return_value = [("123", "Test Game")]
         mock_get_details.return_value = [
             {
                 "id": "123",
@@ -67,9 +242,264 @@ class TestBggApi(unittest.TestCase):
         details = self.api.get_bgg_game_details("Test Game")
         self.assertIsNotNone(details)
         self.assertEqual(details["rank"], 1)
-        mock_search.assert_called_once_with("Test Game")
+        mock_search.assert_called_once_with("Test Game", exact=True)
         mock_get_details.assert_called_once_with(["123"])
 
+    @patch("bgg_api.BggApi.search_hits")
+    @patch("bgg_api.BggApi.get_game_details")
+    def test_get_bgg_game_details_prunes_candidates(self, mock_get_details, mock_search):
+        """Test that only the most plausible hits of a full search are fetched."""
+        hits = [(str(i), f"Catan: Scenario {i}") for i in range(100)] + [("13", "CATAN")]
+        mock_search.side_effect = lambda title, exact=False: [] if exact else hits
+        mock_get_details.side_effect = lambda ids: [
+            {"id": i, "rank": 400 if i == "13" else int(i) + 1, "score": 7.0, "min_players": 3, "max_players": 4,
+             "min_playtime": 60, "max_playtime": 120, "weight": 2.3}
+            for i in ids
+        ]
+
+        details = self.api.get_bgg_game_details("Catan")
+
+        self.assertEqual(mock_search.call_count, 2)
+        mock_get_details.assert_called_once()
+        fetched = mock_get_details.call_args.args[0]
+        self.assertEqual(len(fetched), 20)
+        self.assertEqual(fetched[0], "13")
+        self.assertEqual(details["url"], "https://boardgamegeek.com/boardgame/0")
+        self.assertEqual(self.api.metrics.counter_value("candidates_pruned_total"), 81)
+
+    @patch("bgg_api.BggApi.search_hits")
+    @patch("bgg_api.BggApi.get_game_details")
+    def test_get_bgg_game_details_falls_back_from_unranked_exact_matches(self, mock_get_details, mock_search):
+        """Test that unranked exact matches do not stop the full search."""
+        mock_search.side_effect = lambda title, exact=False: (
+            [("1", "Dune")] if exact else [("1", "Dune"), ("2", "Dune: Imperium")]
+        )
+        mock_get_details.side_effect = lambda ids: [
+            {"id": i, "rank": float("inf") if i == "1" else 20, "score": 7.0, "min_players": 1, "max_players": 4,
+             "min_playtime": 60, "max_playtime": 120, "weight": 3.0}
+            for i in ids
+        ]
+
+        details = self.api.get_bgg_game_details("Dune")
+
+        self.assertEqual([call.args[0] for call in mock_get_details.call_args_list], [["1"], ["2"]])
+        self.assertEqual(details["url"], "https://boardgamegeek.com/boardgame/2")
+
+    def test_rank_candidates_prefers_exact_then_similar_names(self):
+        """Test that normalized exact names come first, then the closest names."""
+        hits = [("1", "Catan Junior"), ("2", "Carcassonne"), ("3", "The Catan"), ("4", "Catan: Seafarers")]
+        self.assertEqual(rank_candidates("Catan", hits), ["3", "1", "4", "2"])
+        self.assertEqual(rank_candidates("Catan", hits, limit=2), ["3", "1"])
+
+    @patch("bgg_api.requests.Session.get")
+    def test_search_hits_exact(self, mock_get):
+        """Test that exact searches pass exact=1 and hits carry their names."""
+        with open(os.path.join(FIXTURES_DIR, "search.xml"), "rb") as f:
+            mock_get.return_value = MagicMock(status_code=200, content=f.read())
+        hits = self.api.search_hits("Catan", exact=True)
+        self.assertEqual(hits[0], ("13", "CATAN"))
+        self.assertEqual(mock_get.call_args.kwargs["params"], {"query": "Catan", "type": "boardgame", "exact": 1})
+
+    @patch("bgg_api.BggApi.search_hits")
+    @patch("bgg_api.BggApi.get_game_details")
+    def test_get_bgg_game_details_many_packs_ids_across_titles(self, mock_get_details, mock_search):
+        """Test that candidate ids are deduped and packed into 20-id requests."""
+        search_results = {
+            "Game A": [str(i) for i in range(15)],
+            "Game B": [str(i) for i in range(10, 30)],
+            "Game C": [],
+        }
+        mock_search.side_effect = lambda title, exact=False: [(i, title) for i in search_results[title]]
+
+        def details_for(ids):
+            return [
+                {
+                    "id": i,
+                    "rank": int(i) + 1,
+                    "score": 7.0,
+                    "min_players": 2,
+                    "max_players": 4,
+                    "min_playtime": 30,
+                    "max_playtime": 60,
+                    "weight": 2.0,
+                }
+                for i in ids
+            ]
+
+        mock_get_details.side_effect = details_for
+
+        api = BggApi(rate_limiter=MagicMock())
+        results = api.get_bgg_game_details_many(["Game A", "Game B", "Game C", "Game A"])
+
+        # Game C has no exact match, so it alone goes on to a full search.
+        self.assertEqual(mock_search.call_count, 4)
+        self.assertEqual([len(call.args[0]) for call in mock_get_details.call_args_list], [20, 10])
+        self.assertEqual(results["Game A"]["url"], "https://boardgamegeek.com/boardgame/0")
+        self.assertEqual(results["Game B"]["url"], "https://boardgamegeek.com/boardgame/10")
+        self.assertIsNone(results["Game C"])
+
+    @patch("bgg_api.BggApi.search_game")
+    @patch("bgg_api.BggApi.get_game_details")
+    def test_get_bgg_game_details_by_ids_skips_search(self, mock_get_details, mock_search):
+        """Test fetching details for known ids without searching."""
+        mock_get_details.return_value = [
+            {
+                "id": "7",
+                "rank": float("inf"),
+                "score": 6.123,
+                "min_players": 2,
+                "max_players": 4,
+                "min_playtime": 30,
+                "max_playtime": 60,
+                "weight": 2.0,
+            }
+        ]
+        details = self.api.get_bgg_game_details_by_ids([7, "7", "8"])
+        mock_search.assert_not_called()
+        mock_get_details.assert_called_once_with(["7", "8"])
+        self.assertEqual(list(details), ["7"])
+        self.assertEqual(details["7"]["rank"], "Not Ranked")
+        self.assertEqual(details["7"]["score"], 6.12)
+
+    @patch("bgg_api.BggApi.search_hits")
+    @patch("bgg_api.BggApi.get_game_details")
+    def test_title_index_skips_search_and_learns(self, mock_get_details, mock_search):
+        """Test that indexed titles skip searching and new ones are remembered with the name they matched."""
+        def details_for(ids):
+            return [
+                {
+                    "id": i,
+                    "rank": int(i),
+                    "score": 7.0,
+                    "min_players": 2,
+                    "max_players": 4,
+                    "min_playtime": 30,
+                    "max_playtime": 60,
+                    "weight": 2.0,
+                }
+                for i in ids
+            ]
+
+        mock_get_details.side_effect = details_for
+        mock_search.return_value = [("5", "New Game: Deluxe"), ("6", "New Game"), ("7", "New Game")]
+        title_index = TitleIndex()
+        title_index.add("Known Game", "42")
+        api = BggApi(title_index=title_index)
+
+        details = api.get_bgg_game_details("Known Game")
+        self.assertEqual(details["url"], "https://boardgamegeek.com/boardgame/42")
+        mock_search.assert_not_called()
+        mock_get_details.assert_called_once_with(["42"])
+
+        api.get_bgg_game_details("New Game")
+        mock_search.assert_called_once_with("New Game", exact=True)
+        self.assertEqual(title_index.lookup("New Game"), "5")
+        self.assertEqual(title_index.lookup("New Game: Deluxe"), "5")
+
+        results = api.get_bgg_game_details_many(["New Game", "Known Game"])
+        self.assertEqual(mock_search.call_count, 1)
+        self.assertEqual(mock_get_details.call_args.args[0], ["5", "42"])
+        self.assertEqual(results["Known Game"]["url"], "https://boardgamegeek.com/boardgame/42")
+
+    @patch("bgg_api.BggApi.search_hits")
+    @patch("bgg_api.BggApi.get_game_details")
+    def test_get_bgg_game_details_many_reports_failed_requests(self, mock_get_details, mock_search):
+        """Test that titles hit by failed requests are reported apart from titles BGG does not know."""
+        hits = {"Lost": None, "Broken": [("2", "Broken")], "Good": [("3", "Good")], "Unknown": []}
+        mock_search.side_effect = lambda title, exact=False: hits[title]
+        mock_get_details.side_effect = lambda ids: None if "2" in ids else [
+            {"id": i, "rank": 10, "score": 7.0, "min_players": 2, "max_players": 4,
+             "min_playtime": 30, "max_playtime": 60, "weight": 2.0}
+            for i in ids
+        ]
+        progress = MagicMock()
+
+        api = BggApi()
+        failed = set()
+        results = api.get_bgg_game_details_many(["Lost", "Good", "Unknown"], failed=failed, on_progress=progress)
+        self.assertEqual(failed, {"Lost"})
+        self.assertEqual((results["Lost"], results["Unknown"]), (None, None))
+        self.assertEqual(results["Good"]["url"], "https://boardgamegeek.com/boardgame/3")
+        self.assertTrue(progress.called)
+
+        failed = set()
+        results = api.get_bgg_game_details_many(["Broken"], failed=failed)
+        self.assertEqual(failed, {"Broken"})
+        self.assertIsNone(results["Broken"])
+
+    @patch("bgg_api.BggApi.search_hits")
+    @patch("bgg_api.BggApi.get_game_details")
+    def test_fuzzy_title_index_match_needs_search(self, mock_get_details, mock_search):
+        """Test that a fuzzy title index match is only tried once a search returns it."""
+        mock_get_details.side_effect = lambda ids: [
+            {"id": i, "rank": 10, "score": 7.0, "min_players": 2, "max_players": 4,
+             "min_playtime": 30, "max_playtime": 60, "weight": 2.0}
+            for i in ids
+        ]
+        title_index = TitleIndex(fuzzy_cutoff=0.9)
+        title_index.add("Ticket to Ride", "9209")
+        api = BggApi(title_index=title_index)
+
+        mock_search.side_effect = lambda title, exact=False: [] if exact else [("1", "Other"), ("9209", "Ticket to Ride")]
+        details = api.get_bgg_game_details("Tickett to Ride")
+        self.assertEqual(details["url"], "https://boardgamegeek.com/boardgame/9209")
+        mock_get_details.assert_called_once_with(["9209"])
+
+        mock_get_details.reset_mock()
+        mock_search.side_effect = lambda title, exact=False: [] if exact else [("2", "Ticket to Rde")]
+        details = api.get_bgg_game_details("Tickett to Rde")
+        self.assertEqual(details["url"], "https://boardgamegeek.com/boardgame/2")
+        mock_get_details.assert_called_once_with(["2"])
+
+    @patch("bgg_api.requests.Session.get")
+    def test_get_owned_game_ids(self, mock_get):
+        """Test fetching the ids of owned games in one collection request."""
+        mock_get.return_value = MagicMock(
+            status_code=200,
+            content=b'<items totalitems="2"><item objecttype="thing" objectid="13" subtype="boardgame">'
+            b'<name sortindex="1">CATAN</name><status own="1"/></item>'
+            b'<item objecttype="thing" objectid="324413" subtype="boardgame"><status own="1"/></item></items>',
+        )
+        self.assertEqual(self.api.get_owned_game_ids("someone"), {"13", "324413"})
+        mock_get.assert_called_once_with(
+            "https://boardgamegeek.com/xmlapi2/collection",
+            params={"username": "someone", "own": 1, "brief": 1},
+            timeout=DEFAULT_TIMEOUT,
+        )
+
+    @patch("bgg_api.time.sleep")
+    @patch("bgg_api.requests.Session.get")
+    def test_get_owned_game_ids_still_queued(self, mock_get, mock_sleep):
+        """Test that a collection BGG never finishes preparing is polled until the deadline, then reported."""
+        mock_get.return_value = MagicMock(
+            status_code=202, headers={}, content=b"<message>Your request has been accepted</message>"
+        )
+        self.assertIsNone(self.api.get_owned_game_ids("someone"))
+        polls = COLLECTION_QUEUED_TIMEOUT // QUEUED_POLL_INTERVAL
+        self.assertEqual(mock_get.call_count, polls + 1)
+        self.assertEqual(mock_sleep.call_args_list, [call(QUEUED_POLL_INTERVAL)] * polls)
+
+    @patch("bgg_api.time.sleep")
+    @patch("bgg_api.requests.Session.get")
+    def test_get_owned_game_ids_polls_queued_collection(self, mock_get, mock_sleep):
+        """Test that a queued collection is polled until ready, without slowing an adaptive rate down."""
+        queued = MagicMock(status_code=202, headers={}, content=b"<message>Your request has been accepted</message>")
+        ready = MagicMock(status_code=200, content=b'<items totalitems="1"><item objectid="13"/></items>')
+        mock_get.side_effect = [queued] * 6 + [ready]
+        rate_limiter = MagicMock(rate=1.0)
+        api = BggApi(rate_limiter=rate_limiter)
+
+        self.assertEqual(api.get_owned_game_ids("someone"), {"13"})
+        rate_limiter.on_throttle.assert_not_called()
+        rate_limiter.on_success.assert_called_once()
+        self.assertEqual(api.metrics.counter_value("queued_polls_total", endpoint="collection"), 6)
+
+    def test_bgg_id_from_url(self):
+        """Test extracting ids from BGG URLs."""
+        self.assertEqual(bgg_id_from_url("https://boardgamegeek.com/boardgame/324413"), "324413")
+        self.assertIsNone(bgg_id_from_url("invalid_url"))
+        self.assertIsNone(bgg_id_from_url(None))
+
 
 if __name__ == "__main__":
     unittest.main()
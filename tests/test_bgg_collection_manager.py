@@ -1,7 +1,17 @@
+import json
+import os
+import tempfile
 import unittest
 from unittest.mock import patch, MagicMock
 
-from bgg_collection_manager import BggCollectionManager
+from selenium.webdriver.common.by import By
+
+from bgg_collection_manager import (
+    ADD_TO_COLLECTION_XPATH,
+    OWNED_STATUS_XPATH,
+    BggCollectionManager,
+)
+from sync_journal import ADDED, ALREADY_OWNED, ERROR, SKIPPED
 
 
 class TestBggCollectionManager(unittest.TestCase):
@@ -9,22 +19,54 @@ class TestBggCollectionManager(unittest.TestCase):
         self.manager = BggCollectionManager()
         self.manager.driver = MagicMock()
 
+    @patch("bgg_collection_manager._chromedriver_path", None)
+    @patch("bgg_collection_manager.ChromeDriverManager")
     @patch("bgg_collection_manager.Service")
     @patch("bgg_collection_manager.webdriver.Chrome")
-    def test_setup_driver(self, mock_chrome, mock_service):
+    def test_setup_driver(self, mock_chrome, mock_service, mock_driver_manager):
         """Test setting up the Chrome WebDriver."""
         manager = BggCollectionManager()
         manager.setup_driver()
         mock_service.assert_called_once()
         mock_chrome.assert_called_once()
+        mock_chrome.return_value.maximize_window.assert_called_once()
         self.assertIsNotNone(manager.driver)
 
+    @patch("bgg_collection_manager._chromedriver_path", None)
+    @patch("bgg_collection_manager.ChromeDriverManager")
+    @patch("bgg_collection_manager.Service")
+    @patch("bgg_collection_manager.webdriver.Chrome")
+    def test_setup_driver_headless_installs_driver_once(self, mock_chrome, mock_service, mock_driver_manager):
+        """Test that headless browsers share a single chromedriver install."""
+        for _ in range(2):
+            BggCollectionManager(headless=True, cookies_file="cookies.json").setup_driver()
+        mock_driver_manager.return_value.install.assert_called_once()
+        options = mock_chrome.call_args.kwargs["options"]
+        self.assertIn("--headless=new", options.arguments)
+        mock_chrome.return_value.maximize_window.assert_not_called()
+
     @patch("builtins.input", return_value=None)
     def test_login_to_bgg(self, mock_input):
         """Test the login process."""
         self.manager.login_to_bgg()
         mock_input.assert_called_once()
 
+    @patch("builtins.input")
+    def test_login_to_bgg_with_cookies_file(self, mock_input):
+        """Test that a cookies file logs the browser in without prompting, as headless browsers need."""
+        cookies = [{"name": "SessionID", "value": "abc"}]
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            cookies_file = os.path.join(tmp_dir, "cookies.json")
+            with open(cookies_file, "w") as f:
+                json.dump(cookies, f)
+            manager = BggCollectionManager(headless=True, cookies_file=cookies_file)
+            manager.driver = MagicMock()
+            manager.login_to_bgg()
+        manager.driver.add_cookie.assert_called_once_with(cookies[0])
+        mock_input.assert_not_called()
+        with self.assertRaises(ValueError):
+            BggCollectionManager(headless=True)
+
     @patch("bgg_collection_manager.WebDriverWait")
     @patch("bgg_collection_manager.EC")
     def test_add_game_to_collection_success(self, mock_ec, mock_wait):
@@ -47,24 +89,32 @@ class TestBggCollectionManager(unittest.TestCase):
         mock_save_button = MagicMock()
 
         mock_wait.return_value.until.side_effect = [
+            True,
             mock_add_button,
             mock_owned_checkbox,
             mock_save_button,
+            True,
         ]
 
-        self.manager.add_game_to_collection(game)
+        outcome = self.manager.add_game_to_collection(game)
 
+        self.assertEqual(outcome, (ADDED, None))
         self.manager.driver.get.assert_called_once_with(
             "https://boardgamegeek.com/boardgame/123"
         )
         self.assertEqual(mock_add_button.click.call_count, 1)
         self.assertEqual(mock_owned_checkbox.click.call_count, 1)
         self.assertEqual(mock_save_button.click.call_count, 1)
+        mock_ec.invisibility_of_element.assert_called_once_with(mock_save_button)
+        self.assertEqual(
+            sorted(self.manager.metrics.summary()["histograms"]),
+            [f'browser_step_seconds{{step="{step}"}}' for step in ("open_dialog", "page_load", "save")],
+        )
 
     def test_add_game_to_collection_no_url(self):
         """Test skipping a game with no URL."""
         game = {"title": "Test Game"}
-        self.manager.add_game_to_collection(game)
+        self.assertEqual(self.manager.add_game_to_collection(game), (SKIPPED, "No URL found."))
         self.manager.driver.get.assert_not_called()
 
     def test_add_game_to_collection_invalid_url(self):
@@ -85,12 +135,44 @@ class TestBggCollectionManager(unittest.TestCase):
         mock_owned_link.is_displayed.return_value = True
         self.manager.driver.find_element.return_value = mock_owned_link
 
-        self.manager.add_game_to_collection(game)
+        self.assertEqual(self.manager.add_game_to_collection(game), (ALREADY_OWNED, None))
 
         self.manager.driver.get.assert_called_once_with(
             "https://boardgamegeek.com/boardgame/123"
         )
-        self.manager.driver.find_element.assert_called_once()
+        self.manager.driver.find_element.assert_called_with(By.XPATH, OWNED_STATUS_XPATH)
+
+    @patch("bgg_collection_manager.WebDriverWait")
+    @patch("bgg_collection_manager.EC")
+    def test_add_game_to_collection_waits_for_collection_controls(self, mock_ec, mock_wait):
+        """Test that the page is awaited until its collection button or owned status is rendered."""
+        game = {"title": "Test Game", "url": "https://boardgamegeek.com/boardgame/123"}
+        self.manager.driver.find_element.return_value.is_displayed.return_value = True
+
+        self.manager.add_game_to_collection(game)
+
+        (by, xpath), = mock_ec.presence_of_element_located.call_args.args
+        self.assertEqual(by, By.XPATH)
+        self.assertIn(ADD_TO_COLLECTION_XPATH, xpath)
+        self.assertIn(OWNED_STATUS_XPATH, xpath)
+        mock_wait.return_value.until.assert_called_once_with(mock_ec.presence_of_element_located.return_value)
+        self.manager.driver.execute_script.assert_not_called()
+
+    @patch("bgg_collection_manager.WebDriverWait")
+    def test_add_game_to_collection_error(self, mock_wait):
+        """Test that a failed page interaction is reported with its reason."""
+        game = {"title": "Test Game", "url": "https://boardgamegeek.com/boardgame/123"}
+        self.manager.driver.find_element.side_effect = Exception("Element not found")
+        mock_wait.return_value.until.side_effect = [True, Exception("Timed out")]
+        self.assertEqual(self.manager.add_game_to_collection(game), (ERROR, "Timed out"))
+
+    def test_load_cookies(self):
+        """Test copying a logged-in session's cookies into this browser."""
+        cookies = [{"name": "SessionID", "value": "abc"}]
+        self.manager.load_cookies(cookies)
+        self.manager.driver.get.assert_called_once_with("https://boardgamegeek.com")
+        self.manager.driver.add_cookie.assert_called_once_with(cookies[0])
+        self.manager.driver.refresh.assert_called_once()
 
     def test_close_driver(self):
         """Test closing the WebDriver."""
@@ -0,0 +1,134 @@
+import json
+import os
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import requests
+
+from bgg_http_collection import BggHttpCollectionManager
+from sync_journal import ALREADY_OWNED, SKIPPED
+
+
+class StubBggHandler(BaseHTTPRequestHandler):
+    """A stand-in for the BGG login and collection JSON endpoints."""
+
+    def log_message(self, format, *args):
+        pass
+
+    def _read_json(self):
+        return json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+
+    def _respond(self, status, headers=()):
+        self.send_response(status)
+        for name, value in headers:
+            self.send_header(name, value)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def do_POST(self):
+        if self.path == "/login/api/v1":
+            credentials = self._read_json()["credentials"]
+            if credentials == {"username": "someone", "password": "secret"}:
+                self._respond(204, [("Set-Cookie", "SessionID=abc; Path=/")])
+            else:
+                self._respond(401)
+        elif self.path == "/api/collectionitems":
+            if "SessionID=abc" not in (self.headers.get("Cookie") or ""):
+                self._respond(401)
+                return
+            self.server.saved_items.append(self._read_json()["item"])
+            self._respond(200)
+        else:
+            self._respond(404)
+
+
+class TestBggHttpCollectionManager(unittest.TestCase):
+    def setUp(self):
+        self.server = HTTPServer(("127.0.0.1", 0), StubBggHandler)
+        self.server.saved_items = []
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.base_url = f"http://127.0.0.1:{self.server.server_port}"
+        os.environ["BGG_PASSWORD"] = "secret"
+
+    def tearDown(self):
+        del os.environ["BGG_PASSWORD"]
+        self.server.shutdown()
+        self.server.server_close()
+
+    def _logged_in_manager(self):
+        manager = BggHttpCollectionManager(base_url=self.base_url, username="someone", owned_ids={"822"})
+        manager.setup_driver()
+        manager.login_to_bgg()
+        return manager
+
+    def test_add_game_to_collection(self):
+        """Test that a logged-in session posts the game as owned."""
+        manager = self._logged_in_manager()
+        manager.add_game_to_collection({"title": "CATAN", "url": "https://boardgamegeek.com/boardgame/13"})
+        manager.close_driver()
+        self.assertEqual(
+            self.server.saved_items,
+            [{"collid": 0, "objecttype": "thing", "objectid": 13, "status": {"own": True}}],
+        )
+
+    def test_never_posts_owned_games(self):
+        """Test that owned games, including ones added earlier in the run, are not posted again."""
+        manager = self._logged_in_manager()
+        catan = {"title": "CATAN", "url": "https://boardgamegeek.com/boardgame/13"}
+        manager.add_game_to_collection(catan)
+        self.assertEqual(manager.add_game_to_collection(catan), (ALREADY_OWNED, None))
+        self.assertEqual(
+            manager.add_game_to_collection({"title": "Carcassonne", "url": "https://boardgamegeek.com/boardgame/822"}),
+            (ALREADY_OWNED, None),
+        )
+        self.assertEqual(len(self.server.saved_items), 1)
+
+    def test_requires_owned_ids(self):
+        """Test that nothing is posted while the owned games are unknown."""
+        manager = BggHttpCollectionManager(base_url=self.base_url, username="someone")
+        manager.setup_driver()
+        manager.login_to_bgg()
+        status, _ = manager.add_game_to_collection({"title": "CATAN", "url": "https://boardgamegeek.com/boardgame/13"})
+        self.assertEqual(status, SKIPPED)
+        self.assertEqual(self.server.saved_items, [])
+
+    def test_skips_games_without_valid_urls(self):
+        """Test that games without a BGG URL are not posted."""
+        manager = self._logged_in_manager()
+        manager.add_game_to_collection({"title": "No URL"})
+        manager.add_game_to_collection({"title": "Bad URL", "url": "invalid_url"})
+        self.assertEqual(self.server.saved_items, [])
+
+    def test_login_failure_raises(self):
+        """Test that wrong credentials stop the sync."""
+        os.environ["BGG_PASSWORD"] = "wrong"
+        manager = BggHttpCollectionManager(base_url=self.base_url, username="someone")
+        manager.setup_driver()
+        with self.assertRaises(requests.exceptions.HTTPError):
+            manager.login_to_bgg()
+
+    def test_unauthenticated_posts_are_reported_not_raised(self):
+        """Test that a rejected update is reported and the sync carries on."""
+        manager = BggHttpCollectionManager(base_url=self.base_url, owned_ids=set())
+        manager.setup_driver()
+        manager.add_game_to_collection({"title": "CATAN", "url": "https://boardgamegeek.com/boardgame/13"})
+        self.assertEqual(self.server.saved_items, [])
+
+    def test_reuses_cookies_from_a_file(self):
+        """Test that cookies exported from a logged-in session are reused."""
+        cookies = self._logged_in_manager().get_cookies()
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            cookies_file = os.path.join(tmp_dir, "cookies.json")
+            with open(cookies_file, "w") as f:
+                json.dump(cookies, f)
+            manager = BggHttpCollectionManager(base_url=self.base_url, cookies_file=cookies_file, owned_ids=set())
+            manager.setup_driver()
+            manager.login_to_bgg()
+            manager.add_game_to_collection({"title": "CATAN", "url": "https://boardgamegeek.com/boardgame/13"})
+        self.assertEqual(len(self.server.saved_items), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
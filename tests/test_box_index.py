@@ -0,0 +1,92 @@
+import io
+import unittest
+
+from box_index import BoxIndex, iou, merge_duplicates, normalize_box, print_report
+from game_record import GameRecord
+
+
+def game(title, box, filename="shelf.jpg", **details):
+    return {"title": title, "filename": filename, "box_2d": box, **details}
+
+
+class TestBoxIndex(unittest.TestCase):
+    def setUp(self):
+        self.data = [
+            game("Catan", [100, 100, 200, 300]),
+            game("Catan", [102, 98, 201, 305], url="https://boardgamegeek.com/boardgame/13", rank=500),
+            game("Azul", [120, 200, 220, 400]),
+            game("Catan", [100, 100, 200, 300], filename="other.jpg"),
+            game("No Box", None),
+            game("Catan", [101, 100, 200, 299]),
+        ]
+        self.index = BoxIndex(self.data, cell_size=64)
+
+    def test_normalize_box_and_iou(self):
+        """Test that boxes are ordered and IoU is symmetric and bounded."""
+        self.assertEqual(normalize_box([200, 300, 100, 100]), (100.0, 100.0, 200.0, 300.0))
+        self.assertIsNone(normalize_box(None))
+        a, b = normalize_box([0, 0, 10, 10]), normalize_box([0, 5, 10, 15])
+        self.assertAlmostEqual(iou(a, b), 1 / 3)
+        self.assertEqual(iou(a, normalize_box([20, 20, 30, 30])), 0.0)
+        self.assertEqual(iou(a, a), 1.0)
+
+    def test_point_and_region_queries(self):
+        """Test that queries only return boxes of the given photo."""
+        self.assertEqual(self.index.at_point("shelf.jpg", 180, 280), [0, 1, 2, 5])
+        self.assertEqual(self.index.at_point("shelf.jpg", 210, 350), [2])
+        self.assertEqual(self.index.at_point("other.jpg", 150, 150), [3])
+        self.assertEqual(self.index.at_point("missing.jpg", 150, 150), [])
+        self.assertEqual(self.index.in_region("shelf.jpg", [210, 0, 1024, 1024]), [2])
+        self.assertEqual(self.index.in_region("shelf.jpg", [90, 90, 210, 310], contained=True), [0, 1, 5])
+
+    def test_overlapping_pairs_stay_on_one_photo(self):
+        """Test that pairs are found across cells but never across photos."""
+        pairs = self.index.overlapping_pairs(min_iou=0.5)
+        self.assertEqual([(a, b) for a, b, _ in pairs], [(0, 5), (1, 5), (0, 1)])
+        self.assertTrue(all(overlap > 0.5 for _, _, overlap in pairs))
+
+    def test_duplicate_groups(self):
+        """Test that same-title boxes above the threshold are grouped transitively."""
+        self.assertEqual(self.index.duplicate_groups(min_iou=0.8), [[0, 1, 5]])
+        self.assertEqual(self.index.duplicate_groups(min_iou=0.1, same_title=False), [[0, 1, 2, 5]])
+
+    def test_merge_duplicates_keeps_most_complete_record(self):
+        """Test that each group collapses into its most complete record, in place."""
+        records = [GameRecord.from_dict(g) if g["box_2d"] else g for g in self.data]
+        records[0]["location"] = "Top shelf"
+        merged, groups = merge_duplicates(records, min_iou=0.8)
+        self.assertEqual(groups, [[0, 1, 5]])
+        self.assertEqual([g["title"] for g in merged], ["Catan", "Azul", "Catan", "No Box"])
+        self.assertEqual(merged[0]["rank"], 500)
+        self.assertEqual(merged[0]["location"], "Top shelf")
+        self.assertEqual(merged[2]["filename"], "other.jpg")
+
+    def test_merge_duplicates_fills_empty_fields_on_a_copy(self):
+        """Test that empty fields of the kept record are filled in without modifying the input."""
+        records = [
+            GameRecord.from_dict(game("Catan", [100, 100, 200, 300], url=None, rank="Not Found", score=0, weight=2.3)),
+            GameRecord.from_dict(game("Catan", [101, 100, 200, 300], rank=500, score=7.1)),
+        ]
+        before = [record.to_dict() for record in records]
+
+        merged, _ = merge_duplicates(records, min_iou=0.8)
+
+        self.assertEqual((merged[0].rank, merged[0].score, merged[0].weight), (500, 7.1, 2.3))
+        self.assertNotIn("url", merged[0])
+        self.assertEqual([record.to_dict() for record in records], before)
+        merged[0].box_2d.append(0)
+        self.assertEqual([record.to_dict() for record in records], before)
+
+    def test_report(self):
+        """Test that the report lists duplicate groups and other overlaps."""
+        out = io.StringIO()
+        print_report(self.index, overlap_iou=0.1, duplicate_iou=0.8, same_title=True, out=out)
+        report = out.getvalue()
+        self.assertIn("1 duplicate groups", report)
+        self.assertIn("#5 'Catan'", report)
+        self.assertIn("3 other overlapping pairs", report)
+        self.assertIn("'Azul'", report)
+
+
+if __name__ == "__main__":
+    unittest.main()
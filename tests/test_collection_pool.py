@@ -0,0 +1,49 @@
+import unittest
+from unittest.mock import MagicMock
+
+from collection_pool import BggCollectionManagerPool
+from sync_journal import ADDED
+
+
+class TestBggCollectionManagerPool(unittest.TestCase):
+    def test_setup_shares_the_first_login(self):
+        """Test that only the first session logs in and the rest reuse its cookies."""
+        managers = [MagicMock(), MagicMock(), MagicMock()]
+        managers[0].get_cookies.return_value = [{"name": "SessionID", "value": "abc"}]
+        pool = BggCollectionManagerPool(3, manager_factory=iter(managers).__next__)
+
+        pool.setup()
+
+        for manager in managers:
+            manager.setup_driver.assert_called_once()
+        managers[0].login_to_bgg.assert_called_once()
+        managers[1].login_to_bgg.assert_not_called()
+        managers[1].load_cookies.assert_called_once_with(managers[0].get_cookies.return_value)
+        managers[2].load_cookies.assert_called_once_with(managers[0].get_cookies.return_value)
+
+    def test_add_games_to_collection_processes_every_game_once(self):
+        """Test that games are spread across sessions without duplicates."""
+        managers = [MagicMock(), MagicMock()]
+        pool = BggCollectionManagerPool(2, manager_factory=iter(managers).__next__)
+        games = [{"title": f"Game {i}"} for i in range(10)]
+        for manager in managers:
+            manager.add_game_to_collection.return_value = (ADDED, None)
+        journal = MagicMock()
+
+        pool.add_games_to_collection(games, journal=journal)
+
+        processed = [call.args[0]["title"] for m in managers for call in m.add_game_to_collection.call_args_list]
+        self.assertEqual(sorted(processed), sorted(game["title"] for game in games))
+        self.assertEqual(journal.record.call_count, 10)
+
+    def test_close(self):
+        """Test that every browser is closed."""
+        managers = [MagicMock(), MagicMock()]
+        pool = BggCollectionManagerPool(2, manager_factory=iter(managers).__next__)
+        pool.close()
+        for manager in managers:
+            manager.close_driver.assert_called_once()
+
+
+if __name__ == "__main__":
+    unittest.main()
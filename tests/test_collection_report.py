@@ -0,0 +1,35 @@
+import unittest
+from datetime import datetime, timezone
+
+from collection_report import format_summary, summarize
+from game_record import records_from_data
+
+
+class TestCollectionReport(unittest.TestCase):
+    def test_summarize(self):
+        """Test that games are counted by state, age, photo and duplicates."""
+        details = {"url": "https://boardgamegeek.com/boardgame/1", "rank": 5, "score": 7.0, "min_players": 2,
+                   "max_players": 4, "min_playtime": 30, "max_playtime": 60, "weight": 2.0}
+        boardgames_data = [
+            {"title": "Fresh", "filename": "a.jpg", "box_2d": [0, 0, 100, 100], **details,
+             "fetched_at": "2025-07-10T00:00:00+00:00"},
+            {"title": "Old", "filename": "a.jpg", "box_2d": [200, 0, 300, 100], **details,
+             "fetched_at": "2025-01-01T00:00:00"},
+            {"title": "Unranked", "filename": "b.jpg", "box_2d": [0, 0, 100, 100], **details, "rank": "Not Ranked"},
+            {"title": "Missing", "filename": "b.jpg", "box_2d": [500, 500, 600, 600], "url": None, "rank": "Not Found"},
+            {"title": "Pending", "filename": "b.jpg", "box_2d": [700, 700, 800, 800]},
+            {"title": "Pending", "filename": "b.jpg", "box_2d": [701, 700, 800, 800]},
+        ]
+
+        summary = summarize(records_from_data(boardgames_data), stale_days=30, now=datetime(2025, 7, 15, tzinfo=timezone.utc))
+
+        self.assertEqual(summary["games"], 6)
+        self.assertEqual((summary["enriched"], summary["pending"], summary["not_found"]), (3, 2, 1))
+        self.assertEqual((summary["not_ranked"], summary["stale"], summary["unknown_age"]), (1, 1, 1))
+        self.assertEqual(summary["duplicates"], 1)
+        self.assertEqual(summary["photos"], {"a.jpg": 2, "b.jpg": 4})
+        self.assertIn("6 games: 3 enriched, 2 pending, 1 not found on BGG", format_summary(summary))
+
+
+if __name__ == "__main__":
+    unittest.main()
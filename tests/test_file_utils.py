@@ -0,0 +1,113 @@
+import json
+import os
+import tempfile
+import unittest
+
+from file_utils import (
+    append_boardgames_jsonl,
+    compact_boardgames_jsonl,
+    convert_boardgames_data,
+    iter_boardgames_data,
+    iter_boardgames_jsonl,
+    read_boardgames_data,
+    record_key,
+    without_record_id,
+)
+from game_record import records_to_data
+
+RECORDS = [
+    {"title": "Doomlings", "filename": "a.jpg", "box_2d": [1, 2, 3, 4]},
+    {"title": "Munchkin Cthulhu", "filename": "a.jpg", "box_2d": [5, 6, 7, 8]},
+    {"title": "Doomlings", "filename": "b.jpg", "box_2d": [1, 2, 3, 4]},
+]
+
+
+class TestJsonLines(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.json_path = os.path.join(self.tmp_dir.name, "boardgames.json")
+        self.jsonl_path = os.path.join(self.tmp_dir.name, "boardgames.jsonl")
+        with open(self.json_path, "w") as f:
+            json.dump(RECORDS, f, indent=4)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_record_key(self):
+        """Test that records are keyed by photo and bounding box."""
+        self.assertNotEqual(record_key(RECORDS[0]), record_key(RECORDS[2]))
+        self.assertEqual(record_key(RECORDS[0]), record_key(dict(RECORDS[0], rank=1)))
+        self.assertNotEqual(record_key({"title": "A"}), record_key({"title": "B"}))
+
+    def test_convert_round_trip(self):
+        """Test converting JSON to JSON Lines and back."""
+        convert_boardgames_data(self.json_path, self.jsonl_path)
+        with open(self.jsonl_path) as f:
+            self.assertEqual(len(f.readlines()), 3)
+        self.assertEqual([without_record_id(record) for record in read_boardgames_data(self.jsonl_path)], RECORDS)
+
+        round_trip_path = os.path.join(self.tmp_dir.name, "round_trip.json")
+        convert_boardgames_data(self.jsonl_path, round_trip_path)
+        self.assertEqual(records_to_data(read_boardgames_data(round_trip_path)), RECORDS)
+
+    def test_appended_records_supersede_earlier_lines(self):
+        """Test that appending a changed record replaces it in place."""
+        convert_boardgames_data(self.json_path, self.jsonl_path)
+        records = list(iter_boardgames_jsonl(self.jsonl_path))
+        append_boardgames_jsonl(self.jsonl_path, [dict(records[0].to_dict(), rank=42), dict(records[0].to_dict(), rank=43)])
+        append_boardgames_jsonl(self.jsonl_path, [{"title": "New"}])
+
+        records = list(iter_boardgames_jsonl(self.jsonl_path))
+        self.assertEqual([record["title"] for record in records], ["Doomlings", "Munchkin Cthulhu", "Doomlings", "New"])
+        self.assertEqual([record.get("rank") for record in records], [43, None, None, None])
+
+        compact_boardgames_jsonl(self.jsonl_path)
+        with open(self.jsonl_path) as f:
+            self.assertEqual(len(f.readlines()), 4)
+        compacted = list(iter_boardgames_jsonl(self.jsonl_path))
+        self.assertEqual([record["record_id"] for record in compacted], [0, 1, 2, 3])
+        self.assertEqual([without_record_id(record) for record in compacted],
+                         [without_record_id(record) for record in records])
+
+        json_path = os.path.join(self.tmp_dir.name, "compacted.json")
+        convert_boardgames_data(self.jsonl_path, json_path)
+        self.assertEqual(read_boardgames_data(json_path)[0].to_dict(), dict(RECORDS[0], rank=43))
+
+    def test_line_cut_short_by_a_crash_is_skipped(self):
+        """Test that a truncated last line is skipped and ended before the next append."""
+        convert_boardgames_data(self.json_path, self.jsonl_path)
+        with open(self.jsonl_path, 'a') as f:
+            f.write('{"title":"x","rec')
+
+        self.assertEqual(len(list(iter_boardgames_jsonl(self.jsonl_path))), len(RECORDS))
+        append_boardgames_jsonl(self.jsonl_path, [{"title": "New"}])
+
+        records = list(iter_boardgames_jsonl(self.jsonl_path))
+        self.assertEqual(len(records), len(RECORDS) + 1)
+        self.assertEqual(records[-1]["title"], "New")
+
+    def test_records_sharing_a_box_or_title_are_kept(self):
+        """Test that records are identified by line, not by their box or title."""
+        records = [{"title": "Azul", "filename": "a.jpg", "box_2d": [1, 2, 3, 4]}] * 2 + [{"title": "Azul"}] * 2
+        with open(self.jsonl_path, "w") as f:
+            f.writelines(json.dumps(record) + "\n" for record in records)
+        self.assertEqual([without_record_id(record) for record in iter_boardgames_jsonl(self.jsonl_path)], records)
+
+    def test_lines_appended_while_streaming_are_not_yielded(self):
+        """Test that a reader only sees the records present when it started."""
+        convert_boardgames_data(self.json_path, self.jsonl_path)
+        records = iter_boardgames_jsonl(self.jsonl_path)
+        first = next(records)
+        append_boardgames_jsonl(self.jsonl_path, [dict(first.to_dict(), rank=1)])
+        self.assertEqual(len(list(records)), 2)
+        self.assertIsNone(first.get("rank"))
+
+    def test_iter_boardgames_data_reads_both_formats(self):
+        """Test iterating records from JSON and JSON Lines files."""
+        convert_boardgames_data(self.json_path, self.jsonl_path)
+        self.assertEqual(records_to_data(iter_boardgames_data(self.json_path)), RECORDS)
+        self.assertEqual([without_record_id(record) for record in iter_boardgames_data(self.jsonl_path)], RECORDS)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,59 @@
+import json
+import os
+import tempfile
+import unittest
+
+from frontend_index import build_facets, write_frontend_index
+from game_record import GameRecord
+
+
+class TestFrontendIndex(unittest.TestCase):
+    def setUp(self):
+        self.games = [
+            {"title": "Catan", "filename": "a.jpg", "score": 7.1, "weight": 2.3, "min_players": 3, "max_players": 4,
+             "min_playtime": 60, "max_playtime": 120, "rank": 549, "fetched_at": "2025-01-01T00:00:00+00:00"},
+            {"title": "Lost", "filename": "b.jpg", "score": 0, "weight": 0, "min_players": 0, "max_players": 0,
+             "min_playtime": 0, "max_playtime": 0, "rank": "Not Found"},
+            {"title": "Unfetched", "filename": "a.jpg"},
+        ]
+
+    def test_build_facets(self):
+        """Test that games land in the bucket of their value, or in `other`."""
+        facets = build_facets(self.games)
+        score = facets["score"]
+        self.assertEqual(score["buckets"][score["bounds"].index(7)], [0])
+        self.assertEqual(score["buckets"][0], [1])
+        self.assertEqual(score["other"], [2])
+        self.assertEqual(facets["min_players"]["other"], [1, 2])
+        playtime = facets["max_playtime"]
+        self.assertEqual(playtime["buckets"][playtime["bounds"].index(120)], [0])
+
+    def test_write_frontend_index(self):
+        """Test the manifest, minified shards and cleanup of stale shards."""
+        with tempfile.TemporaryDirectory() as index_dir:
+            os.makedirs(os.path.join(index_dir, "shards"))
+            with open(os.path.join(index_dir, "shards", "gone.json"), "w") as f:
+                f.write("[]")
+
+            manifest = write_frontend_index([GameRecord.from_dict(game) for game in self.games], index_dir)
+
+            self.assertEqual(manifest["games"], 3)
+            self.assertEqual(
+                [(image["filename"], image["shard"], image["games"]) for image in manifest["images"]],
+                [("a.jpg", "shards/a.json", 2), ("b.jpg", "shards/b.json", 1)],
+            )
+            self.assertEqual(sorted(os.listdir(os.path.join(index_dir, "shards"))), ["a.json", "b.json"])
+            with open(os.path.join(index_dir, "shards", "a.json")) as f:
+                content = f.read()
+            self.assertNotIn(" ", content.replace("Unfetched", ""))
+            shard = json.loads(content)
+            self.assertEqual([game["game_id"] for game in shard], [0, 2])
+            self.assertNotIn("fetched_at", shard[0])
+            with open(os.path.join(index_dir, "manifest.json")) as f:
+                self.assertEqual(json.load(f), manifest)
+            with open(os.path.join(index_dir, "facets.json")) as f:
+                self.assertEqual(json.load(f), build_facets(self.games))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,83 @@
+import json
+import os
+import unittest
+
+from game_record import MISSING, NOT_FOUND, NOT_RANKED, GameRecord, json_default, records_from_data, records_to_data
+
+DATA_PATH = os.path.join(os.path.dirname(__file__), os.pardir, "frontend", "public", "boardgames.json")
+
+
+class TestGameRecord(unittest.TestCase):
+    def test_round_trips_the_shipped_catalogue(self):
+        """Test that converting boardgames.json to records and back is lossless, key order included."""
+        with open(DATA_PATH) as f:
+            data = json.load(f)
+        converted = records_to_data(records_from_data(data))
+        self.assertEqual(converted, data)
+        self.assertEqual(json.dumps(converted), json.dumps(data))
+
+    def test_missing_keys_and_unknown_keys(self):
+        """Test that absent keys stay absent and unknown keys are kept."""
+        game = {"title": "Catan", "url": None, "custom": [1, 2]}
+        record = GameRecord.from_dict(game)
+        self.assertIs(record.rank, MISSING)
+        self.assertIsNone(record.url)
+        self.assertNotIn("rank", record)
+        self.assertIn("url", record)
+        self.assertIn("custom", record)
+        self.assertEqual(record.get("rank", "default"), "default")
+        self.assertEqual(record["custom"], [1, 2])
+        with self.assertRaises(KeyError):
+            record["rank"]
+        self.assertEqual(record.to_dict(), game)
+
+    def test_rank_sentinels(self):
+        """Test the typed view of numeric, unranked and not found ranks."""
+        self.assertEqual(GameRecord(rank=42).rank_value, 42)
+        self.assertIsNone(GameRecord(rank=NOT_RANKED).rank_value)
+        self.assertIsNone(GameRecord(rank=NOT_FOUND).rank_value)
+        self.assertIsNone(GameRecord().rank_value)
+
+    def test_needs_details_apply_and_not_found(self):
+        """Test the lifecycle of a record through a lookup."""
+        record = GameRecord(title="Catan")
+        self.assertTrue(record.needs_details())
+
+        record.mark_not_found()
+        self.assertEqual(
+            record.to_dict(),
+            {"title": "Catan", "url": None, "rank": NOT_FOUND, "score": 0, "min_players": 0, "max_players": 0,
+             "min_playtime": 0, "max_playtime": 0, "weight": 0},
+        )
+        self.assertTrue(record.needs_details())
+
+        record.apply_details({
+            "url": "https://boardgamegeek.com/boardgame/13", "rank": NOT_RANKED, "score": 7.1,
+            "min_players": 3, "max_players": 4, "min_playtime": 60, "max_playtime": 120, "weight": 2.3,
+        })
+        self.assertFalse(record.needs_details())
+        self.assertEqual(record.bgg_id, "13")
+        self.assertIsNotNone(record.fetched_at)
+
+    def test_apply_stats_marks_the_record_fetched(self):
+        """Test that refreshing statistics renews fetched_at even when nothing changed."""
+        record = GameRecord(title="Catan", url="https://boardgamegeek.com/boardgame/13", rank=5, score=7.0,
+                            weight=2.3, min_players=3)
+        details = {"url": "https://boardgamegeek.com/boardgame/13", "rank": 5, "score": 7.0, "weight": 2.3,
+                   "min_players": 4}
+        self.assertFalse(record.apply_stats(details))
+        self.assertEqual(record.bgg_id, "13")
+        self.assertIsNotNone(record.fetched_at)
+        self.assertTrue(record.apply_stats(dict(details, rank=4)))
+        self.assertEqual((record.rank, record.min_players), (4, 3))
+
+    def test_json_default_serializes_records(self):
+        """Test that records can be dumped straight to JSON."""
+        data = [GameRecord(title="Catan", rank=1), {"title": "Plain dict"}]
+        self.assertEqual(
+            json.loads(json.dumps(data, default=json_default)), [{"title": "Catan", "rank": 1}, {"title": "Plain dict"}]
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
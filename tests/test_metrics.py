@@ -0,0 +1,93 @@
+import json
+import os
+import tempfile
+import unittest
+
+from metrics import JsonlSink, Metrics
+
+
+class TestMetrics(unittest.TestCase):
+    def test_counters_and_gauges_by_label(self):
+        """Test that counters add up per label set and gauges keep the last value."""
+        metrics = Metrics()
+        metrics.increment("requests_total", endpoint="thing", status=200)
+        metrics.increment("requests_total", 2, status=200, endpoint="thing")
+        metrics.increment("requests_total", endpoint="search", status=200)
+        metrics.set_gauge("rate", 1.0)
+        metrics.set_gauge("rate", 0.5)
+
+        summary = metrics.summary()
+        self.assertEqual(summary["counters"]['requests_total{endpoint="thing",status="200"}'], 3)
+        self.assertEqual(summary["counters"]['requests_total{endpoint="search",status="200"}'], 1)
+        self.assertEqual(summary["gauges"], {"rate": 0.5})
+        self.assertEqual(metrics.counter_value("requests_total", endpoint="thing", status=200), 3)
+        self.assertEqual(metrics.counter_value("missing"), 0)
+
+    def test_histogram_quantiles(self):
+        """Test the count, sum, extremes and nearest-rank quantiles of a histogram."""
+        metrics = Metrics()
+        for value in range(1, 101):
+            metrics.observe("request_seconds", value / 100)
+        with metrics.timer("parse_seconds", endpoint="thing"):
+            pass
+
+        histograms = metrics.summary()["histograms"]
+        stats = histograms["request_seconds"]
+        self.assertEqual(stats["count"], 100)
+        self.assertAlmostEqual(stats["sum"], 50.5)
+        self.assertEqual((stats["min"], stats["max"]), (0.01, 1.0))
+        self.assertEqual((stats["p50"], stats["p90"], stats["p99"]), (0.5, 0.9, 0.99))
+        self.assertEqual(histograms['parse_seconds{endpoint="thing"}']["count"], 1)
+        json.dumps(metrics.summary())
+
+    def test_histogram_memory_is_bounded(self):
+        """Test that histograms keep a bounded sample but exact counts, sums and extremes."""
+        metrics = Metrics(reservoir_size=100)
+        for value in range(1, 10001):
+            metrics.observe("request_seconds", value)
+
+        stats = metrics.summary()["histograms"]["request_seconds"]
+        self.assertEqual(len(metrics._histograms[("request_seconds", ())].sample), 100)
+        self.assertEqual((stats["count"], stats["sum"]), (10000, 50005000))
+        self.assertEqual((stats["min"], stats["max"]), (1, 10000))
+        self.assertTrue(1 <= stats["p50"] <= 10000)
+
+    def test_prometheus_text(self):
+        """Test the Prometheus exposition of every kind of metric."""
+        metrics = Metrics()
+        metrics.increment("retries_total", endpoint="thing", status=429)
+        metrics.set_gauge("rate", 2.0)
+        metrics.observe("request_seconds", 0.25, endpoint="thing")
+
+        text = metrics.to_prometheus()
+        self.assertIn("# TYPE retries_total counter\n", text)
+        self.assertIn('retries_total{endpoint="thing",status="429"} 1\n', text)
+        self.assertIn("rate 2.0\n", text)
+        self.assertIn("# TYPE request_seconds summary\n", text)
+        self.assertIn('request_seconds{endpoint="thing",quantile="0.5"} 0.25\n', text)
+        self.assertIn('request_seconds_count{endpoint="thing"} 1\n', text)
+
+    def test_prometheus_label_values_are_escaped(self):
+        """Test that backslashes, quotes and newlines in label values are escaped."""
+        metrics = Metrics()
+        metrics.increment("titles_total", title='Say "Hi"\\\n')
+
+        self.assertIn('titles_total{title="Say \\"Hi\\"\\\\\\n"} 1\n', metrics.to_prometheus())
+
+    def test_jsonl_sink_receives_every_event(self):
+        """Test that events are streamed to a JSON Lines sink as they happen."""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "metrics.jsonl")
+            metrics = Metrics(sink=JsonlSink(path))
+            metrics.increment("titles_total", outcome="updated")
+            metrics.observe("write_seconds", 0.1)
+            metrics.close()
+
+            with open(path) as f:
+                events = [json.loads(line) for line in f]
+        self.assertEqual([(e["type"], e["name"]) for e in events], [("counter", "titles_total"), ("histogram", "write_seconds")])
+        self.assertEqual(events[0]["labels"], {"outcome": "updated"})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,84 @@
+import io
+import json
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stderr, redirect_stdout
+
+import numpy as np
+
+from query_boardgames import GameTable, format_game, main, parse_args
+
+
+def game(title, score, weight, rank, players=(2, 4), playtime=(30, 60), filename="a.jpg"):
+    return {
+        "title": title, "filename": filename, "score": score, "weight": weight, "rank": rank,
+        "min_players": players[0], "max_players": players[1],
+        "min_playtime": playtime[0], "max_playtime": playtime[1],
+    }
+
+
+class TestGameTable(unittest.TestCase):
+    def setUp(self):
+        self.table = GameTable([
+            game("Catan", 7.1, 2.3, 549, players=(3, 4), playtime=(60, 120)),
+            game("Azul", 7.7, 1.8, 80),
+            game("Expansion", 8.4, 2.5, "Not Ranked", filename="b.jpg"),
+            game("Lost", 0, 0, "Not Found", players=(0, 0), playtime=(0, 0)),
+            {"title": "Unfetched", "filename": "b.jpg"},
+        ])
+
+    def test_missing_values_are_nan(self):
+        """Test that sentinels and absent values never look like numbers."""
+        self.assertTrue(np.isnan(self.table.columns["rank"][2]))
+        self.assertTrue(np.isnan(self.table.columns["score"][3]))
+        self.assertTrue(np.isnan(self.table.columns["weight"][4]))
+        self.assertEqual(self.table.columns["score"][2], 8.4)
+
+    def test_range_filters(self):
+        """Test combining range, player count, title and shelf filters."""
+        table = self.table
+        self.assertEqual(list(np.flatnonzero(table.between("score", 7.5))), [1, 2])
+        self.assertEqual(list(np.flatnonzero(table.between("weight", None, 2.0))), [1])
+        self.assertEqual(list(np.flatnonzero(table.between("rank", 1, 1000) & table.supports_players(2))), [1])
+        self.assertEqual(list(np.flatnonzero(table.title_contains("CAT"))), [0])
+        self.assertEqual(list(np.flatnonzero(table.on_shelf("b.jpg"))), [2, 4])
+
+    def test_sort_and_top_n(self):
+        """Test sorting with unknown values last, and partial top-N selection."""
+        table = self.table
+        self.assertEqual(list(table.order(sort="score")), [2, 1, 0, 3, 4])
+        self.assertEqual(list(table.order(sort="rank")), [1, 0, 2, 3, 4])
+        self.assertEqual(list(table.order(sort="rank", descending=True)), [0, 1, 2, 3, 4])
+        self.assertEqual(list(table.order(sort="score", limit=2)), [2, 1])
+        self.assertEqual(list(table.order(table.between("score", 7), sort="weight", limit=1)), [1])
+        self.assertEqual([g["title"] for g in table.rows(table.order(limit=2))], ["Catan", "Azul"])
+
+    def test_main_prints_json(self):
+        """Test that matching records are printed as JSON objects."""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "boardgames.json")
+            with open(path, "w") as f:
+                json.dump([game("Catan", 7.1, 2.3, 549), game("Azul", 7.7, 1.8, 80)], f)
+            out = io.StringIO()
+            with redirect_stdout(out), redirect_stderr(io.StringIO()):
+                main([path, "--sort", "score", "--limit", "1", "--json"])
+        self.assertEqual(json.loads(out.getvalue()), [game("Azul", 7.7, 1.8, 80)])
+
+    def test_format_game_with_missing_values(self):
+        """Test that unknown ranges print as "?" and a non-numeric rank as stored."""
+        self.assertIn("Not Ranked", format_game(self.table, 2))
+        line = format_game(self.table, 4)
+        self.assertIn("?p", line)
+        self.assertIn("?m", line)
+        self.assertTrue(format_game(self.table, 0).lstrip().startswith("549"))
+
+    def test_negative_limit_is_rejected(self):
+        """Test that --limit must not be negative."""
+        with redirect_stderr(io.StringIO()), self.assertRaises(SystemExit):
+            parse_args(["boardgames.json", "--limit", "-1"])
+        self.assertEqual(parse_args(["boardgames.json", "--limit", "0"]).limit, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,117 @@
+import unittest
+from unittest.mock import patch
+
+from rate_limiter import AdaptiveTokenBucket, TokenBucket, backoff_delay
+
+
+class TestTokenBucket(unittest.TestCase):
+    def test_rejects_non_positive_rate(self):
+        """Test that a zero rate is refused."""
+        with self.assertRaises(ValueError):
+            TokenBucket(0)
+
+    @patch("rate_limiter.time.sleep")
+    def test_acquire_within_capacity_does_not_sleep(self, mock_sleep):
+        """Test that a full bucket hands out tokens immediately."""
+        bucket = TokenBucket(rate=1, capacity=3)
+        for _ in range(3):
+            bucket.acquire()
+        mock_sleep.assert_not_called()
+
+    @patch("rate_limiter.time.sleep")
+    @patch("rate_limiter.time.monotonic")
+    def test_acquire_waits_when_empty(self, mock_monotonic, mock_sleep):
+        """Test that an empty bucket sleeps until the next token is due."""
+        clock = [100.0]
+        mock_monotonic.side_effect = lambda: clock[0]
+
+        def advance(seconds):
+            clock[0] += seconds
+
+        mock_sleep.side_effect = advance
+
+        bucket = TokenBucket(rate=2, capacity=1)
+        bucket.acquire()
+        bucket.acquire()
+        mock_sleep.assert_called_once_with(0.5)
+
+
+class TestAdaptiveTokenBucket(unittest.TestCase):
+    def test_rejects_rate_outside_bounds(self):
+        """Test that the initial rate must lie within the bounds."""
+        with self.assertRaises(ValueError):
+            AdaptiveTokenBucket(10, max_rate=5)
+        with self.assertRaises(ValueError):
+            AdaptiveTokenBucket(0.05, min_rate=0.1)
+
+    def test_default_min_rate_allows_slow_start(self):
+        """Test that a rate below the default minimum becomes the minimum."""
+        bucket = AdaptiveTokenBucket(0.05)
+        self.assertEqual(bucket.min_rate, 0.05)
+        self.assertEqual(AdaptiveTokenBucket(2.0).min_rate, 0.1)
+
+    def test_success_increases_rate_up_to_max(self):
+        """Test that successes raise the rate additively, capped at max_rate."""
+        bucket = AdaptiveTokenBucket(1.0, max_rate=1.2, increase=0.1)
+        bucket.on_success()
+        self.assertAlmostEqual(bucket.rate, 1.1)
+        bucket.on_success()
+        bucket.on_success()
+        self.assertAlmostEqual(bucket.rate, 1.2)
+
+    @patch("rate_limiter.time.monotonic")
+    def test_throttle_decreases_rate_once_per_cooldown(self, mock_monotonic):
+        """Test that throttles halve the rate, at most once per cooldown, down to min_rate."""
+        clock = [100.0]
+        mock_monotonic.side_effect = lambda: clock[0]
+        bucket = AdaptiveTokenBucket(2.0, min_rate=0.4, cooldown=5.0)
+
+        bucket.on_throttle()
+        bucket.on_throttle()
+        self.assertAlmostEqual(bucket.rate, 1.0)
+
+        for _ in range(3):
+            clock[0] += 5.0
+            bucket.on_throttle()
+        self.assertAlmostEqual(bucket.rate, 0.4)
+
+    @patch("rate_limiter.time.sleep")
+    @patch("rate_limiter.time.monotonic")
+    def test_throttle_drains_the_bucket(self, mock_monotonic, mock_sleep):
+        """Test that the request after a throttle waits for a fresh token."""
+        clock = [100.0]
+        mock_monotonic.side_effect = lambda: clock[0]
+
+        def advance(seconds):
+            clock[0] += seconds
+
+        mock_sleep.side_effect = advance
+
+        bucket = AdaptiveTokenBucket(2.0)
+        bucket.on_throttle()
+        bucket.acquire()
+        mock_sleep.assert_called_once_with(1.0)
+
+
+class TestBackoffDelay(unittest.TestCase):
+    def test_delay_is_bounded_by_exponential_cap(self):
+        """Test that jittered delays never exceed base * 2 ** attempt."""
+        for attempt in range(5):
+            for _ in range(20):
+                self.assertLessEqual(backoff_delay(attempt, base=1.0), 2**attempt)
+
+    def test_delay_respects_cap(self):
+        """Test that the delay never exceeds the cap."""
+        self.assertLessEqual(backoff_delay(20, base=1.0, cap=5.0), 5.0)
+
+    def test_retry_after_is_a_lower_bound(self):
+        """Test that a Retry-After header is honoured."""
+        self.assertGreaterEqual(backoff_delay(0, retry_after="7"), 7.0)
+
+    def test_invalid_retry_after_is_ignored(self):
+        """Test that a non-numeric Retry-After header is ignored."""
+        self.assertLessEqual(backoff_delay(0, base=1.0, retry_after="soon"), 1.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,84 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from response_cache import ResponseCache
+
+SEARCH_URL = "https://boardgamegeek.com/xmlapi2/search"
+THING_URL = "https://boardgamegeek.com/xmlapi2/thing"
+
+
+class TestResponseCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.cache = ResponseCache(self.tmp_dir.name)
+
+    def tearDown(self):
+        self.cache.close()
+        self.tmp_dir.cleanup()
+
+    def test_round_trip_and_counters(self):
+        """Test storing a response and reading it back."""
+        self.assertIsNone(self.cache.get(SEARCH_URL, {"query": "Catan"}))
+        self.cache.set(SEARCH_URL, {"query": "Catan", "type": "boardgame"}, b"<items/>")
+        self.assertEqual(self.cache.get(SEARCH_URL, {"type": "boardgame", "query": "Catan"}), b"<items/>")
+        stats = self.cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["entries"]), (1, 1, 1))
+
+    def test_entries_persist_across_instances(self):
+        """Test that a new cache on the same directory sees old entries."""
+        self.cache.set(THING_URL, {"id": "1"}, b"<items/>")
+        other = ResponseCache(self.tmp_dir.name)
+        try:
+            self.assertEqual(other.get(THING_URL, {"id": "1"}), b"<items/>")
+        finally:
+            other.close()
+
+    @patch("response_cache.time.time")
+    def test_expired_entries_are_misses_unless_stale_allowed(self, mock_time):
+        """Test that the per-endpoint TTL is honoured."""
+        mock_time.return_value = 1000.0
+        cache = ResponseCache(self.tmp_dir.name, ttls={"thing": 60})
+        try:
+            cache.set(THING_URL, {"id": "1"}, b"<items/>")
+            mock_time.return_value = 1061.0
+            self.assertIsNone(cache.get(THING_URL, {"id": "1"}))
+            self.assertEqual(cache.get(THING_URL, {"id": "1"}, allow_stale=True), b"<items/>")
+        finally:
+            cache.close()
+
+    def test_zero_ttl_endpoints_are_not_stored(self):
+        """Test that endpoints with a zero TTL bypass the cache."""
+        cache = ResponseCache(self.tmp_dir.name, ttls={"thing": 0})
+        try:
+            cache.set(THING_URL, {"id": "1"}, b"<items/>")
+            self.assertEqual(cache.stats()["entries"], 0)
+        finally:
+            cache.close()
+
+    @patch("response_cache.time.time")
+    def test_least_recently_used_entries_are_evicted(self, mock_time):
+        """Test that the cache stays under its size budget by LRU eviction."""
+        mock_time.return_value = 1000.0
+        body = os.urandom(1000)
+        cache = ResponseCache(self.tmp_dir.name, max_bytes=2500)
+        try:
+            for i in range(2):
+                mock_time.return_value += 1
+                cache.set(THING_URL, {"id": str(i)}, body)
+            mock_time.return_value += 1
+            cache.get(THING_URL, {"id": "0"})
+            mock_time.return_value += 1
+            cache.set(THING_URL, {"id": "2"}, body)
+
+            self.assertIsNotNone(cache.get(THING_URL, {"id": "0"}))
+            self.assertIsNone(cache.get(THING_URL, {"id": "1"}))
+            self.assertIsNotNone(cache.get(THING_URL, {"id": "2"}))
+            self.assertLessEqual(cache.stats()["bytes"], 2500)
+        finally:
+            cache.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+import json
+import os
+import tempfile
+import unittest
+
+from PIL import Image
+
+from shelf_images import MANIFEST_FILENAME, box_pixels, build_shelf_images, pyramid_levels
+
+
+class TestShelfImages(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.image_root = os.path.join(self.tmp_dir.name, "public")
+        self.out_dir = os.path.join(self.image_root, "images")
+        os.makedirs(self.image_root)
+        Image.new("RGB", (600, 400), "red").save(os.path.join(self.image_root, "shelf.jpg"))
+        self.data = [
+            {"title": "Game 1", "filename": "shelf.jpg", "box_2d": [0, 0, 512, 512]},
+            {"title": "Game 2", "filename": "shelf.jpg", "box_2d": [512, 512, 1024, 1024]},
+            {"title": "Lost", "filename": "missing.jpg", "box_2d": [0, 0, 10, 10]},
+        ]
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_pyramid_levels(self):
+        """Test that each level halves the previous one until it fits a tile."""
+        self.assertEqual(pyramid_levels(600, 400, tile_size=256), [(600, 400), (300, 200), (150, 100)])
+        self.assertEqual(pyramid_levels(100, 100, tile_size=256), [(100, 100)])
+
+    def test_box_pixels(self):
+        """Test that boxes on the 1024 grid map to clamped pixel boxes."""
+        self.assertEqual(box_pixels([0, 0, 512, 512], 600, 400), (0, 0, 300, 200))
+        self.assertEqual(box_pixels([900, 900, 1100, 1100], 600, 400), (527, 352, 600, 400))
+
+    def test_build_writes_renditions_and_manifest(self):
+        """Test that tiles, thumbnails and box crops are listed in the manifest."""
+        manifest, built = build_shelf_images(self.data, self.image_root, self.out_dir, workers=1)
+
+        self.assertEqual(built, 1)
+        (entry,) = manifest["images"]
+        self.assertEqual(entry["filename"], "shelf.jpg")
+        self.assertEqual((entry["width"], entry["height"]), (600, 400))
+        self.assertEqual([(level["columns"], level["rows"]) for level in entry["levels"]], [(3, 2), (2, 1), (1, 1)])
+        self.assertTrue(os.path.exists(os.path.join(
+            self.out_dir, entry["tiles"].format(level=0, column=2, row=1)
+        )))
+        self.assertEqual([thumbnail["width"] for thumbnail in entry["thumbnails"]], [320, 600])
+        self.assertEqual([box["title"] for box in entry["boxes"]], ["Game 1", "Game 2"])
+        with Image.open(os.path.join(self.out_dir, entry["boxes"][0]["path"])) as crop:
+            self.assertEqual(crop.size, (300, 200))
+        with open(os.path.join(self.out_dir, MANIFEST_FILENAME)) as f:
+            self.assertEqual(json.load(f), manifest)
+
+    def test_build_is_incremental(self):
+        """Test that unchanged photos are skipped and stale builds removed."""
+        first, _ = build_shelf_images(self.data, self.image_root, self.out_dir, workers=1)
+        again, built = build_shelf_images(self.data, self.image_root, self.out_dir, workers=1)
+        self.assertEqual(built, 0)
+        self.assertEqual(again, first)
+
+        self.data[0]["box_2d"] = [0, 0, 256, 256]
+        changed, built = build_shelf_images(self.data, self.image_root, self.out_dir, workers=1)
+        self.assertEqual(built, 1)
+        self.assertNotEqual(changed["images"][0]["dir"], first["images"][0]["dir"])
+        self.assertEqual(sorted(os.listdir(self.out_dir)), sorted([MANIFEST_FILENAME, changed["images"][0]["dir"]]))
+
+    def test_build_only_removes_its_own_directories(self):
+        """Test that directories the tool did not create survive, even with an empty manifest."""
+        os.makedirs(os.path.join(self.out_dir, "index"))
+        os.makedirs(os.path.join(self.out_dir, "shelf-0123456789ab.partial"))
+        build_shelf_images(self.data, self.image_root, self.out_dir, workers=1)
+
+        build_shelf_images([], self.image_root, self.out_dir, workers=1)
+
+        self.assertEqual(sorted(os.listdir(self.out_dir)), ["index", MANIFEST_FILENAME])
+
+
+if __name__ == "__main__":
+    unittest.main()
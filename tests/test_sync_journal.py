@@ -0,0 +1,70 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from sync_journal import ADDED, ERROR, SKIPPED, SyncJournal, read_sync_outcomes
+
+GAME = {"title": "CATAN", "url": "https://boardgamegeek.com/boardgame/13", "filename": "a.jpg", "box_2d": [1, 2, 3, 4]}
+
+
+class TestSyncJournal(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, "sync.jsonl")
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_latest_outcome_wins(self):
+        """Test that a later entry for the same game replaces the earlier one."""
+        journal = SyncJournal(self.path)
+        journal.record(GAME, ERROR, "Timed out")
+        journal.record({"title": "No URL", "filename": "a.jpg", "box_2d": [5, 6, 7, 8]}, SKIPPED, "No URL found.")
+        journal.record(GAME, ADDED)
+        journal.close()
+
+        outcomes = read_sync_outcomes(self.path)
+        self.assertEqual(len(outcomes), 2)
+        entry = next(entry for entry in outcomes.values() if entry["title"] == "CATAN")
+        self.assertEqual((entry["status"], entry["reason"], entry["game_id"]), (ADDED, None, "13"))
+
+    def test_journal_is_append_only(self):
+        """Test that reopening a journal keeps earlier entries."""
+        journal = SyncJournal(self.path)
+        journal.record(GAME, ERROR, "Timed out")
+        journal.close()
+        journal = SyncJournal(self.path)
+        journal.close()
+        self.assertEqual(list(read_sync_outcomes(self.path).values())[0]["status"], ERROR)
+
+    @patch("sync_journal.os.fsync")
+    def test_fsyncs_in_batches(self, mock_fsync):
+        """Test that entries are fsynced every `fsync_every` records and on close."""
+        journal = SyncJournal(self.path, fsync_every=3)
+        for _ in range(7):
+            journal.record(GAME, ADDED)
+        self.assertEqual(mock_fsync.call_count, 2)
+        journal.close()
+        self.assertEqual(mock_fsync.call_count, 3)
+
+    def test_missing_journal_and_truncated_lines(self):
+        """Test reading a journal that does not exist or was cut short by a crash."""
+        self.assertEqual(read_sync_outcomes(self.path), {})
+        journal = SyncJournal(self.path)
+        journal.record(GAME, ADDED)
+        journal.close()
+        with open(self.path, "a") as f:
+            f.write('{"key": "trunc')
+        self.assertEqual(len(read_sync_outcomes(self.path)), 1)
+
+        journal = SyncJournal(self.path)
+        journal.record({"title": "Other"}, SKIPPED)
+        journal.close()
+        outcomes = read_sync_outcomes(self.path)
+        self.assertEqual(len(outcomes), 2)
+        self.assertIn(SKIPPED, [entry["status"] for entry in outcomes.values()])
+
+
+if __name__ == "__main__":
+    unittest.main()
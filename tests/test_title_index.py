@@ -0,0 +1,71 @@
+import os
+import tempfile
+import unittest
+
+from title_index import TitleIndex, normalize_title
+
+
+class TestNormalizeTitle(unittest.TestCase):
+    def test_normalize_title(self):
+        """Test that cosmetic differences between titles are ignored."""
+        self.assertEqual(normalize_title("The Settlers of Catan"), "settlers of catan")
+        self.assertEqual(normalize_title("  Carcassonne:   Hunters & Gatherers "), "carcassonne hunters gatherers")
+        self.assertEqual(normalize_title("Café International"), "cafe international")
+        self.assertEqual(normalize_title(None), "")
+
+
+class TestTitleIndex(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, "title_index.json")
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_exact_and_alias_lookup(self):
+        """Test looking up titles and aliases."""
+        index = TitleIndex()
+        index.add("CATAN", 13, aliases=["The Settlers of Catan"])
+        self.assertEqual(index.lookup("Catan"), "13")
+        self.assertEqual(index.lookup("settlers of catan!"), "13")
+        self.assertIsNone(index.lookup("Carcassonne"))
+        self.assertIsNone(index.lookup(""))
+
+    def test_fuzzy_lookup(self):
+        """Test that fuzzy matching is opt-in and never matches titles with other numbers."""
+        index = TitleIndex(fuzzy_cutoff=0.95)
+        index.add("Ticket to Ride", "9209")
+        index.add("Pandemic Legacy: Season 1", "161936")
+        self.assertIsNone(index.lookup("Tickett to Ride"))
+        self.assertEqual(index.fuzzy_lookup("Tickett to Ride"), "9209")
+        self.assertIsNone(index.fuzzy_lookup("Ticket to Ride Europe"))
+        self.assertIsNone(index.fuzzy_lookup("Pandemic Legacy: Season 2"))
+        self.assertIsNone(index.fuzzy_lookup("Pandemic Legacy: Season 0"))
+        self.assertEqual(index.fuzzy_lookup("Pandemic Legacy - Season 1!"), "161936")
+        self.assertIsNone(TitleIndex().fuzzy_lookup("Tickett to Ride"))
+
+    def test_seed_from_records(self):
+        """Test seeding the index from previously enriched records."""
+        index = TitleIndex()
+        count = index.seed_from_records([
+            {"title": "Doomlings", "url": "https://boardgamegeek.com/boardgame/324413"},
+            {"title": "Munchkin Cthulhu", "bgg_id": "25071", "url": "https://boardgamegeek.com/boardgame/25071"},
+            {"title": "Unknown", "url": None},
+            {"title": None, "url": "https://boardgamegeek.com/boardgame/1"},
+        ])
+        self.assertEqual(count, 2)
+        self.assertEqual(index.lookup("doomlings"), "324413")
+        self.assertEqual(index.lookup("Munchkin Cthulhu"), "25071")
+
+    def test_save_and_load(self):
+        """Test that the index persists between instances."""
+        index = TitleIndex(self.path)
+        index.add("Doomlings", "324413")
+        index.save()
+        reloaded = TitleIndex(self.path)
+        self.assertEqual(len(reloaded), 1)
+        self.assertEqual(reloaded.lookup("Doomlings"), "324413")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,11 +1,25 @@
 import json
+import os
+import tempfile
 import unittest
-from unittest.mock import patch, mock_open, MagicMock
+from datetime import datetime, timedelta, timezone
+from unittest.mock import ANY, patch, mock_open, MagicMock
+
+from file_utils import record_key
+from game_record import GameRecord, records_from_data, records_to_data
+from rate_limiter import AdaptiveTokenBucket
 
 from update_boardgames import (
+    Checkpointer,
     read_boardgames_data,
+    read_checkpoint_progress,
+    refresh_stale_boardgames_data,
+    refresh_stats_boardgames_data,
     write_boardgames_data,
     update_boardgames_data,
+    update_boardgames_data_batched,
+    update_boardgames_data_concurrent,
+    update_boardgames_jsonl,
 )
 
 
@@ -15,7 +29,7 @@ class TestUpdateBoardgames(unittest.TestCase):
         mock_data = json.dumps([{"title": "Game 1"}])
         with patch("builtins.open", mock_open(read_data=mock_data)) as mock_file:
             data = read_boardgames_data("dummy_path.json")
-            self.assertEqual(data, [{"title": "Game 1"}])
+            self.assertEqual(data, [GameRecord(title="Game 1")])
             mock_file.assert_called_once_with("dummy_path.json", "r")
 
     def test_read_boardgames_data_file_not_found(self):
@@ -32,25 +46,41 @@ class TestUpdateBoardgames(unittest.TestCase):
             self.assertIsNone(data)
             mock_file.assert_called_once_with("invalid.json", "r")
 
-    def test_write_boardgames_data_success(self):
-        """Test writing data to a file."""
+    @patch("file_utils.os.fsync")
+    @patch("file_utils.os.replace")
+    def test_write_boardgames_data_success(self, mock_replace, mock_fsync):
+        """Test writing data to a temporary file and renaming it into place."""
         mock_data = [{"title": "Game 1"}]
         m = mock_open()
         with patch("builtins.open", m):
             result = write_boardgames_data("dummy_path.json", mock_data)
             self.assertTrue(result)
-            m.assert_called_once_with("dummy_path.json", "w")
+            m.assert_called_once_with("dummy_path.json.tmp", "w")
             handle = m()
             written_data = "".join(call.args[0] for call in handle.write.call_args_list)
             self.assertEqual(written_data, json.dumps(mock_data, indent=4))
+            mock_fsync.assert_called_once()
+            mock_replace.assert_called_once_with("dummy_path.json.tmp", "dummy_path.json")
+
+    def test_write_boardgames_data_removes_temp_file_on_failure(self):
+        """Test that a failed write leaves neither a temporary file nor a changed file behind."""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            json_path = os.path.join(tmp_dir, "boardgames.json")
+            write_boardgames_data(json_path, [{"title": "Game 1"}])
+            with self.assertRaises(TypeError):
+                write_boardgames_data(json_path, [{"title": "Game 2"}, {"title": object()}])
+            self.assertEqual(os.listdir(tmp_dir), ["boardgames.json"])
+            self.assertEqual(records_to_data(read_boardgames_data(json_path)), [{"title": "Game 1"}])
 
-    def test_write_boardgames_data_io_error(self):
+    @patch("file_utils.os.replace")
+    def test_write_boardgames_data_io_error(self, mock_replace):
         """Test handling an IOError during writing."""
         mock_data = [{"title": "Game 1"}]
         with patch("builtins.open", side_effect=IOError) as mock_file:
             result = write_boardgames_data("dummy_path.json", mock_data)
             self.assertFalse(result)
-            mock_file.assert_called_once_with("dummy_path.json", "w")
+            mock_file.assert_called_once_with("dummy_path.json.tmp", "w")
+            mock_replace.assert_not_called()
 
     @patch("bgg_api.BggApi.get_bgg_game_details")
     def test_update_boardgames_data_success(self, mock_get_details):
@@ -65,19 +95,20 @@ class TestUpdateBoardgames(unittest.TestCase):
             "max_playtime": 120,
             "weight": 3.5,
         }
-        boardgames_data = [{"title": "Game 1"}]
+        boardgames_data = records_from_data([{"title": "Game 1"}])
         bgg_api = MagicMock()
         bgg_api.get_bgg_game_details.return_value = mock_get_details.return_value
         updated_count, updated_data = update_boardgames_data(boardgames_data, bgg_api)
         self.assertEqual(updated_count, 1)
         self.assertEqual(len(updated_data), 1)
         self.assertEqual(updated_data[0]["rank"], 1)
+        self.assertIn("fetched_at", updated_data[0])
         bgg_api.get_bgg_game_details.assert_called_once_with("Game 1")
 
     @patch("bgg_api.BggApi.get_bgg_game_details")
     def test_update_boardgames_data_no_update_needed(self, mock_get_details):
         """Test that no update is performed if data is present."""
-        boardgames_data = [
+        boardgames_data = records_from_data([
             {
                 "title": "Game 1",
                 "url": "http://bgg.com/1",
@@ -89,7 +120,7 @@ class TestUpdateBoardgames(unittest.TestCase):
                 "max_playtime": 120,
                 "weight": 3.5,
             }
-        ]
+        ])
         bgg_api = MagicMock()
         updated_count, updated_data = update_boardgames_data(boardgames_data, bgg_api)
         self.assertEqual(updated_count, 0)
@@ -100,7 +131,7 @@ class TestUpdateBoardgames(unittest.TestCase):
     def test_update_boardgames_data_api_failure(self, mock_get_details):
         """Test handling of BGG API failure."""
         mock_get_details.return_value = None
-        boardgames_data = [{"title": "Game 1"}]
+        boardgames_data = records_from_data([{"title": "Game 1"}])
         bgg_api = MagicMock()
         bgg_api.get_bgg_game_details.return_value = None
         updated_count, updated_data = update_boardgames_data(boardgames_data, bgg_api)
@@ -109,6 +140,275 @@ class TestUpdateBoardgames(unittest.TestCase):
         self.assertEqual(updated_data[0]["rank"], "Not Found")
         self.assertEqual(bgg_api.get_bgg_game_details.call_count, 3)
 
+    def test_update_boardgames_data_concurrent_success(self):
+        """Test that the concurrent updater enriches every pending game."""
+        details = {
+            "url": "http://bgg.com/1",
+            "rank": 1,
+            "score": 8.5,
+            "min_players": 1,
+            "max_players": 4,
+            "min_playtime": 60,
+            "max_playtime": 120,
+            "weight": 3.5,
+        }
+        boardgames_data = records_from_data([{"title": "Game 1"}, {"title": "Game 2"}, {"title": None}])
+        bgg_api = MagicMock()
+        bgg_api.get_bgg_game_details.return_value = details
+        updated_count, updated_data = update_boardgames_data_concurrent(boardgames_data, bgg_api, max_workers=2)
+        self.assertEqual(updated_count, 2)
+        self.assertEqual(updated_data[0]["rank"], 1)
+        self.assertEqual(updated_data[1]["rank"], 1)
+        self.assertNotIn("rank", updated_data[2])
+        self.assertEqual(bgg_api.get_bgg_game_details.call_count, 2)
+
+    @patch("update_boardgames.time.sleep")
+    def test_update_boardgames_data_concurrent_api_failure(self, mock_sleep):
+        """Test that the concurrent updater backs off and marks misses."""
+        boardgames_data = records_from_data([{"title": "Game 1"}])
+        bgg_api = MagicMock()
+        bgg_api.get_bgg_game_details.return_value = None
+        updated_count, updated_data = update_boardgames_data_concurrent(boardgames_data, bgg_api)
+        self.assertEqual(updated_count, 0)
+        self.assertEqual(updated_data[0]["rank"], "Not Found")
+        self.assertEqual(bgg_api.get_bgg_game_details.call_count, 3)
+        self.assertEqual(mock_sleep.call_count, 2)
+
+    def test_update_boardgames_data_batched(self):
+        """Test that the batched updater looks titles up in groups."""
+        details = {
+            "url": "http://bgg.com/1",
+            "rank": 1,
+            "score": 8.5,
+            "min_players": 1,
+            "max_players": 4,
+            "min_playtime": 60,
+            "max_playtime": 120,
+            "weight": 3.5,
+        }
+        boardgames_data = records_from_data([{"title": "Game 1"}, {"title": "Game 2"}, {"title": "Game 3"}])
+        bgg_api = MagicMock()
+        bgg_api.get_bgg_game_details_many.side_effect = lambda titles, failed: {
+            title: details if title != "Game 3" else None for title in titles
+        }
+        updated_count, updated_data = update_boardgames_data_batched(boardgames_data, bgg_api, batch_size=2)
+        self.assertEqual(updated_count, 2)
+        self.assertEqual(updated_data[0]["rank"], 1)
+        self.assertEqual(updated_data[2]["rank"], "Not Found")
+        self.assertEqual(
+            [call.args[0] for call in bgg_api.get_bgg_game_details_many.call_args_list],
+            [["Game 1", "Game 2"], ["Game 3"]],
+        )
+
+    @patch("update_boardgames.time.sleep")
+    def test_update_boardgames_data_batched_retries_failed_requests(self, mock_sleep):
+        """Test that titles whose requests failed are retried, and never marked not found."""
+        details = {
+            "url": "http://bgg.com/boardgame/1", "rank": 1, "score": 8.5, "min_players": 1,
+            "max_players": 4, "min_playtime": 60, "max_playtime": 120, "weight": 3.5,
+        }
+        boardgames_data = records_from_data([{"title": "Flaky"}, {"title": "Down"}])
+        attempts = []
+
+        def lookup(titles, failed):
+            attempts.append(list(titles))
+            failed.update(title for title in titles if title == "Down" or len(attempts) == 1)
+            return {title: details if title not in failed else None for title in titles}
+
+        bgg_api = MagicMock()
+        bgg_api.get_bgg_game_details_many.side_effect = lookup
+        updated_count, updated_data = update_boardgames_data_batched(boardgames_data, bgg_api)
+
+        self.assertEqual(updated_count, 1)
+        self.assertEqual(attempts, [["Flaky", "Down"], ["Flaky", "Down"], ["Down"]])
+        self.assertEqual(updated_data[0]["rank"], 1)
+        self.assertEqual(updated_data[1].to_dict(), {"title": "Down"})
+        self.assertEqual(mock_sleep.call_count, 2)
+
+    def test_update_and_write_game_records(self):
+        """Test that records are updated and written like dicts."""
+        details = {
+            "url": "http://bgg.com/boardgame/1", "rank": 1, "score": 8.5, "min_players": 1,
+            "max_players": 4, "min_playtime": 60, "max_playtime": 120, "weight": 3.5,
+        }
+        boardgames_data = [GameRecord(title="Game 1", filename="a.jpg"), GameRecord(title="Game 2")]
+        bgg_api = MagicMock()
+        bgg_api.get_bgg_game_details_many.return_value = {"Game 1": details, "Game 2": None}
+        updated_count, updated_data = update_boardgames_data_batched(boardgames_data, bgg_api)
+        self.assertEqual(updated_count, 1)
+        self.assertEqual(updated_data[0].bgg_id, "1")
+        self.assertEqual(updated_data[1].rank, "Not Found")
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "boardgames.json")
+            self.assertTrue(write_boardgames_data(path, updated_data))
+            with open(path) as f:
+                written = json.load(f)
+        self.assertEqual(written[0]["filename"], "a.jpg")
+        self.assertEqual(written[0]["weight"], 3.5)
+        self.assertEqual(written[1]["url"], None)
+
+    def test_refresh_stale_boardgames_data(self):
+        """Test that only stale games are refreshed, by id and without searching."""
+        now = datetime.now(timezone.utc)
+        boardgames_data = records_from_data([
+            {"title": "Fresh", "url": "https://boardgamegeek.com/boardgame/1", "bgg_id": "1",
+             "fetched_at": now.isoformat(), "rank": 10},
+            {"title": "Stale", "url": "https://boardgamegeek.com/boardgame/2", "bgg_id": "2",
+             "fetched_at": (now - timedelta(days=30)).isoformat(), "rank": 20},
+            {"title": "Legacy", "url": "https://boardgamegeek.com/boardgame/3", "rank": 30},
+            {"title": "Not Found", "url": None, "rank": "Not Found"},
+        ])
+        bgg_api = MagicMock()
+        stats = {"score": 7.0, "min_players": 2, "max_players": 4, "min_playtime": 30, "max_playtime": 60, "weight": 2.0}
+        bgg_api.get_bgg_game_details_by_ids.return_value = {
+            "2": {"url": "https://boardgamegeek.com/boardgame/2", "rank": 5, **stats},
+            "3": {"url": "https://boardgamegeek.com/boardgame/3", "rank": 6, **stats},
+        }
+
+        updated_count, updated_data = refresh_stale_boardgames_data(boardgames_data, bgg_api, timedelta(days=7))
+
+        self.assertEqual(updated_count, 2)
+        bgg_api.get_bgg_game_details_by_ids.assert_called_once_with(["2", "3"])
+        bgg_api.search_game.assert_not_called()
+        self.assertEqual([game["rank"] for game in updated_data], [10, 5, 6, "Not Found"])
+        self.assertEqual(updated_data[2]["bgg_id"], "3")
+        self.assertGreater(datetime.fromisoformat(updated_data[1]["fetched_at"]), now - timedelta(minutes=1))
+
+    def test_refresh_stats_boardgames_data(self):
+        """Test that only the stats of games with a BGG id are updated, by id, and marked as fetched."""
+        boardgames_data = [
+            GameRecord(title="Catan", url="https://boardgamegeek.com/boardgame/13", bgg_id="13",
+                       rank=500, score=7.0, weight=2.3, min_players=3, fetched_at="2024-01-01T00:00:00+00:00"),
+            *records_from_data([
+                {"title": "Legacy", "url": "https://boardgamegeek.com/boardgame/3", "rank": 30, "score": 6.0, "weight": 1.0},
+                {"title": "Unchanged", "url": "https://boardgamegeek.com/boardgame/4", "rank": 40, "score": 5.0, "weight": 1.5},
+                {"title": "Not Found", "url": None, "rank": "Not Found"},
+            ]),
+        ]
+        bgg_api = MagicMock()
+        bgg_api.get_bgg_game_details_by_ids.return_value = {
+            "13": {"url": "https://boardgamegeek.com/boardgame/13", "rank": 450, "score": 7.1, "weight": 2.3, "min_players": 4},
+            "3": {"url": "https://boardgamegeek.com/boardgame/3", "rank": "Not Ranked", "score": 6.2, "weight": 1.1},
+            "4": {"url": "https://boardgamegeek.com/boardgame/4", "rank": 40, "score": 5.0, "weight": 1.5},
+        }
+        checkpointer = MagicMock()
+
+        updated_count, updated_data = refresh_stats_boardgames_data(boardgames_data, bgg_api, checkpointer=checkpointer)
+
+        self.assertEqual(updated_count, 2)
+        bgg_api.get_bgg_game_details_by_ids.assert_called_once_with(["13", "3", "4"])
+        bgg_api.search_game.assert_not_called()
+        self.assertEqual([game["rank"] for game in updated_data], [450, "Not Ranked", 40, "Not Found"])
+        self.assertEqual(updated_data[0].score, 7.1)
+        self.assertEqual(updated_data[0].min_players, 3)
+        self.assertNotEqual(updated_data[0].fetched_at, "2024-01-01T00:00:00+00:00")
+        self.assertEqual(updated_data[2].bgg_id, "4")
+        self.assertIn("fetched_at", updated_data[2])
+        self.assertNotIn("fetched_at", updated_data[3])
+        self.assertEqual(checkpointer.record.call_count, 3)
+
+    def test_checkpointer_writes_data_and_progress(self):
+        """Test that checkpoints save the data and the processed games."""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            json_path = os.path.join(tmp_dir, "boardgames.json")
+            boardgames_data = records_from_data([{"title": "Game 1"}, {"title": "Game 2"}, {"title": "Game 3"}])
+            checkpointer = Checkpointer(json_path, boardgames_data, every=2, interval=3600)
+
+            boardgames_data[0].apply_details({
+                "url": "https://boardgamegeek.com/boardgame/1", "rank": 1, "score": 8.5, "min_players": 1,
+                "max_players": 4, "min_playtime": 60, "max_playtime": 120, "weight": 3.5,
+            })
+            checkpointer.record(boardgames_data[0])
+            self.assertFalse(os.path.exists(json_path))
+
+            boardgames_data[2].mark_not_found()
+            checkpointer.record(boardgames_data[2])
+            self.assertEqual(read_boardgames_data(json_path)[0]["rank"], 1)
+            self.assertEqual(read_checkpoint_progress(json_path), {record_key(boardgames_data[2])})
+
+            checkpointer.finish()
+            self.assertEqual(read_checkpoint_progress(json_path), set())
+
+    @patch("update_boardgames.time.sleep")
+    @patch("update_boardgames.BggApi")
+    def test_main_resumes_from_checkpoint(self, mock_bgg_api, mock_sleep):
+        """Test that a resumed run skips games processed before the checkpoint."""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            json_path = os.path.join(tmp_dir, "boardgames.json")
+            # The file was edited since the checkpoint: the not-found game moved.
+            boardgames_data = [{"title": "Game 2"}, {"title": "Game 1", "rank": "Not Found", "url": None}]
+            with open(json_path, "w") as f:
+                json.dump(boardgames_data, f)
+            with open(json_path + ".progress", "w") as f:
+                json.dump({"processed": [record_key(boardgames_data[1])]}, f)
+            mock_bgg_api.return_value.get_bgg_game_details.return_value = {
+                "url": "https://boardgamegeek.com/boardgame/2",
+                "rank": 2,
+                "score": 7.5,
+                "min_players": 2,
+                "max_players": 4,
+                "min_playtime": 30,
+                "max_playtime": 60,
+                "weight": 2.5,
+            }
+
+            from update_boardgames import main, parse_args
+
+            main(parse_args([json_path, "--resume"]))
+
+            mock_bgg_api.return_value.get_bgg_game_details.assert_called_once_with("Game 2")
+            data = read_boardgames_data(json_path)
+            self.assertEqual([game["rank"] for game in data], [2, "Not Found"])
+            self.assertFalse(os.path.exists(json_path + ".progress"))
+
+    @patch("update_boardgames.BggApi")
+    def test_main_dedupes_before_updating(self, mock_bgg_api):
+        """Test that duplicate detections are merged before any lookups."""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            json_path = os.path.join(tmp_dir, "boardgames.json")
+            done = {"url": "https://boardgamegeek.com/boardgame/13", "rank": 1, "score": 7.0, "min_players": 3,
+                    "max_players": 4, "min_playtime": 60, "max_playtime": 120, "weight": 2.3}
+            boardgames_data = [
+                {"title": "Catan", "filename": "shelf.jpg", "box_2d": [100, 100, 200, 300], **done},
+                {"title": "Catan", "filename": "shelf.jpg", "box_2d": [101, 100, 200, 301]},
+            ]
+            with open(json_path, "w") as f:
+                json.dump(boardgames_data, f)
+
+            from update_boardgames import main, parse_args
+
+            main(parse_args([json_path, "--dedupe-iou", "0.8"]))
+
+            mock_bgg_api.return_value.get_bgg_game_details.assert_not_called()
+            self.assertEqual(records_to_data(read_boardgames_data(json_path)), boardgames_data[:1])
+
+    def test_update_boardgames_jsonl_appends_only_changed_records(self):
+        """Test that the JSON Lines pipeline appends just the updated records."""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            jsonl_path = os.path.join(tmp_dir, "boardgames.jsonl")
+            with open(jsonl_path, "w") as f:
+                for i in range(5):
+                    f.write(json.dumps({"title": f"Game {i}", "filename": "a.jpg", "box_2d": [i, 0, 0, 0]}) + "\n")
+
+            chunk_sizes = []
+
+            def update_chunk(chunk):
+                chunk_sizes.append(len(chunk))
+                for game in chunk:
+                    if game["title"] in ("Game 1", "Game 3"):
+                        game["rank"] = 1
+                return 1, chunk
+
+            updated_count = update_boardgames_jsonl(jsonl_path, update_chunk, chunk_size=2)
+
+            self.assertEqual(updated_count, 3)
+            self.assertEqual(chunk_sizes, [2, 2, 1])
+            with open(jsonl_path) as f:
+                self.assertEqual(len(f.readlines()), 7)
+            data = read_boardgames_data(jsonl_path)
+            self.assertEqual([game["title"] for game in data], [f"Game {i}" for i in range(5)])
+            self.assertEqual([game.get("rank") for game in data], [None, 1, None, 1, None])
 
     @patch("update_boardgames.write_boardgames_data")
     @patch("update_boardgames.update_boardgames_data")
@@ -118,17 +418,95 @@ class TestUpdateBoardgames(unittest.TestCase):
         self, mock_bgg_api, mock_read, mock_update, mock_write
     ):
         """Test the main function with successful execution."""
-        mock_read.return_value = [{"title": "Game 1"}]
+        mock_read.return_value = [GameRecord(title="Game 1")]
         mock_update.return_value = (1, [{"title": "Game 1", "rank": 1}])
         mock_write.return_value = True
 
-        from update_boardgames import main
+        from update_boardgames import main, parse_args
 
-        main("dummy_path.json")
+        main(parse_args(["dummy_path.json"]))
 
         mock_read.assert_called_once_with("dummy_path.json")
-        mock_update.assert_called_once_with([{"title": "Game 1"}], mock_bgg_api.return_value)
-        mock_write.assert_called_once_with("dummy_path.json", [{"title": "Game 1", "rank": 1}])
+        mock_update.assert_called_once_with([GameRecord(title="Game 1")], mock_bgg_api.return_value, checkpointer=ANY)
+        mock_write.assert_called_once_with("dummy_path.json", [{"title": "Game 1", "rank": 1}], metrics=ANY)
+
+    @patch("update_boardgames.write_boardgames_data")
+    @patch("update_boardgames.update_boardgames_data_concurrent")
+    @patch("update_boardgames.read_boardgames_data")
+    @patch("update_boardgames.BggApi")
+    def test_main_concurrent(self, mock_bgg_api, mock_read, mock_update, mock_write):
+        """Test that main uses the concurrent updater when asked for workers."""
+        mock_read.return_value = [GameRecord(title="Game 1")]
+        mock_update.return_value = (0, [{"title": "Game 1"}])
+
+        from update_boardgames import main, parse_args
+
+        main(parse_args(["dummy_path.json", "--workers", "4", "--rate", "2.0"]))
+
+        rate_limiter = mock_bgg_api.call_args.kwargs["rate_limiter"]
+        self.assertEqual(rate_limiter.rate, 2.0)
+        self.assertEqual(mock_bgg_api.call_args.kwargs["pool_size"], 4)
+        mock_update.assert_called_once_with(
+            [GameRecord(title="Game 1")], mock_bgg_api.return_value, max_workers=4, checkpointer=ANY
+        )
+        mock_write.assert_not_called()
+
+    @patch("update_boardgames.write_boardgames_data")
+    @patch("update_boardgames.update_boardgames_data_batched")
+    @patch("update_boardgames.read_boardgames_data")
+    @patch("update_boardgames.BggApi")
+    def test_main_batched_is_rate_limited(self, mock_bgg_api, mock_read, mock_update, mock_write):
+        """Test that batching without a rate still gets the default request budget."""
+        mock_read.return_value = [GameRecord(title="Game 1")]
+        mock_update.return_value = (0, [{"title": "Game 1"}])
+
+        from update_boardgames import DEFAULT_REQUESTS_PER_SECOND, main, parse_args
+
+        main(parse_args(["dummy_path.json", "--batch-size", "50"]))
+
+        self.assertEqual(mock_bgg_api.call_args.kwargs["rate_limiter"].rate, DEFAULT_REQUESTS_PER_SECOND)
+        mock_update.assert_called_once_with(
+            [GameRecord(title="Game 1")], mock_bgg_api.return_value, batch_size=50, checkpointer=ANY
+        )
+
+    @patch("update_boardgames.write_boardgames_data")
+    @patch("update_boardgames.update_boardgames_data_concurrent")
+    @patch("update_boardgames.read_boardgames_data")
+    @patch("update_boardgames.BggApi")
+    def test_main_adaptive(self, mock_bgg_api, mock_read, mock_update, mock_write):
+        """Test that main uses an adaptive limiter without fixed sleeps."""
+        mock_read.return_value = [GameRecord(title="Game 1")]
+        mock_update.return_value = (0, [{"title": "Game 1"}])
+
+        from update_boardgames import main, parse_args
+
+        main(parse_args(["dummy_path.json", "--adaptive", "--max-rate", "3.0"]))
+
+        rate_limiter = mock_bgg_api.call_args.kwargs["rate_limiter"]
+        self.assertIsInstance(rate_limiter, AdaptiveTokenBucket)
+        self.assertEqual(rate_limiter.rate, 0.5)
+        self.assertEqual(rate_limiter.max_rate, 3.0)
+        mock_update.assert_called_once_with(
+            [GameRecord(title="Game 1")], mock_bgg_api.return_value, max_workers=1, checkpointer=ANY
+        )
+
+    @patch("update_boardgames.write_boardgames_data")
+    @patch("update_boardgames.refresh_stats_boardgames_data")
+    @patch("update_boardgames.read_boardgames_data")
+    @patch("update_boardgames.BggApi")
+    def test_main_stats_only(self, mock_bgg_api, mock_read, mock_refresh, mock_write):
+        """Test that main only refreshes stats by id with --stats-only."""
+        mock_read.return_value = [GameRecord(title="Game 1", bgg_id="1")]
+        mock_refresh.return_value = (0, [{"title": "Game 1", "bgg_id": "1"}])
+
+        from update_boardgames import main, parse_args
+
+        main(parse_args(["dummy_path.json", "--stats-only"]))
+
+        mock_refresh.assert_called_once_with(
+            [GameRecord(title="Game 1", bgg_id="1")], mock_bgg_api.return_value, checkpointer=ANY
+        )
+        mock_bgg_api.return_value.get_bgg_game_details.assert_not_called()
 
 
 if __name__ == "__main__":
@@ -1,7 +1,9 @@
 import unittest
-from unittest.mock import patch, MagicMock
+from unittest.mock import ANY, MagicMock, patch
 
-from update_collection import update_bgg_collection
+from file_utils import record_key
+from sync_journal import ADDED, ALREADY_OWNED, ERROR, SKIPPED
+from update_collection import filter_journaled_games, filter_unowned_games, main, parse_args, update_bgg_collection
 
 
 class TestUpdateCollection(unittest.TestCase):
@@ -15,5 +17,116 @@ class TestUpdateCollection(unittest.TestCase):
         collection_manager.add_game_to_collection.assert_any_call({"title": "Game 1"})
         collection_manager.add_game_to_collection.assert_any_call({"title": "Game 2"})
 
+    def test_update_bgg_collection_records_outcomes(self):
+        """Test that every outcome is written to the journal."""
+        collection_manager = MagicMock()
+        collection_manager.add_game_to_collection.side_effect = [(ADDED, None), (ERROR, "Timed out")]
+        journal = MagicMock()
+        boardgames_data = [{"title": "Game 1"}, {"title": "Game 2"}]
+        update_bgg_collection(collection_manager, boardgames_data, journal=journal)
+        journal.record.assert_any_call({"title": "Game 1"}, ADDED, None)
+        journal.record.assert_any_call({"title": "Game 2"}, ERROR, "Timed out")
+
+    def test_filter_journaled_games(self):
+        """Test choosing the games left to do from journal outcomes."""
+        games = [{"title": f"Game {i}", "filename": "a.jpg", "box_2d": [i, 0, 0, 0]} for i in range(5)]
+        outcomes = {
+            record_key(games[0]): {"status": ADDED},
+            record_key(games[1]): {"status": ALREADY_OWNED},
+            record_key(games[2]): {"status": SKIPPED},
+            record_key(games[3]): {"status": ERROR},
+        }
+        self.assertEqual(filter_journaled_games(games, outcomes), games[3:])
+        self.assertEqual(filter_journaled_games(games, outcomes, retry_failed=True), [games[3]])
+
+    def test_filter_unowned_games(self):
+        """Test that owned and duplicate games are dropped."""
+        boardgames_data = [
+            {"title": "Owned", "url": "https://boardgamegeek.com/boardgame/1"},
+            {"title": "New", "url": "https://boardgamegeek.com/boardgame/2"},
+            {"title": "New (other shelf)", "url": "https://boardgamegeek.com/boardgame/2"},
+            {"title": "No URL", "url": None},
+        ]
+        unowned = filter_unowned_games(boardgames_data, {"1"})
+        self.assertEqual([game["title"] for game in unowned], ["New", "No URL"])
+
+    @patch("bgg_collection_manager.BggCollectionManager")
+    @patch("update_collection.read_boardgames_data")
+    def test_main_closes_the_browser_on_errors(self, mock_read, mock_manager):
+        """Test that the browser is closed even when logging in fails."""
+        mock_read.return_value = [{"title": "New", "url": "https://boardgamegeek.com/boardgame/2"}]
+        mock_manager.return_value.login_to_bgg.side_effect = KeyboardInterrupt
+
+        with self.assertRaises(KeyboardInterrupt):
+            main()
+
+        mock_manager.return_value.close_driver.assert_called_once()
+
+    @patch("bgg_collection_manager.BggCollectionManager")
+    @patch("bgg_api.BggApi")
+    @patch("update_collection.read_boardgames_data")
+    def test_main_skips_owned_games(self, mock_read, mock_bgg_api, mock_manager):
+        """Test that only games missing from the collection reach the browser."""
+        mock_read.return_value = [
+            {"title": "Owned", "url": "https://boardgamegeek.com/boardgame/1"},
+            {"title": "New", "url": "https://boardgamegeek.com/boardgame/2"},
+        ]
+        mock_bgg_api.return_value.get_owned_game_ids.return_value = {"1"}
+
+        main(username="someone")
+
+        mock_bgg_api.return_value.get_owned_game_ids.assert_called_once_with("someone")
+        mock_manager.return_value.add_game_to_collection.assert_called_once_with(mock_read.return_value[1])
+
+    @patch("bgg_collection_manager.BggCollectionManager")
+    @patch("bgg_api.BggApi")
+    @patch("update_collection.read_boardgames_data")
+    def test_main_does_not_open_a_browser_when_nothing_is_missing(self, mock_read, mock_bgg_api, mock_manager):
+        """Test that a fully synced collection never starts the browser."""
+        mock_read.return_value = [{"title": "Owned", "url": "https://boardgamegeek.com/boardgame/1"}]
+        mock_bgg_api.return_value.get_owned_game_ids.return_value = {"1"}
+
+        main(username="someone")
+
+        mock_manager.assert_not_called()
+
+    @patch("bgg_http_collection.BggHttpCollectionManager")
+    @patch("bgg_collection_manager.BggCollectionManager")
+    @patch("bgg_api.BggApi")
+    @patch("update_collection.read_boardgames_data")
+    def test_main_http_backend(self, mock_read, mock_bgg_api, mock_browser_manager, mock_http_manager):
+        """Test that the http backend is used without starting a browser, knowing the owned games."""
+        mock_read.return_value = [{"title": "New", "url": "https://boardgamegeek.com/boardgame/2"}]
+        mock_bgg_api.return_value.get_owned_game_ids.return_value = {"1"}
+
+        main(backend="http", username="someone", cookies_file="cookies.json")
+
+        mock_browser_manager.assert_not_called()
+        mock_http_manager.assert_called_once_with(
+            username="someone", cookies_file="cookies.json", metrics=ANY, owned_ids={"1"}
+        )
+        mock_http_manager.return_value.add_game_to_collection.assert_called_once_with(mock_read.return_value[0])
+
+    @patch("bgg_http_collection.BggHttpCollectionManager")
+    @patch("bgg_api.BggApi")
+    @patch("update_collection.read_boardgames_data")
+    def test_main_http_backend_requires_owned_games(self, mock_read, mock_bgg_api, mock_http_manager):
+        """Test that the http backend posts nothing unless the owned games could be fetched."""
+        mock_read.return_value = [{"title": "New", "url": "https://boardgamegeek.com/boardgame/2"}]
+        mock_bgg_api.return_value.get_owned_game_ids.return_value = None
+
+        main(backend="http", cookies_file="cookies.json")
+        main(backend="http", username="someone", cookies_file="cookies.json")
+
+        mock_http_manager.assert_not_called()
+        with self.assertRaises(SystemExit), patch("sys.stderr"):
+            parse_args(["--backend", "http"])
+
+    def test_headless_requires_cookies_file(self):
+        """Test that a headless browser sync is rejected unless it can log in with cookies."""
+        with self.assertRaises(SystemExit), patch("sys.stderr"):
+            parse_args(["--headless"])
+        self.assertTrue(parse_args(["--headless", "--cookies-file", "cookies.json"]).headless)
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,180 @@
+import json
+import os
+import tempfile
+import time
+import unittest
+from unittest.mock import MagicMock, patch
+
+from work_queue import DONE, FAILED, LEASED, PENDING, WorkQueue, enqueue_boardgames, merge_results, run_worker
+
+DETAILS = {"url": "https://boardgamegeek.com/boardgame/13", "rank": 5, "score": 7.0, "min_players": 3,
+           "max_players": 4, "min_playtime": 60, "max_playtime": 120, "weight": 2.3}
+
+
+class TestWorkQueue(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.path = os.path.join(self.tmp.name, "queue.sqlite3")
+        self.queue = WorkQueue(self.path, visibility_timeout=60, max_attempts=2)
+        self.addCleanup(self.queue.close)
+
+    def test_enqueue_shards_new_titles_only(self):
+        """Test that titles are sharded once, however often they are enqueued."""
+        self.assertEqual(self.queue.enqueue(["A", "B", "C", "A", ""], shard_size=2), 3)
+        self.assertEqual(self.queue.enqueue(["C", "D"], shard_size=2), 1)
+        self.assertEqual(self.queue.counts(), {PENDING: 3, LEASED: 0, DONE: 0, FAILED: 0})
+
+    def test_claim_leases_each_shard_to_one_worker(self):
+        """Test that a leased shard is invisible to other workers, even through another connection."""
+        self.queue.enqueue(["A", "B"], shard_size=1)
+        other = WorkQueue(self.path)
+        self.addCleanup(other.close)
+
+        first = self.queue.claim("w1")
+        second = other.claim("w2")
+
+        self.assertEqual(first[1], ["A"])
+        self.assertEqual(second[1], ["B"])
+        self.assertIsNone(self.queue.claim("w3"))
+        self.assertTrue(self.queue.renew(first[0], "w1"))
+        self.assertFalse(self.queue.renew(first[0], "w2"))
+
+    def test_expired_lease_is_claimed_again_then_fails(self):
+        """Test that a shard whose lease expires is handed out again, up to max_attempts."""
+        self.queue.enqueue(["A"])
+        with patch("work_queue.time.time", return_value=1000):
+            shard_id, _ = self.queue.claim("w1")
+        with patch("work_queue.time.time", return_value=1061):
+            self.assertEqual(self.queue.counts()[PENDING], 1)
+            self.assertEqual(self.queue.claim("w2"), (shard_id, ["A"]))
+        with patch("work_queue.time.time", return_value=1122):
+            self.assertIsNone(self.queue.claim("w3"))
+            self.assertEqual(self.queue.counts()[FAILED], 1)
+            self.assertEqual(self.queue.unfinished(), 0)
+
+    def test_enqueue_requeues_titles_of_failed_shards(self):
+        """Test that titles of a failed shard can be queued again and leave the failed shard."""
+        queue = WorkQueue(self.path, visibility_timeout=60, max_attempts=1)
+        self.addCleanup(queue.close)
+        queue.enqueue(["A", "B"])
+        with patch("work_queue.time.time", return_value=1000):
+            queue.claim("w1")
+        with patch("work_queue.time.time", return_value=1061):
+            self.assertIsNone(queue.claim("w2"))
+        self.assertEqual(queue.counts()[FAILED], 1)
+
+        self.assertEqual(queue.enqueue(["A"]), 1)
+        self.assertEqual(queue.counts(), {PENDING: 1, LEASED: 0, DONE: 0, FAILED: 1})
+        self.assertEqual(queue.enqueue(["A", "B"]), 1)
+        self.assertEqual(queue.counts(), {PENDING: 2, LEASED: 0, DONE: 0, FAILED: 0})
+        self.assertEqual(queue.claim("w3")[1], ["A"])
+
+    def test_late_completion_keeps_results(self):
+        """Test that results of a worker whose lease expired are kept and overwritten idempotently."""
+        self.queue.enqueue(["A", "B"])
+        with patch("work_queue.time.time", return_value=1000):
+            shard_id, _ = self.queue.claim("w1")
+        with patch("work_queue.time.time", return_value=1061):
+            self.queue.claim("w2")
+            self.assertTrue(self.queue.complete(shard_id, "w2", {"A": DETAILS, "B": None}))
+            self.assertFalse(self.queue.complete(shard_id, "w1", {"A": DETAILS, "B": None}))
+
+        self.assertEqual(self.queue.results(), {"A": DETAILS, "B": None})
+        self.assertEqual(self.queue.counts()[DONE], 1)
+
+    def test_run_worker_drains_queue(self):
+        """Test that a worker looks up every shard with its BggApi and stops once the queue is drained."""
+        self.queue.enqueue(["A", "B", "C"], shard_size=2)
+        bgg_api = MagicMock()
+        bgg_api.get_bgg_game_details_many.side_effect = lambda titles, **kwargs: {
+            title: DETAILS if title != "C" else None for title in titles
+        }
+
+        self.assertEqual(run_worker(self.queue, bgg_api, worker="w1"), 2)
+
+        self.assertEqual(bgg_api.get_bgg_game_details_many.call_count, 2)
+        self.assertEqual(self.queue.results(), {"A": DETAILS, "B": DETAILS, "C": None})
+        self.assertEqual(self.queue.unfinished(), 0)
+
+    def test_failed_titles_are_retried_not_resolved(self):
+        """Test that titles whose requests failed get no result and are claimed again after the retry delay."""
+        self.queue.enqueue(["A", "B"])
+        bgg_api = MagicMock()
+
+        def lookup(titles, failed, on_progress):
+            failed.add("B")
+            return {"A": DETAILS, "B": None}
+
+        bgg_api.get_bgg_game_details_many.side_effect = lookup
+        with patch("work_queue.time.time", return_value=1000):
+            self.assertEqual(run_worker(self.queue, bgg_api, worker="w1", wait=False), 1)
+            self.assertEqual(self.queue.results(), {"A": DETAILS})
+            self.assertIsNone(self.queue.claim("w2"))
+        with patch("work_queue.time.time", return_value=1061):
+            shard_id, titles = self.queue.claim("w2")
+        self.assertEqual(titles, ["B"])
+        with patch("work_queue.time.time", return_value=1122):
+            self.queue.complete(shard_id, "w2", {"B": None}, failed_titles={"B"})
+        with patch("work_queue.time.time", return_value=1300):
+            self.assertIsNone(self.queue.claim("w3"))
+            self.assertEqual(self.queue.counts()[FAILED], 1)
+        self.assertNotIn("B", self.queue.results())
+
+    def test_run_worker_renews_and_abandons_lost_leases(self):
+        """Test that a worker renews its lease while looking up a shard and abandons it once lost."""
+        self.queue.enqueue(["A"])
+        other = WorkQueue(self.path, visibility_timeout=60)
+        self.addCleanup(other.close)
+        clock = [0.0]
+        bgg_api = MagicMock()
+
+        def lookup(titles, failed, on_progress):
+            for _ in range(3):
+                clock[0] += 30
+                on_progress()
+            return {"A": DETAILS}
+
+        bgg_api.get_bgg_game_details_many.side_effect = lookup
+        with patch("work_queue.time.monotonic", side_effect=lambda: clock[0]), \
+                patch.object(self.queue, "renew", wraps=self.queue.renew) as renew:
+            run_worker(self.queue, bgg_api, worker="w1", wait=False)
+        self.assertEqual(renew.call_count, 3)
+        self.assertEqual(self.queue.counts()[DONE], 1)
+
+        self.queue.enqueue(["B"])
+
+        def lookup_while_taken_over(titles, failed, on_progress):
+            with patch("work_queue.time.time", return_value=time.time() + 61):
+                self.assertIsNotNone(other.claim("w2"))
+            clock[0] += 30
+            on_progress()
+
+        bgg_api.get_bgg_game_details_many.side_effect = lookup_while_taken_over
+        with patch("work_queue.time.monotonic", side_effect=lambda: clock[0]):
+            run_worker(self.queue, bgg_api, worker="w1", wait=False)
+        self.assertNotIn("B", self.queue.results())
+        self.assertEqual(self.queue.counts()[LEASED], 1)
+
+    def test_enqueue_and_merge_boardgames(self):
+        """Test that pending games are queued and their results merged back into the JSON file."""
+        json_file_path = os.path.join(self.tmp.name, "boardgames.json")
+        with open(json_file_path, "w") as f:
+            json.dump([{"title": "A"}, {"title": "B"}, {"title": "Done", **DETAILS}], f)
+
+        self.assertEqual(enqueue_boardgames(json_file_path, self.queue), 2)
+        shard_id, titles = self.queue.claim("w1")
+        self.queue.complete(shard_id, "w1", {"A": DETAILS, "B": None})
+
+        self.assertEqual(merge_results(self.queue, json_file_path), 2)
+        self.assertEqual(merge_results(self.queue, json_file_path), 0)
+        with open(json_file_path) as f:
+            data = json.load(f)
+        self.assertEqual(data[0]["rank"], 5)
+        self.assertEqual(data[0]["bgg_id"], "13")
+        self.assertEqual((data[1]["url"], data[1]["rank"]), (None, "Not Found"))
+        self.assertEqual(data[2], {"title": "Done", **DETAILS})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,103 @@
+import difflib
+import json
+import os
+import re
+import threading
+
+from bgg_common import bgg_id_from_url, normalize_title
+from file_utils import write_json_atomic
+
+DEFAULT_FUZZY_CUTOFF = 0.95
+
+_NUMBER_PATTERN = re.compile(r"\d+")
+
+
+def _numbers(key):
+    """Returns the number tokens of a normalized title, e.g. ("2",) for a "Season 2"."""
+    return tuple(_NUMBER_PATTERN.findall(key))
+
+
+class TitleIndex:
+    """
+    A persistent map from normalized game titles (and aliases) to BGG ids.
+
+    `lookup` only matches the normalized title. With a `fuzzy_cutoff`,
+    `fuzzy_lookup` also finds the closest known title whose similarity
+    ratio is at least that high and whose numbers are the same, so "Season
+    2" never matches "Season 1"; its result is only a guess for a search to
+    confirm. Safe to share between threads.
+    """
+
+    def __init__(self, path=None, fuzzy_cutoff=None):
+        self.path = path
+        self.fuzzy_cutoff = fuzzy_cutoff
+        self._ids = {}
+        # Known keys by their number tokens, so fuzzy lookups only compare
+        # titles that could match.
+        self._keys_by_numbers = {}
+        self._lock = threading.Lock()
+        if path and os.path.exists(path):
+            self.load()
+
+    def __len__(self):
+        return len(self._ids)
+
+    def load(self):
+        """Loads the index from `path`."""
+        with open(self.path, 'r') as f:
+            data = json.load(f)
+        with self._lock:
+            for key, game_id in data.get("titles", {}).items():
+                self._set(key, game_id)
+
+    def save(self):
+        """Writes the index to `path`, replacing the old file atomically."""
+        with self._lock:
+            data = {"titles": dict(sorted(self._ids.items()))}
+        write_json_atomic(self.path, data)
+
+    def _set(self, key, game_id):
+        self._ids[key] = str(game_id)
+        self._keys_by_numbers.setdefault(_numbers(key), set()).add(key)
+
+    def add(self, title, game_id, aliases=()):
+        """Maps a title, and any aliases of it, to a BGG id."""
+        with self._lock:
+            for name in (title, *aliases):
+                key = normalize_title(name)
+                if key:
+                    self._set(key, game_id)
+
+    def lookup(self, title):
+        """Returns the BGG id for a title, or None if it is not known."""
+        key = normalize_title(title)
+        if not key:
+            return None
+        with self._lock:
+            return self._ids.get(key)
+
+    def fuzzy_lookup(self, title):
+        """
+        Returns the BGG id of the closest known title with the same numbers,
+        or None. Always None without a `fuzzy_cutoff`.
+        """
+        key = normalize_title(title)
+        if not key or self.fuzzy_cutoff is None:
+            return None
+        with self._lock:
+            keys = self._keys_by_numbers.get(_numbers(key), ())
+            matches = difflib.get_close_matches(key, keys, n=1, cutoff=self.fuzzy_cutoff)
+            return self._ids[matches[0]] if matches else None
+
+    def seed_from_records(self, boardgames_data):
+        """
+        Adds the title of every record that was already resolved to a BGG id.
+        Returns the number of records added.
+        """
+        count = 0
+        for game in boardgames_data:
+            game_id = game.get("bgg_id") or bgg_id_from_url(game.get("url"))
+            if game.get("title") and game_id:
+                self.add(game["title"], game_id)
+                count += 1
+        return count
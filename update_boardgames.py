@@ -1,80 +1,560 @@
+import argparse
+import itertools
 import json
-import sys
+import os
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import nullcontext
+from datetime import datetime, timedelta, timezone
 
-from bgg_api import BggApi
-from file_utils import read_boardgames_data
+from bgg_api import BggApi, bgg_id_from_url
+from box_index import merge_duplicates
+from file_utils import (
+    append_boardgames_jsonl,
+    is_jsonl_path,
+    iter_boardgames_jsonl,
+    read_boardgames_data,
+    record_key,
+    write_json_atomic,
+)
+from metrics import JsonlSink, Metrics
+from frontend_index import write_frontend_index
+from game_record import json_default
+from rate_limiter import AdaptiveTokenBucket, TokenBucket, backoff_delay
+from response_cache import ResponseCache
+from title_index import DEFAULT_FUZZY_CUTOFF, TitleIndex
 
+# The details that come from a game's BGG statistics and change over time.
+DEFAULT_REQUESTS_PER_SECOND = 0.5
+DEFAULT_MAX_REQUESTS_PER_SECOND = 5.0
 
-def write_boardgames_data(json_file_path, data):
-    """Writes board games data to a JSON file."""
+
+def write_boardgames_data(json_file_path, data, metrics=None):
+    """
+    Writes board games data (`GameRecord`s) to a JSON file,
+    replacing it atomically. The time taken is recorded in `metrics`, if given.
+    """
     try:
-        with open(json_file_path, 'w') as f:
-            json.dump(data, f, indent=4)
+        with metrics.timer("write_seconds") if metrics is not None else nullcontext():
+            write_json_atomic(json_file_path, data, default=json_default)
         return True
     except IOError as e:
         print(f"Error writing to file {json_file_path}: {e}")
         return False
 
 
-def update_boardgames_data(boardgames_data, bgg_api):
+def _progress_file_path(json_file_path):
+    return f"{json_file_path}.progress"
+
+
+def read_checkpoint_progress(json_file_path):
+    """
+    Returns the `record_key`s of the games processed before the last
+    checkpoint that are still missing details, i.e. were not found.
+    """
+    try:
+        with open(_progress_file_path(json_file_path), 'r') as f:
+            return set(json.load(f)["processed"])
+    except (FileNotFoundError, json.JSONDecodeError, KeyError):
+        return set()
+
+
+class Checkpointer:
+    """
+    Periodically saves board games data during a long update, every `every`
+    processed games or `interval` seconds, whichever comes first. Games that
+    got their details are skipped by an interrupted run's resumption anyway,
+    so next to the data a `.progress` file only records the other processed
+    games, by `record_key`, for the resumed run to skip too.
+    """
+
+    def __init__(self, json_file_path, boardgames_data, every=25, interval=60, processed=(), metrics=None):
+        self.json_file_path = json_file_path
+        self.boardgames_data = boardgames_data
+        self.every = every
+        self.interval = interval
+        self.metrics = metrics
+        self._processed = set(processed)
+        self._recorded = 0
+        self._pending = 0
+        self._last_write = time.monotonic()
+        self._lock = threading.Lock()
+
+    def record(self, game):
+        """Marks a game as processed, writing a checkpoint when one is due."""
+        with self._lock:
+            if game.needs_details():
+                self._processed.add(record_key(game))
+            self._recorded += 1
+            self._pending += 1
+            if self._pending >= self.every or time.monotonic() - self._last_write >= self.interval:
+                self._write()
+
+    def _write(self):
+        if write_boardgames_data(self.json_file_path, self.boardgames_data, metrics=self.metrics):
+            write_json_atomic(_progress_file_path(self.json_file_path), {"processed": sorted(self._processed)})
+            print(f"Checkpoint: {self._recorded} games processed.")
+        self._pending = 0
+        self._last_write = time.monotonic()
+
+    def finish(self):
+        """Removes the progress file once the whole update has completed."""
+        try:
+            os.remove(_progress_file_path(self.json_file_path))
+        except FileNotFoundError:
+            pass
+
+
+def _is_stale(game, cutoff):
+    try:
+        fetched_at = datetime.fromisoformat(game["fetched_at"])
+    except (KeyError, TypeError, ValueError):
+        return True
+    if fetched_at.tzinfo is None:
+        fetched_at = fetched_at.replace(tzinfo=timezone.utc)
+    return fetched_at < cutoff
+
+
+def _count_title(bgg_api, details):
+    bgg_api.metrics.increment("titles_total", outcome="updated" if details else "not_found")
+
+
+def update_boardgames_data(boardgames_data, bgg_api, checkpointer=None):
     """
     Updates board games data with BGG URL, rank, score, and other stats.
+    Each processed game is reported to `checkpointer`, if one is given.
     """
     updated_count = 0
-    details_to_check = ["url", "rank", "score", "min_players", "max_players", "min_playtime", "max_playtime", "weight"]
 
     for game in boardgames_data:
         title = game.get("title")
-        details_missing = not all(k in game for k in details_to_check) or not game.get("url")
 
-        if title and details_missing:
+        if title and game.needs_details():
             print(f"Fetching details for '{title}'...")
             max_retries = 3
             details = None
             for attempt in range(max_retries):
                 details = bgg_api.get_bgg_game_details(title)
                 if details:
-                    game.update(details)
+                    game.apply_details(details)
                     updated_count += 1
                     print(f"Updated details for '{title}': Rank {details['rank']}, Score {details['score']}, Weight {details['weight']}")
                     break
                 else:
                     print(f"Could not find details for '{title}' (attempt {attempt + 1}/{max_retries})")
                     if attempt < max_retries - 1:
+                        bgg_api.metrics.increment("sleep_seconds_total", 10, reason="retry")
                         time.sleep(10)
 
             if not details:
-                for key in details_to_check:
-                    if key not in game:
-                        game[key] = None if key == 'url' else "Not Found" if key == 'rank' else 0
+                game.mark_not_found()
+            _count_title(bgg_api, details)
+            if checkpointer is not None:
+                checkpointer.record(game)
 
+            bgg_api.metrics.increment("sleep_seconds_total", 5, reason="pacing")
             time.sleep(5)
 
     return updated_count, boardgames_data
 
 
-def main(json_file_path):
+def _fetch_details_with_backoff(title, bgg_api, max_retries=3):
+    for attempt in range(max_retries):
+        details = bgg_api.get_bgg_game_details(title)
+        if details:
+            return details
+        print(f"Could not find details for '{title}' (attempt {attempt + 1}/{max_retries})")
+        if attempt < max_retries - 1:
+            delay = backoff_delay(attempt)
+            bgg_api.metrics.increment("sleep_seconds_total", delay, reason="retry")
+            time.sleep(delay)
+    return None
+
+
+def update_boardgames_data_concurrent(boardgames_data, bgg_api, max_workers=4, checkpointer=None):
+    """
+    Updates board games data like `update_boardgames_data`, but looks titles up
+    on a thread pool. Pacing is left to the rate limiter of `bgg_api` instead
+    of fixed sleeps between games.
+    """
+    updated_count = 0
+    pending = [game for game in boardgames_data if game.get("title") and game.needs_details()]
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            executor.submit(_fetch_details_with_backoff, game["title"], bgg_api): game
+            for game in pending
+        }
+        for future in as_completed(futures):
+            game = futures[future]
+            details = future.result()
+            if details:
+                game.apply_details(details)
+                updated_count += 1
+                print(f"Updated details for '{game['title']}': Rank {details['rank']}, Score {details['score']}, Weight {details['weight']}")
+            else:
+                game.mark_not_found()
+            _count_title(bgg_api, details)
+            if checkpointer is not None:
+                checkpointer.record(game)
+
+    return updated_count, boardgames_data
+
+
+def _fetch_details_many_with_backoff(titles, bgg_api, max_retries=3):
+    """
+    Looks titles up with `get_bgg_game_details_many`, looking the titles
+    whose requests failed up again, with backoff, up to `max_retries` times.
+    Returns the details by title and the titles that still failed.
+    """
+    details_by_title = {}
+    for attempt in range(max_retries):
+        failed = set()
+        details_by_title.update(bgg_api.get_bgg_game_details_many(titles, failed=failed))
+        titles = [title for title in titles if title in failed]
+        if not titles:
+            break
+        print(f"Requests failed for {len(titles)} titles (attempt {attempt + 1}/{max_retries})")
+        if attempt < max_retries - 1:
+            delay = backoff_delay(attempt)
+            bgg_api.metrics.increment("sleep_seconds_total", delay, reason="retry")
+            time.sleep(delay)
+    return details_by_title, set(titles)
+
+
+def update_boardgames_data_batched(boardgames_data, bgg_api, batch_size=100, checkpointer=None):
+    """
+    Updates board games data using `BggApi.get_bgg_game_details_many`, so
+    candidate ids of up to `batch_size` titles share full `thing` requests.
+    Titles whose requests failed are retried; if they keep failing, their
+    games are left as they are, to be looked up by a later run, rather than
+    marked not found.
+    """
+    updated_count = 0
+    pending = [game for game in boardgames_data if game.get("title") and game.needs_details()]
+
+    for i in range(0, len(pending), batch_size):
+        batch = pending[i:i + batch_size]
+        print(f"Fetching details for {len(batch)} games ({i + len(batch)}/{len(pending)})...")
+        details_by_title, failed = _fetch_details_many_with_backoff(
+            list(dict.fromkeys(game["title"] for game in batch)), bgg_api
+        )
+        for game in batch:
+            details = details_by_title.get(game["title"])
+            if details:
+                game.apply_details(details)
+                updated_count += 1
+            elif game["title"] in failed:
+                print(f"Could not look up '{game['title']}'; it will be retried by the next run.")
+                bgg_api.metrics.increment("titles_total", outcome="failed")
+                continue
+            else:
+                print(f"Could not find details for '{game['title']}'")
+                game.mark_not_found()
+            _count_title(bgg_api, details)
+            if checkpointer is not None:
+                checkpointer.record(game)
+
+    return updated_count, boardgames_data
+
+
+def refresh_stale_boardgames_data(boardgames_data, bgg_api, max_age):
+    """
+    Re-fetches the details of games last fetched more than `max_age` (a
+    timedelta) ago. Games are looked up by their stored BGG id, so no
+    search requests are made.
+    """
+    cutoff = datetime.now(timezone.utc) - max_age
+    stale_games = {}
+    for game in boardgames_data:
+        game_id = game.get("bgg_id") or bgg_id_from_url(game.get("url"))
+        if game_id and _is_stale(game, cutoff):
+            stale_games.setdefault(game_id, []).append(game)
+
+    if not stale_games:
+        return 0, boardgames_data
+
+    print(f"Refreshing details for {len(stale_games)} stale games...")
+    details_by_id = bgg_api.get_bgg_game_details_by_ids(list(stale_games))
+    updated_count = 0
+    for game_id, games in stale_games.items():
+        details = details_by_id.get(game_id)
+        if not details:
+            print(f"Could not refresh details for BGG id {game_id}")
+            continue
+        for game in games:
+            game.apply_details(details)
+            updated_count += 1
+        bgg_api.metrics.increment("titles_total", len(games), outcome="refreshed")
+
+    return updated_count, boardgames_data
+
+
+def refresh_stats_boardgames_data(boardgames_data, bgg_api, checkpointer=None):
     """
-    Main function to update the board games JSON file.
+    Refreshes only the statistics (rank, score and weight) of the games that
+    already have a BGG id, fetching them by id in full 20-id `thing`
+    requests instead of searching by title. Other fields are left as they
+    are, but `fetched_at` is renewed even when no statistic changed.
+    Returns the number of games whose statistics changed.
     """
-    boardgames_data = read_boardgames_data(json_file_path)
-    if boardgames_data is None:
-        return
+    games_by_id = {}
+    for game in boardgames_data:
+        game_id = game.get("bgg_id") or bgg_id_from_url(game.get("url"))
+        if game_id:
+            games_by_id.setdefault(game_id, []).append(game)
 
-    bgg_api = BggApi()
-    updated_count, updated_data = update_boardgames_data(boardgames_data, bgg_api)
+    if not games_by_id:
+        return 0, boardgames_data
 
-    if updated_count > 0:
-        if write_boardgames_data(json_file_path, updated_data):
+    print(f"Refreshing statistics for {len(games_by_id)} games...")
+    details_by_id = bgg_api.get_bgg_game_details_by_ids(list(games_by_id))
+    updated_count = 0
+    for game_id, games in games_by_id.items():
+        details = details_by_id.get(game_id)
+        if not details:
+            print(f"Could not refresh statistics for BGG id {game_id}")
+        for game in games:
+            if details and game.apply_stats(details):
+                updated_count += 1
+            if checkpointer is not None:
+                checkpointer.record(game)
+    bgg_api.metrics.increment("titles_total", updated_count, outcome="stats_changed")
+
+    return updated_count, boardgames_data
+
+
+def update_boardgames_jsonl(jsonl_file_path, update_chunk, chunk_size=100, metrics=None):
+    """
+    Streams the records of a JSON Lines file through `update_chunk` in
+    chunks of `chunk_size`, appending only the records it changed. Memory
+    use is bounded by the chunk size, and each chunk doubles as a checkpoint.
+    `update_chunk` takes a list of records and returns (updated_count, records).
+    Append times are recorded in `metrics`, if given.
+    """
+    updated_count = 0
+    records = iter_boardgames_jsonl(jsonl_file_path)
+    while chunk := list(itertools.islice(records, chunk_size)):
+        before = [game.to_dict() for game in chunk]
+        count, chunk = update_chunk(chunk)
+        changed = [game for game, old in zip(chunk, before) if game.to_dict() != old]
+        if changed:
+            with metrics.timer("write_seconds") if metrics is not None else nullcontext():
+                append_boardgames_jsonl(jsonl_file_path, changed)
+        updated_count += count
+    return updated_count
+
+
+def main(args):
+    """
+    Updates the board games file named by parsed command-line `args` (see
+    `parse_args`), then prints a summary of the run's metrics.
+    """
+    json_file_path = args.json_file
+    streaming = is_jsonl_path(json_file_path)
+    if streaming:
+        if not os.path.exists(json_file_path):
+            print(f"Error: File not found at {json_file_path}")
+            return
+    else:
+        boardgames_data = read_boardgames_data(json_file_path)
+        if boardgames_data is None:
+            return
+
+    metrics = Metrics(sink=JsonlSink(args.metrics_jsonl) if args.metrics_jsonl else None)
+    run_started = time.perf_counter()
+    cache = ResponseCache(args.cache_dir) if args.cache_dir else None
+    api_options = {"metrics": metrics}
+    if args.adaptive:
+        initial_rate = args.rate or DEFAULT_REQUESTS_PER_SECOND
+        max_rate = max(args.max_rate or DEFAULT_MAX_REQUESTS_PER_SECOND, initial_rate)
+        rate_limiter = AdaptiveTokenBucket(initial_rate, max_rate=max_rate)
+        api_options.update(rate_limiter=rate_limiter, pool_size=max(args.workers, 1))
+    elif args.workers > 1 or args.rate is not None or args.batch_size:
+        # Batches send their searches back to back, so they always need a budget.
+        rate_limiter = TokenBucket(args.rate or DEFAULT_REQUESTS_PER_SECOND)
+        api_options.update(rate_limiter=rate_limiter, pool_size=max(args.workers, 1))
+    if args.timeout is not None:
+        api_options["timeout"] = args.timeout
+    if cache is not None:
+        api_options.update(cache=cache, offline=args.offline)
+    title_index = None
+    if args.title_index:
+        title_index = TitleIndex(args.title_index, fuzzy_cutoff=args.title_index_fuzzy)
+        title_index.seed_from_records(iter_boardgames_jsonl(json_file_path) if streaming else boardgames_data)
+        api_options["title_index"] = title_index
+    bgg_api = BggApi(**api_options)
+
+    def update(pending_data, checkpointer=None):
+        if args.stats_only:
+            return refresh_stats_boardgames_data(pending_data, bgg_api, checkpointer=checkpointer)
+        if args.batch_size:
+            return update_boardgames_data_batched(
+                pending_data, bgg_api, batch_size=args.batch_size, checkpointer=checkpointer
+            )
+        if args.workers > 1 or args.rate is not None or args.adaptive:
+            return update_boardgames_data_concurrent(
+                pending_data, bgg_api, max_workers=args.workers, checkpointer=checkpointer
+            )
+        return update_boardgames_data(pending_data, bgg_api, checkpointer=checkpointer)
+
+    if streaming:
+        def update_chunk(chunk):
+            refreshed_count = 0
+            if args.refresh_older_than is not None:
+                refreshed_count, chunk = refresh_stale_boardgames_data(
+                    chunk, bgg_api, timedelta(days=args.refresh_older_than)
+                )
+            updated_count, chunk = update(chunk)
+            return updated_count + refreshed_count, chunk
+
+        updated_count = update_boardgames_jsonl(json_file_path, update_chunk, metrics=metrics)
+        if updated_count > 0:
             print(f"\nSuccessfully updated {updated_count} board games in {json_file_path}")
+        else:
+            print("\nAll board games are already up-to-date.")
+        if args.index_dir:
+            indexed_data = list(iter_boardgames_jsonl(json_file_path))
     else:
-        print("\nAll board games are already up-to-date.")
+        merged_count = 0
+        if args.dedupe_iou is not None:
+            boardgames_data, groups = merge_duplicates(boardgames_data, min_iou=args.dedupe_iou)
+            merged_count = sum(len(group) - 1 for group in groups)
+            if merged_count:
+                print(f"Merged {merged_count} duplicate detections before updating.")
+
+        refreshed_count = 0
+        if args.refresh_older_than is not None:
+            refreshed_count, boardgames_data = refresh_stale_boardgames_data(
+                boardgames_data, bgg_api, timedelta(days=args.refresh_older_than)
+            )
+
+        processed = read_checkpoint_progress(json_file_path) if args.resume else set()
+        pending_data = boardgames_data
+        if processed:
+            print(f"Resuming: skipping {len(processed)} games not found before the last checkpoint.")
+            pending_data = [game for game in boardgames_data if record_key(game) not in processed]
+        checkpointer = Checkpointer(
+            json_file_path, boardgames_data, every=args.checkpoint_every, interval=args.checkpoint_interval,
+            processed=processed, metrics=metrics,
+        )
+
+        updated_count, updated_data = update(pending_data, checkpointer=checkpointer)
+        updated_count += refreshed_count
+        if processed:
+            updated_data = boardgames_data
+
+        if updated_count > 0 or processed or merged_count:
+            if write_boardgames_data(json_file_path, updated_data, metrics=metrics):
+                print(f"\nSuccessfully updated {updated_count} board games in {json_file_path}")
+                checkpointer.finish()
+        else:
+            print("\nAll board games are already up-to-date.")
+            checkpointer.finish()
+        indexed_data = updated_data
+
+    if args.index_dir:
+        with metrics.timer("write_seconds", target="index"):
+            manifest = write_frontend_index(indexed_data, args.index_dir)
+        print(f"Indexed {manifest['games']} games in {len(manifest['images'])} shards under {args.index_dir}")
+
+    bgg_api.close()
+    if title_index is not None:
+        title_index.save()
+    if cache is not None:
+        stats = cache.stats()
+        print(f"Cache: {stats['hits']} hits, {stats['misses']} misses, {stats['entries']} entries ({stats['bytes']} bytes)")
+        cache.close()
+
+    metrics.observe("run_seconds", time.perf_counter() - run_started)
+    print(f"Metrics: {json.dumps(metrics.summary())}")
+    if args.metrics_prometheus:
+        metrics.write_prometheus(args.metrics_prometheus)
+    metrics.close()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Fetch BGG details for the games in a boardgames.json file.")
+    parser.add_argument("json_file", help="Path to the boardgames.json (or .jsonl) file to update.")
+    parser.add_argument("--workers", type=int, default=1, help="Number of concurrent lookup workers.")
+    parser.add_argument("--rate", type=float, default=None, help="Requests per second shared by all workers.")
+    parser.add_argument(
+        "--adaptive",
+        action="store_true",
+        help="Learn the request rate: start at --rate, speed up on success and halve it when BGG throttles.",
+    )
+    parser.add_argument(
+        "--max-rate",
+        type=float,
+        default=None,
+        help=f"Upper bound of the adaptive rate in requests per second (default: {DEFAULT_MAX_REQUESTS_PER_SECOND}).",
+    )
+    parser.add_argument(
+        "--batch-size", type=int, default=None, help="Look titles up in batches of this size, sharing `thing` requests."
+    )
+    parser.add_argument("--cache-dir", default=None, help="Directory of a persistent cache of BGG responses.")
+    parser.add_argument(
+        "--offline", action="store_true", help="Serve every request from --cache-dir without touching the network."
+    )
+    parser.add_argument("--timeout", type=float, default=None, help="Timeout in seconds for each BGG request.")
+    parser.add_argument(
+        "--refresh-older-than",
+        type=float,
+        default=None,
+        metavar="DAYS",
+        help="Re-fetch, by stored BGG id, games whose details are older than this many days.",
+    )
+    parser.add_argument(
+        "--title-index", default=None, help="Path of a persistent title to BGG id index used to skip searches."
+    )
+    parser.add_argument(
+        "--title-index-fuzzy",
+        type=float,
+        nargs="?",
+        const=DEFAULT_FUZZY_CUTOFF,
+        default=None,
+        metavar="CUTOFF",
+        help="Also match near-identical indexed titles (with the same numbers) at this similarity "
+        f"(default: {DEFAULT_FUZZY_CUTOFF}); a fuzzy match is only used if a search returns it too.",
+    )
+    parser.add_argument(
+        "--checkpoint-every", type=int, default=25, help="Save progress after this many processed games."
+    )
+    parser.add_argument(
+        "--checkpoint-interval", type=float, default=60, help="Save progress at least this often, in seconds."
+    )
+    parser.add_argument(
+        "--resume", action="store_true", help="Skip the games processed before the last checkpoint of an interrupted run."
+    )
+    parser.add_argument("--metrics-jsonl", default=None, help="Append every metric event to this JSON Lines file.")
+    parser.add_argument(
+        "--metrics-prometheus", default=None, help="Write the final metrics to this file in Prometheus text format."
+    )
+    parser.add_argument(
+        "--index-dir", default=None, help="Also write the frontend's shards and facet index here, e.g. frontend/public/index."
+    )
+    parser.add_argument(
+        "--dedupe-iou",
+        type=float,
+        default=None,
+        help="Merge games of the same title whose boxes on a photo overlap at least this much (IoU) before updating.",
+    )
+    parser.add_argument(
+        "--stats-only",
+        action="store_true",
+        help="Only refresh the rank, score and weight of games with a BGG id, fetched by id in batches of 20.",
+    )
+    args = parser.parse_args(argv)
+    if args.offline and not args.cache_dir:
+        parser.error("--offline requires --cache-dir")
+    return args
+
+
+def cli(argv=None):
+    """Parses the command line (`argv`, or `sys.argv`) and runs `main`."""
+    main(parse_args(argv))
 
 
 if __name__ == "__main__":
-    if len(sys.argv) > 1:
-        json_file = sys.argv[1]
-        main(json_file)
-    else:
-        print("Usage: python update_boardgames.py <path_to_json_file>")
\ No newline at end of file
+    cli()
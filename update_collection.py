@@ -1,32 +1,226 @@
-from file_utils import read_boardgames_data
-from bgg_collection_manager import BggCollectionManager
+import argparse
+import json
 
-JSON_FILE_PATH = "/home/aviraldg/Downloads/boardgames.json"
+from bgg_common import bgg_id_from_url
+from collection_pool import BggCollectionManagerPool
+from file_utils import read_boardgames_data, record_key
+from metrics import JsonlSink, Metrics
+from sync_journal import DONE_STATUSES, ERROR, SyncJournal, read_sync_outcomes
 
+DEFAULT_JSON_FILE = "frontend/public/boardgames.json"
 
-def update_bgg_collection(collection_manager, boardgames_data):
+
+def update_bgg_collection(collection_manager, boardgames_data, journal=None, metrics=None):
     """
     Iterates through the board games data and adds each game to the BGG collection.
+    The outcome for each game is recorded in `journal` and counted in
+    `metrics`, if given.
+    """
+    for game in boardgames_data:
+        outcome = collection_manager.add_game_to_collection(game)
+        if journal is not None:
+            journal.record(game, *outcome)
+        if metrics is not None:
+            metrics.increment("collection_games_total", status=outcome[0])
+
+
+def filter_journaled_games(boardgames_data, outcomes, retry_failed=False):
+    """
+    Returns the games a resumed sync still has to process, given the latest
+    journal outcomes: every game not finished yet, or with `retry_failed`
+    only the games whose last attempt ended in an error.
     """
+    remaining = []
     for game in boardgames_data:
-        collection_manager.add_game_to_collection(game)
+        outcome = outcomes.get(record_key(game))
+        if retry_failed:
+            if outcome is not None and outcome["status"] == ERROR:
+                remaining.append(game)
+        elif outcome is None or outcome["status"] not in DONE_STATUSES:
+            remaining.append(game)
+    return remaining
 
 
-def main():
+def filter_unowned_games(boardgames_data, owned_ids):
+    """
+    Returns the games that still have to be added: those with a BGG id that
+    is not in `owned_ids`, each id once. Games without a usable URL are kept
+    so that the collection manager can report them.
+    """
+    unowned_games = []
+    seen_ids = set()
+    for game in boardgames_data:
+        game_id = bgg_id_from_url(game.get("url"))
+        if game_id is None:
+            unowned_games.append(game)
+        elif game_id not in owned_ids and game_id not in seen_ids:
+            seen_ids.add(game_id)
+            unowned_games.append(game)
+    return unowned_games
+
+
+def main(
+    json_file_path=DEFAULT_JSON_FILE,
+    workers=1,
+    username=None,
+    backend="browser",
+    headless=False,
+    cookies_file=None,
+    journal_path=None,
+    resume=False,
+    retry_failed=False,
+    metrics_jsonl=None,
+    metrics_prometheus=None,
+):
     """
     Main function to update the BGG collection.
+    With more than one worker, games are added from that many browser
+    sessions in parallel, all sharing the first session's login. With a
+    username, the user's collection is fetched first and games they already
+    own are skipped without opening their pages. The "http" backend posts
+    collection updates directly instead of driving a browser; it cannot see
+    whether a game is owned, so it requires the username and only runs once
+    the collection has been fetched. With a journal
+    path, every outcome is logged; `resume` then skips the games already
+    done and `retry_failed` only retries the games that ended in an error.
+    A JSON summary of the run's metrics is printed at the end; they can also
+    be streamed to a JSONL file as they happen and written as Prometheus text.
+    Selenium and `requests` are only imported once a backend needs them.
     """
-    boardgames_data = read_boardgames_data(JSON_FILE_PATH)
+    boardgames_data = read_boardgames_data(json_file_path)
     if boardgames_data is None:
         return
 
-    collection_manager = BggCollectionManager()
-    collection_manager.setup_driver()
-    collection_manager.login_to_bgg()
-    update_bgg_collection(collection_manager, boardgames_data)
-    collection_manager.close_driver()
+    if journal_path and (resume or retry_failed):
+        boardgames_data = filter_journaled_games(
+            boardgames_data, read_sync_outcomes(journal_path), retry_failed=retry_failed
+        )
+        print(f"{len(boardgames_data)} games left to process according to {journal_path}.")
+        if not boardgames_data:
+            return
+
+    if backend == "http" and not username:
+        print("Error: the http backend needs a username to skip games that are already in the collection.")
+        return
+
+    metrics = Metrics(sink=JsonlSink(metrics_jsonl) if metrics_jsonl else None)
+    owned_ids = None
+    if username:
+        from bgg_api import BggApi
+
+        bgg_api = BggApi(metrics=metrics)
+        owned_ids = bgg_api.get_owned_game_ids(username)
+        bgg_api.close()
+        if owned_ids is None and backend == "http":
+            print(f"Error: could not fetch the collection of '{username}', which the http backend needs.")
+            metrics.close()
+            return
+        if owned_ids is None:
+            print(f"Could not fetch the collection of '{username}'; checking every game in the browser.")
+        else:
+            boardgames_data = filter_unowned_games(boardgames_data, owned_ids)
+            print(f"'{username}' owns {len(owned_ids)} games; {len(boardgames_data)} games left to add.")
+            if not boardgames_data:
+                print("Your BoardGameGeek collection is already up-to-date.")
+                metrics.close()
+                return
+
+    def create_manager():
+        if backend == "http":
+            from bgg_http_collection import BggHttpCollectionManager
+
+            return BggHttpCollectionManager(
+                username=username, cookies_file=cookies_file, metrics=metrics, owned_ids=owned_ids
+            )
+        from bgg_collection_manager import BggCollectionManager
+
+        return BggCollectionManager(headless=headless, metrics=metrics, cookies_file=cookies_file)
+
+    journal = SyncJournal(journal_path) if journal_path else None
+    try:
+        if workers > 1:
+            pool = BggCollectionManagerPool(workers, manager_factory=create_manager)
+            try:
+                pool.setup()
+                pool.add_games_to_collection(boardgames_data, journal=journal, metrics=metrics)
+            finally:
+                pool.close()
+        else:
+            collection_manager = create_manager()
+            try:
+                collection_manager.setup_driver()
+                collection_manager.login_to_bgg()
+                update_bgg_collection(collection_manager, boardgames_data, journal=journal, metrics=metrics)
+            finally:
+                collection_manager.close_driver()
+    finally:
+        if journal is not None:
+            journal.close()
+        print(f"Metrics: {json.dumps(metrics.summary())}")
+        if metrics_prometheus:
+            metrics.write_prometheus(metrics_prometheus)
+        metrics.close()
     print("Script finished. Check your BoardGameGeek collection.")
 
 
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Add the games in boardgames.json to your BGG collection.")
+    parser.add_argument(
+        "json_file",
+        nargs="?",
+        default=DEFAULT_JSON_FILE,
+        help=f"Path to the boardgames.json file to sync (default: {DEFAULT_JSON_FILE}).",
+    )
+    parser.add_argument("--workers", type=int, default=1, help="Number of browser sessions to run in parallel.")
+    parser.add_argument(
+        "--username", default=None, help="Your BGG username, used to skip games that are already in your collection."
+    )
+    parser.add_argument(
+        "--backend",
+        choices=["browser", "http"],
+        default="browser",
+        help="Drive a Chrome browser, or post collection updates over HTTP without one.",
+    )
+    parser.add_argument(
+        "--headless", action="store_true", help="Run the browser backend without a visible window (needs --cookies-file)."
+    )
+    parser.add_argument("--cookies-file", default=None, help="JSON file of logged-in BGG cookies to reuse.")
+    parser.add_argument("--journal", default=None, help="Append-only log of per-game outcomes, used to resume.")
+    parser.add_argument("--resume", action="store_true", help="Skip the games the journal records as done.")
+    parser.add_argument(
+        "--retry-failed", action="store_true", help="Only retry the games whose last journaled attempt failed."
+    )
+    parser.add_argument("--metrics-jsonl", default=None, help="Append every metric event to this JSON Lines file.")
+    parser.add_argument(
+        "--metrics-prometheus", default=None, help="Write the final metrics to this file in Prometheus text format."
+    )
+    args = parser.parse_args(argv)
+    if args.headless and args.backend == "browser" and not args.cookies_file:
+        parser.error("--headless requires --cookies-file: a browser without a window cannot be logged in by hand")
+    if args.backend == "http" and not args.username:
+        parser.error("--backend http requires --username, to skip games that are already in the collection")
+    if (args.resume or args.retry_failed) and not args.journal:
+        parser.error("--resume and --retry-failed require --journal")
+    return args
+
+
+def cli(argv=None):
+    """Parses the command line (`argv`, or `sys.argv`) and runs `main`."""
+    args = parse_args(argv)
+    main(
+        args.json_file,
+        workers=args.workers,
+        username=args.username,
+        backend=args.backend,
+        headless=args.headless,
+        cookies_file=args.cookies_file,
+        journal_path=args.journal,
+        resume=args.resume,
+        retry_failed=args.retry_failed,
+        metrics_jsonl=args.metrics_jsonl,
+        metrics_prometheus=args.metrics_prometheus,
+    )
+
+
 if __name__ == "__main__":
-    main()
+    cli()
@@ -0,0 +1,438 @@
+import argparse
+import json
+import multiprocessing
+import os
+import socket
+import sqlite3
+import time
+from contextlib import contextmanager
+
+from file_utils import (
+    append_boardgames_jsonl,
+    is_jsonl_path,
+    iter_boardgames_data,
+    read_boardgames_data,
+    write_json_atomic,
+)
+from game_record import json_default
+
+DEFAULT_SHARD_SIZE = 20
+# Seconds a claimed shard stays invisible to other workers without a renewal.
+DEFAULT_VISIBILITY_TIMEOUT = 300
+# Claims of a shard after which it is given up on as failed.
+DEFAULT_MAX_ATTEMPTS = 5
+# Seconds before titles whose requests failed may be claimed again.
+DEFAULT_RETRY_DELAY = 60
+DEFAULT_POLL_INTERVAL = 5
+
+PENDING = "pending"
+LEASED = "leased"
+DONE = "done"
+FAILED = "failed"
+
+
+class WorkQueue:
+    """
+    A durable queue of title shards to enrich, kept in one SQLite file.
+
+    Workers `claim` a shard, which leases it for `visibility_timeout`
+    seconds; a lease that is neither renewed nor completed in time expires
+    and the shard is handed to the next worker, so every title is looked up
+    at least once even if workers die. `complete` stores the details of a
+    shard's titles and marks it done; titles whose requests failed stay in
+    the shard, which becomes claimable again after `retry_delay` seconds.
+    Results are keyed by title, so a shard processed twice just overwrites
+    them. Each process opens its own
+    connection; the default rollback journal keeps the file usable from
+    several hosts on a shared filesystem that supports locking.
+    """
+
+    def __init__(
+        self,
+        path,
+        visibility_timeout=DEFAULT_VISIBILITY_TIMEOUT,
+        max_attempts=DEFAULT_MAX_ATTEMPTS,
+        retry_delay=DEFAULT_RETRY_DELAY,
+    ):
+        self.path = path
+        self.visibility_timeout = visibility_timeout
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self._conn = sqlite3.connect(path, timeout=60, isolation_level=None)
+        with self._transaction():
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS shards ("
+                "id INTEGER PRIMARY KEY, titles TEXT NOT NULL, state TEXT NOT NULL, "
+                "owner TEXT, lease_expires REAL, attempts INTEGER NOT NULL DEFAULT 0, updated_at REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS shards_state ON shards (state, lease_expires)")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                "title TEXT PRIMARY KEY, details TEXT, shard_id INTEGER NOT NULL, worker TEXT NOT NULL, "
+                "completed_at REAL NOT NULL)"
+            )
+
+    def close(self):
+        self._conn.close()
+
+    @contextmanager
+    def _transaction(self):
+        # BEGIN IMMEDIATE takes the write lock up front, so two workers can
+        # never read the same claimable shard and both take it.
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+        self._conn.execute("COMMIT")
+
+    def enqueue(self, titles, shard_size=DEFAULT_SHARD_SIZE):
+        """
+        Adds the titles that are neither queued nor resolved yet, in shards
+        of `shard_size`. Titles of failed shards are queued again and taken
+        out of those shards. Returns the number of titles added.
+        """
+        with self._transaction():
+            known = {title for (title,) in self._conn.execute("SELECT title FROM results")}
+            failed_shards = []
+            for shard_id, state, shard_titles in self._conn.execute("SELECT id, state, titles FROM shards"):
+                if state == FAILED:
+                    failed_shards.append((shard_id, json.loads(shard_titles)))
+                else:
+                    known.update(json.loads(shard_titles))
+            new_titles = [title for title in dict.fromkeys(titles) if title and title not in known]
+            requeued = set(new_titles)
+            now = time.time()
+            for shard_id, shard_titles in failed_shards:
+                remaining = [title for title in shard_titles if title not in requeued]
+                if not remaining:
+                    self._conn.execute("DELETE FROM shards WHERE id = ?", (shard_id,))
+                elif len(remaining) < len(shard_titles):
+                    self._conn.execute(
+                        "UPDATE shards SET titles = ?, updated_at = ? WHERE id = ?",
+                        (json.dumps(remaining), now, shard_id),
+                    )
+            self._conn.executemany(
+                "INSERT INTO shards (titles, state, updated_at) VALUES (?, ?, ?)",
+                [
+                    (json.dumps(new_titles[i:i + shard_size]), PENDING, now)
+                    for i in range(0, len(new_titles), shard_size)
+                ],
+            )
+        return len(new_titles)
+
+    def claim(self, worker):
+        """
+        Leases the oldest pending shard, or one whose lease expired, to
+        `worker`. Returns (shard id, titles), or None when nothing is
+        claimable right now. Shards claimed `max_attempts` times are marked
+        failed instead.
+        """
+        now = time.time()
+        with self._transaction():
+            self._conn.execute(
+                "UPDATE shards SET state = ?, owner = NULL, updated_at = ? "
+                "WHERE state = ? AND lease_expires < ? AND attempts >= ?",
+                (FAILED, now, LEASED, now, self.max_attempts),
+            )
+            row = self._conn.execute(
+                "SELECT id, titles FROM shards WHERE state = ? OR (state = ? AND lease_expires < ?) "
+                "ORDER BY id LIMIT 1",
+                (PENDING, LEASED, now),
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute(
+                "UPDATE shards SET state = ?, owner = ?, lease_expires = ?, attempts = attempts + 1, updated_at = ? "
+                "WHERE id = ?",
+                (LEASED, worker, now + self.visibility_timeout, now, row[0]),
+            )
+        return row[0], json.loads(row[1])
+
+    def renew(self, shard_id, worker):
+        """Extends `worker`'s lease on a shard; returns False if it lost the lease."""
+        now = time.time()
+        with self._transaction():
+            cursor = self._conn.execute(
+                "UPDATE shards SET lease_expires = ?, updated_at = ? WHERE id = ? AND state = ? AND owner = ?",
+                (now + self.visibility_timeout, now, shard_id, LEASED, worker),
+            )
+        return cursor.rowcount == 1
+
+    def complete(self, shard_id, worker, details_by_title, failed_titles=()):
+        """
+        Stores the details (or None for titles BGG could not find) of a
+        shard's titles and marks it done. `failed_titles`, whose requests
+        failed, get no result: the shard is cut down to them and released,
+        to be claimed again after `retry_delay` seconds, which counts as
+        another attempt. The results are kept even if the lease had expired
+        meanwhile, but the shard is then left to its new holder unless it
+        is done; returns whether the lease was still held.
+        """
+        failed_set = set(failed_titles)
+        failed_titles = [title for title in details_by_title if title in failed_set]
+        now = time.time()
+        with self._transaction():
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO results (title, details, shard_id, worker, completed_at) VALUES (?, ?, ?, ?, ?)",
+                [
+                    (title, json.dumps(details) if details else None, shard_id, worker, now)
+                    for title, details in details_by_title.items()
+                    if title not in failed_titles
+                ],
+            )
+            held = self._conn.execute(
+                "SELECT 1 FROM shards WHERE id = ? AND state = ? AND owner = ?", (shard_id, LEASED, worker)
+            ).fetchone() is not None
+            if not failed_titles:
+                self._conn.execute(
+                    "UPDATE shards SET state = ?, owner = ?, lease_expires = NULL, updated_at = ? WHERE id = ?",
+                    (DONE, worker, now, shard_id),
+                )
+            elif held:
+                # An ownerless lease expiring after the delay: `claim` then
+                # hands the shard out again, or fails it after max_attempts.
+                self._conn.execute(
+                    "UPDATE shards SET titles = ?, owner = NULL, lease_expires = ?, updated_at = ? WHERE id = ?",
+                    (json.dumps(failed_titles), now + self.retry_delay, now, shard_id),
+                )
+        return held
+
+    def counts(self):
+        """Returns the number of shards in each state; expired leases count as pending."""
+        now = time.time()
+        counts = {PENDING: 0, LEASED: 0, DONE: 0, FAILED: 0}
+        for state, expired, count in self._conn.execute(
+            "SELECT state, state = ? AND lease_expires < ?, COUNT(*) FROM shards GROUP BY 1, 2", (LEASED, now)
+        ):
+            counts[PENDING if expired else state] += count
+        return counts
+
+    def unfinished(self):
+        """Returns the number of shards that are neither done nor failed."""
+        counts = self.counts()
+        return counts[PENDING] + counts[LEASED]
+
+    def results(self):
+        """Returns the stored details (or None) of every resolved title."""
+        return {
+            title: json.loads(details) if details is not None else None
+            for title, details in self._conn.execute("SELECT title, details FROM results")
+        }
+
+
+def default_worker_id():
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+def enqueue_boardgames(json_file_path, queue, shard_size=DEFAULT_SHARD_SIZE):
+    """Shards the titles of the games in a boardgames file that still need details."""
+    records = iter_boardgames_data(json_file_path)
+    return queue.enqueue([record.title for record in records if record.title and record.needs_details()], shard_size)
+
+
+class _LeaseLost(Exception):
+    pass
+
+
+def _lease_renewer(queue, shard_id, worker):
+    """
+    Returns a callback that renews the lease on a shard once a third of the
+    visibility timeout has passed since the last renewal, and raises
+    `_LeaseLost` once another worker has taken the shard.
+    """
+    last_renewal = time.monotonic()
+
+    def renew():
+        nonlocal last_renewal
+        if time.monotonic() - last_renewal < queue.visibility_timeout / 3:
+            return
+        if not queue.renew(shard_id, worker):
+            raise _LeaseLost()
+        last_renewal = time.monotonic()
+
+    return renew
+
+
+def run_worker(queue, bgg_api, worker=None, poll_interval=DEFAULT_POLL_INTERVAL, wait=True):
+    """
+    Claims shards and looks their titles up with `bgg_api` until the queue
+    has no unfinished shards left (or, without `wait`, none claimable).
+    The rate budget of this worker is that of `bgg_api`'s rate limiter.
+    The lease is renewed between requests, so slow shards are not handed to
+    another worker; a shard whose lease was lost anyway is abandoned.
+    Titles whose requests failed go back to the queue. Returns the number
+    of shards processed.
+    """
+    worker = worker or default_worker_id()
+    completed = 0
+    while True:
+        claimed = queue.claim(worker)
+        if claimed is None:
+            if not wait or queue.unfinished() == 0:
+                return completed
+            time.sleep(poll_interval)
+            continue
+
+        shard_id, titles = claimed
+        print(f"[{worker}] Looking up shard {shard_id} ({len(titles)} titles)...")
+        failed = set()
+        try:
+            details_by_title = bgg_api.get_bgg_game_details_many(
+                titles, failed=failed, on_progress=_lease_renewer(queue, shard_id, worker)
+            )
+        except _LeaseLost:
+            print(f"[{worker}] Lost the lease on shard {shard_id} to another worker; abandoning it.")
+            bgg_api.metrics.increment("shards_total", worker=worker, outcome="lease_lost")
+            continue
+        if failed:
+            print(f"[{worker}] Requests failed for {len(failed)} titles of shard {shard_id}; they will be retried.")
+        if not queue.complete(shard_id, worker, details_by_title, failed_titles=failed):
+            print(f"[{worker}] The lease on shard {shard_id} expired before it completed; results kept anyway.")
+        bgg_api.metrics.increment("shards_total", worker=worker, outcome="retry" if failed else "done")
+        completed += 1
+
+
+def merge_results(queue, json_file_path):
+    """
+    Folds the queue's results into a boardgames file: every game still
+    needing details whose title was resolved gets them, or is marked not
+    found. JSON files are rewritten atomically; JSON Lines files get the
+    changed records appended. Returns the number of games updated.
+    """
+    results = queue.results()
+    if is_jsonl_path(json_file_path):
+        records = iter_boardgames_data(json_file_path)
+    else:
+        records = read_boardgames_data(json_file_path)
+        if records is None:
+            return 0
+
+    changed = []
+    for record in records:
+        if record.title not in results or not record.needs_details():
+            continue
+        before = record.to_dict()
+        details = results[record.title]
+        if details:
+            record.apply_details(details)
+        else:
+            record.mark_not_found()
+        # Games already marked not found still "need details"; merging the
+        # same results again leaves them, and the file, unchanged.
+        if record.to_dict() != before:
+            changed.append(record)
+
+    if changed:
+        if is_jsonl_path(json_file_path):
+            append_boardgames_jsonl(json_file_path, changed)
+        else:
+            write_json_atomic(json_file_path, records, default=json_default)
+    return len(changed)
+
+
+def _work(args, worker):
+    # Runs in each worker process; imports the HTTP client only there.
+    from bgg_api import BggApi
+    from rate_limiter import AdaptiveTokenBucket, TokenBucket
+    from response_cache import ResponseCache
+
+    if args.adaptive:
+        rate_limiter = AdaptiveTokenBucket(args.rate, max_rate=max(args.max_rate, args.rate))
+    else:
+        rate_limiter = TokenBucket(args.rate)
+    api_options = {"rate_limiter": rate_limiter}
+    if args.timeout is not None:
+        api_options["timeout"] = args.timeout
+    if args.cache_dir:
+        api_options["cache"] = ResponseCache(args.cache_dir)
+    bgg_api = BggApi(**api_options)
+    queue = WorkQueue(
+        args.queue,
+        visibility_timeout=args.visibility_timeout,
+        max_attempts=args.max_attempts,
+        retry_delay=args.retry_delay,
+    )
+    try:
+        completed = run_worker(queue, bgg_api, worker=worker, poll_interval=args.poll_interval, wait=not args.no_wait)
+    finally:
+        queue.close()
+        bgg_api.close()
+    print(f"[{worker}] Completed {completed} shards. Metrics: {json.dumps(bgg_api.metrics.summary())}")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Enrich a boardgames.json file through a shared SQLite work queue.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    enqueue = commands.add_parser("enqueue", help="Shard the titles that still need details into the queue.")
+    enqueue.add_argument("json_file", help="Path to the boardgames.json (or .jsonl) file to enrich.")
+    enqueue.add_argument("queue", help="Path to the SQLite queue file (created if missing).")
+    enqueue.add_argument("--shard-size", type=int, default=DEFAULT_SHARD_SIZE, help="Titles per shard.")
+
+    work = commands.add_parser("work", help="Claim shards and look them up until the queue is drained.")
+    work.add_argument("queue", help="Path to the SQLite queue file.")
+    work.add_argument("--processes", type=int, default=1, help="Worker processes to start on this host.")
+    work.add_argument("--worker-id", default=None, help="Name of this worker (default: host-pid).")
+    work.add_argument("--rate", type=float, default=0.5, help="Requests per second of each worker.")
+    work.add_argument("--adaptive", action="store_true", help="Let each worker adapt its rate (see update_boardgames.py).")
+    work.add_argument("--max-rate", type=float, default=5.0, help="Upper bound of an adaptive rate.")
+    work.add_argument("--cache-dir", default=None, help="Directory of a persistent cache of BGG responses.")
+    work.add_argument("--timeout", type=float, default=None, help="Read timeout of each request, in seconds.")
+    work.add_argument(
+        "--visibility-timeout", type=float, default=DEFAULT_VISIBILITY_TIMEOUT,
+        help="Seconds before an unfinished shard's lease expires and another worker may take it.",
+    )
+    work.add_argument("--max-attempts", type=int, default=DEFAULT_MAX_ATTEMPTS, help="Claims before a shard fails.")
+    work.add_argument(
+        "--retry-delay", type=float, default=DEFAULT_RETRY_DELAY,
+        help="Seconds before titles whose requests failed may be claimed again.",
+    )
+    work.add_argument("--poll-interval", type=float, default=DEFAULT_POLL_INTERVAL, help="Seconds between polls.")
+    work.add_argument(
+        "--no-wait", action="store_true", help="Exit once nothing is claimable instead of waiting for other workers."
+    )
+
+    status = commands.add_parser("status", help="Print the number of shards in each state.")
+    status.add_argument("queue", help="Path to the SQLite queue file.")
+
+    merge = commands.add_parser("merge", help="Fold the resolved titles back into the boardgames file.")
+    merge.add_argument("queue", help="Path to the SQLite queue file.")
+    merge.add_argument("json_file", help="Path to the boardgames.json (or .jsonl) file to update.")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.command == "work":
+        WorkQueue(args.queue).close()
+        workers = [args.worker_id or default_worker_id()] if args.processes <= 1 else [
+            f"{args.worker_id or socket.gethostname()}-{i}" for i in range(args.processes)
+        ]
+        if len(workers) == 1:
+            _work(args, workers[0])
+            return
+        processes = [multiprocessing.Process(target=_work, args=(args, worker)) for worker in workers]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+        return
+
+    queue = WorkQueue(args.queue)
+    try:
+        if args.command == "enqueue":
+            added = enqueue_boardgames(args.json_file, queue, shard_size=args.shard_size)
+            print(f"Queued {added} titles; shards: {queue.counts()}")
+        elif args.command == "status":
+            print(json.dumps({"shards": queue.counts(), "resolved_titles": len(queue.results())}))
+        elif args.command == "merge":
+            merged = merge_results(queue, args.json_file)
+            print(f"Merged details into {merged} games in {args.json_file}; shards: {queue.counts()}")
+    finally:
+        queue.close()
+
+
+if __name__ == "__main__":
+    main()